@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark pandoc conversion modes of tools/textbook_html_to_markdown.py.
+
+Converts every textbook page with the serial loop (one pandoc run per page),
+the thread pool, and batched pandoc runs, reports wall time for
+each, and counts pages whose Markdown differs from the serial output.
+"""
+
+# Standard Library
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules
+import textbook_pages
+import textbook_html_to_markdown
+
+
+#============================================
+
+def parse_args() -> argparse.Namespace:
+	"""Parse command-line arguments."""
+	parser = argparse.ArgumentParser(
+		description="Benchmark serial, threaded, and batched pandoc conversion.",
+	)
+	parser.add_argument(
+		"-i",
+		"--input-dir",
+		dest="input_dir",
+		default=os.path.join(REPO_ROOT, "Textbook"),
+		help="Textbook directory (default: Textbook).",
+	)
+	parser.add_argument(
+		"-j",
+		"--jobs",
+		dest="jobs",
+		type=int,
+		default=os.cpu_count() or 1,
+		help="Worker threads for the threaded mode (default: CPU count).",
+	)
+	return parser.parse_args()
+
+
+#============================================
+
+def main() -> None:
+	"""Time each conversion mode and compare against the serial output."""
+	args = parse_args()
+	html_files = textbook_pages.find_html_files(Path(args.input_dir))
+	html_texts = [path.read_text(encoding="utf-8") for path in html_files]
+	print(f"Pages: {len(html_texts)}")
+
+	serial_texts = None
+	for mode in ("serial", "threads", "batch"):
+		start_time = time.perf_counter()
+		markdown_texts = list(textbook_html_to_markdown.CONVERTERS[mode](html_texts, args.jobs))
+		elapsed = time.perf_counter() - start_time
+		if serial_texts is None:
+			serial_texts = markdown_texts
+		differing = 0
+		for serial_text, markdown_text in zip(serial_texts, markdown_texts):
+			if serial_text.strip() != markdown_text.strip():
+				differing += 1
+		print(f"{mode:8s} {elapsed:7.2f} s  pages differing from serial: {differing}")
+
+
+if __name__ == "__main__":
+	main()
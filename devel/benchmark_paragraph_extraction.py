@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark paragraph extraction: lxml single pass vs. the html.parser classes.
+
+Runs both extractors from tools/extract_textbook_yake_keywords.py over the
+textbook and source HTML, reports wall time, and counts pages whose
+paragraph lists differ.
+"""
+
+# Standard Library
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules
+import extract_textbook_yake_keywords
+
+
+#============================================
+
+def parse_args() -> argparse.Namespace:
+	"""Parse command-line arguments."""
+	parser = argparse.ArgumentParser(
+		description="Benchmark lxml vs. html.parser paragraph extraction.",
+	)
+	parser.add_argument(
+		"-i",
+		"--input-dir",
+		dest="input_dirs",
+		action="append",
+		default=[],
+		help="HTML directory to scan (repeatable, default: Textbook and Sources).",
+	)
+	parser.add_argument(
+		"-r",
+		"--repeat",
+		dest="repeat",
+		type=int,
+		default=3,
+		help="Timed passes per extractor, best time is reported (default: 3).",
+	)
+	return parser.parse_args()
+
+
+#============================================
+
+def time_extractor(extract_function, html_texts: list[str], repeat: int) -> float:
+	"""Return the best wall time in seconds for extracting all pages."""
+	best_seconds = float("inf")
+	for _ in range(repeat):
+		start_time = time.perf_counter()
+		for html_text in html_texts:
+			extract_function(html_text)
+		elapsed = time.perf_counter() - start_time
+		best_seconds = min(best_seconds, elapsed)
+	return best_seconds
+
+
+#============================================
+
+def main() -> None:
+	"""Program entry point."""
+	args = parse_args()
+	input_dirs = args.input_dirs or [
+		os.path.join(REPO_ROOT, "Textbook"),
+		os.path.join(REPO_ROOT, "Sources"),
+	]
+
+	html_texts: list[str] = []
+	html_paths: list[Path] = []
+	for input_dir in input_dirs:
+		for path in extract_textbook_yake_keywords.collect_html_files(Path(input_dir)):
+			html_paths.append(path)
+			html_texts.append(path.read_text(encoding="utf-8", errors="replace"))
+	if not html_texts:
+		raise RuntimeError(f"No HTML files found in: {input_dirs}")
+	total_bytes = sum(len(text) for text in html_texts)
+
+	htmlparser_seconds = time_extractor(
+		extract_textbook_yake_keywords.extract_paragraph_texts_htmlparser,
+		html_texts,
+		args.repeat,
+	)
+	lxml_seconds = time_extractor(
+		extract_textbook_yake_keywords.extract_paragraph_texts,
+		html_texts,
+		args.repeat,
+	)
+
+	# Count pages where the two extractors disagree
+	differing_paths: list[Path] = []
+	for path, html_text in zip(html_paths, html_texts):
+		lxml_paragraphs = extract_textbook_yake_keywords.extract_paragraph_texts(html_text)
+		parser_paragraphs = extract_textbook_yake_keywords.extract_paragraph_texts_htmlparser(
+			html_text,
+		)
+		if lxml_paragraphs != parser_paragraphs:
+			differing_paths.append(path)
+
+	print(f"Pages: {len(html_texts)} ({total_bytes / 1e6:.1f} MB)")
+	print(f"html.parser: {htmlparser_seconds:.3f} s")
+	print(f"lxml:        {lxml_seconds:.3f} s")
+	print(f"Speedup:     {htmlparser_seconds / lxml_seconds:.1f}x")
+	print(f"Pages with different paragraphs: {len(differing_paths)}")
+	for path in differing_paths:
+		print(f"\t{path}")
+
+
+if __name__ == "__main__":
+	main()
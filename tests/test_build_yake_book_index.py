@@ -0,0 +1,154 @@
+"""
+Tests for the multi-source YAKE book index helpers.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import build_yake_book_index
+import extract_textbook_yake_keywords
+
+FILLER_TEXTS = (
+	"graph layout places every vertex on a grid before drawing edges.",
+	"unit conversion multiplies the value by a ratio of equal quantities.",
+	"matrix inverse exists only when the determinant is not zero here.",
+	"random seed fixes the generated numbers so problems repeat exactly.",
+	"hint button shows extra help after the second wrong attempt made.",
+	"number line marks integers at equal spacing from left to right.",
+)
+
+
+#============================================
+class FakeExtractor:
+	"""Keyword extractor stand-in that returns the leading word pairs of a paragraph."""
+
+	def __init__(self, top: int):
+		self.top = top
+
+	def extract_keywords(self, text: str) -> list[tuple[str, float]]:
+		words = text.rstrip(".").split()
+		pairs = [" ".join(words[index:index + 2]) for index in range(len(words) - 1)]
+		return [(pair, 0.1 * (rank + 1)) for rank, pair in enumerate(pairs[:self.top])]
+
+
+#============================================
+def build_index(tmp_path, sources: list[tuple[str, float]], top_k: int):
+	"""Open a fresh index under tmp_path and index the given sources."""
+	connection = build_yake_book_index.open_index(tmp_path / "index.sqlite")
+	counts = build_yake_book_index.update_sources(
+		connection,
+		FakeExtractor(top_k),
+		sources,
+		build_yake_book_index.keyword_settings(top_k),
+	)
+	return connection, counts
+
+
+#============================================
+# Tests for plain-text paragraph reading
+#============================================
+
+
+def test_extract_text_paragraphs_blank_line_split():
+	"""Blank lines separate paragraphs and wrapped lines are joined."""
+	text = "8.1: Editing a Page\n\nFirst line wraps\nonto the next.\n\n\nSecond paragraph.\n"
+	result = extract_textbook_yake_keywords.extract_text_paragraphs(text)
+	assert result == ["8.1: Editing a Page", "First line wraps onto the next.", "Second paragraph."]
+
+
+def test_collect_source_files_mixed(tmp_path):
+	"""HTML and text files are collected, index pages are skipped."""
+	(tmp_path / "a.txt").write_text("x", encoding="utf-8")
+	(tmp_path / "b.html").write_text("<p>x</p>", encoding="utf-8")
+	(tmp_path / "1.0-Index.html").write_text("<p>x</p>", encoding="utf-8")
+	result = extract_textbook_yake_keywords.collect_source_files(tmp_path)
+	assert [path.name for path in result] == ["a.txt", "b.html"]
+
+
+#============================================
+# Tests for source specs
+#============================================
+
+
+def test_parse_source_spec_with_weight():
+	"""A PATH:WEIGHT spec splits into path and float weight."""
+	result = build_yake_book_index.parse_source_spec("Sources/Insight-HTML:0.5")
+	assert result == ("Sources/Insight-HTML", 0.5)
+
+
+def test_parse_source_spec_default_weight():
+	"""A bare path gets weight 1.0."""
+	result = build_yake_book_index.parse_source_spec("Textbook")
+	assert result == ("Textbook", 1.0)
+
+
+#============================================
+# Tests for the index pipeline
+#============================================
+
+
+def test_update_sources_reindexes_on_top_k_change(tmp_path):
+	"""Unchanged files are skipped unless the top-k setting changed."""
+	source_dir = tmp_path / "guide"
+	source_dir.mkdir()
+	(source_dir / "a.txt").write_text(FILLER_TEXTS[0], encoding="utf-8")
+	(source_dir / "b.txt").write_text(FILLER_TEXTS[1], encoding="utf-8")
+	sources = [(str(source_dir), 1.0)]
+	connection, counts = build_index(tmp_path, sources, 1)
+	assert counts == (2, 0, 0)
+	settings = build_yake_book_index.keyword_settings(1)
+	counts = build_yake_book_index.update_sources(connection, FakeExtractor(1), sources, settings)
+	assert counts == (0, 2, 0)
+	settings = build_yake_book_index.keyword_settings(3)
+	counts = build_yake_book_index.update_sources(connection, FakeExtractor(3), sources, settings)
+	assert counts == (2, 0, 0)
+	keyword_count = connection.execute("SELECT COUNT(*) FROM keywords").fetchone()[0]
+	assert keyword_count == 6
+	(source_dir / "b.txt").unlink()
+	counts = build_yake_book_index.update_sources(connection, FakeExtractor(3), sources, settings)
+	assert counts == (0, 1, 1)
+
+
+def test_rebuild_terms_weights_postings_by_source(tmp_path):
+	"""A term found in two sources sums the source weights."""
+	book_dir = tmp_path / "book"
+	guide_dir = tmp_path / "guide"
+	book_dir.mkdir()
+	guide_dir.mkdir()
+	answer_text = "answer checker compares the student reply with the correct value."
+	(book_dir / "answer.txt").write_text(answer_text, encoding="utf-8")
+	(guide_dir / "answer.txt").write_text(answer_text, encoding="utf-8")
+	for index, text in enumerate(FILLER_TEXTS):
+		(guide_dir / f"filler{index}.txt").write_text(text, encoding="utf-8")
+	connection, _counts = build_index(tmp_path, [(str(book_dir), 1.0), (str(guide_dir), 0.5)], 1)
+	term_count = build_yake_book_index.rebuild_terms(connection)
+	assert term_count == 7
+	row = connection.execute(
+		"SELECT doc_count, page_count, weighted_score FROM terms "
+		"WHERE canonical_term = 'answer checker'"
+	).fetchone()
+	assert row == (2, 2, 1.5)
+
+
+def test_query_index_lists_heavier_source_first(tmp_path):
+	"""Query output has a summary line, then pages by weight with paragraph ids."""
+	connection = build_yake_book_index.open_index(tmp_path / "index.sqlite")
+	connection.execute(
+		"INSERT INTO terms VALUES ('answer checker', 'answer checker', 2, 2, 1.5, 0.1)",
+	)
+	connection.executemany(
+		"INSERT INTO postings VALUES ('answer checker', ?, ?, ?)",
+		[("guide/a.txt#p3", "guide/a.txt", 0.5), ("book/a.txt#p1", "book/a.txt", 1.0)],
+	)
+	result = build_yake_book_index.query_index(connection, "Answer checkers")
+	assert result == [
+		"answer checker (score 1.50, 2 paragraphs, 2 pages)",
+		"\tbook/a.txt: p1",
+		"\tguide/a.txt: p3",
+	]
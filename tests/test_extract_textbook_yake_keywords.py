@@ -0,0 +1,57 @@
+"""
+Tests for paragraph extraction in the YAKE keyword pipeline.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import extract_textbook_yake_keywords
+
+
+SAMPLE_HTML = """
+<html><head><title>Page</title><style>p { color: red; }</style></head>
+<body>
+<h2>Answer  checkers</h2>
+<p>First <b>bold</b> text<!-- note --> after comment.</p>
+<script>var x = "<p>not text</p>";</script>
+<table><tr><td>Cell <ul><li>nested item</li></ul> end</td></tr></table>
+<div>loose text</div>
+</body></html>
+"""
+
+
+#============================================
+# Tests for lxml vs. html.parser paragraph boundaries
+#============================================
+
+
+def test_lxml_matches_htmlparser_paragraphs():
+	"""The lxml extractor keeps the html.parser paragraph boundaries."""
+	lxml_result = extract_textbook_yake_keywords.extract_paragraph_texts(SAMPLE_HTML)
+	parser_result = extract_textbook_yake_keywords.extract_paragraph_texts_htmlparser(SAMPLE_HTML)
+	assert lxml_result == parser_result
+	assert lxml_result == [
+		"Answer checkers",
+		"First bold text after comment.",
+		"Cell nested item end",
+	]
+
+
+def test_visible_text_fallback():
+	"""Pages without paragraph tags fall back to all visible text."""
+	html_text = "<div>Only <span>div</span> text</div><script>skip()</script>"
+	result = extract_textbook_yake_keywords.extract_paragraph_texts(html_text)
+	assert result == ["Only div text"]
+
+
+def test_paragraph_blocks_source_lines():
+	"""Paragraph blocks carry the source line of their opening tag."""
+	html_text = "<p>one</p>\n\n<p>two</p>"
+	result = extract_textbook_yake_keywords.extract_paragraph_blocks(html_text)
+	assert result == [(1, "one"), (3, "two")]
@@ -0,0 +1,79 @@
+"""
+Tests for batch link extraction and merging in extract_url_links_from_html_file.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import extract_url_links_from_html_file
+
+
+#============================================
+# Tests for extraction
+#============================================
+
+
+def test_extract_all_links_dedupes_and_drops_fragments():
+	"""href and src values are collected once each, without fragments, sorted."""
+	html_text = (
+		'<p><a href="https://b.org/x#top">x</a> <img src=" /img.png ">'
+		'<a HREF="https://b.org/x">again</a><a href="#local">skip</a><a>none</a></p>'
+	)
+	links = extract_url_links_from_html_file.extract_all_links(html_text)
+	assert links == ["/img.png", "https://b.org/x"]
+	assert extract_url_links_from_html_file.extract_all_links("  ") == []
+	assert extract_url_links_from_html_file.extract_all_links("<!-- x -->") == []
+
+
+def test_find_html_files_expands_directories(tmp_path):
+	"""Directories contribute their .html/.htm files recursively; other files are skipped."""
+	(tmp_path / "a").mkdir()
+	(tmp_path / "a" / "one.html").write_text("<a href='x'>x</a>", encoding="utf-8")
+	(tmp_path / "a" / "two.HTM").write_text("", encoding="utf-8")
+	(tmp_path / "a" / "notes.txt").write_text("", encoding="utf-8")
+	files = extract_url_links_from_html_file.find_html_files([str(tmp_path)])
+	assert [os.path.basename(path) for path in files] == ["one.html", "two.HTM"]
+
+
+#============================================
+# Tests for the merged store and link graph
+#============================================
+
+
+def test_write_links_merges_without_duplicates(tmp_path, monkeypatch):
+	"""Repeated runs merge into one sorted unique list, even across spilled runs."""
+	monkeypatch.setattr(extract_url_links_from_html_file, "RUN_LINES", 2)
+	output_file = str(tmp_path / "links.txt")
+	# An older, unsorted output with duplicates and blank lines
+	(tmp_path / "links.txt").write_text("e\nb\n\nb\nd\na\n", encoding="utf-8")
+	count = extract_url_links_from_html_file.write_links(output_file, ["c", "a", "f"], append=True)
+	assert (tmp_path / "links.txt").read_text(encoding="utf-8") == "a\nb\nc\nd\ne\nf\n"
+	assert count == 6
+	extract_url_links_from_html_file.write_links(output_file, ["c", "a"], append=True)
+	assert (tmp_path / "links.txt").read_text(encoding="utf-8") == "a\nb\nc\nd\ne\nf\n"
+	extract_url_links_from_html_file.write_links(output_file, ["z"], append=False)
+	assert (tmp_path / "links.txt").read_text(encoding="utf-8") == "z\n"
+	assert sorted(os.listdir(tmp_path)) == ["links.txt"]
+
+
+def test_link_graph_counts_pages_per_link_and_host(tmp_path):
+	"""Each page counts once per link and once per host it references."""
+	graph = {
+		"p1.html": ["https://a.org/1", "https://a.org/2", "/local"],
+		"p2.html": ["https://a.org/1"],
+	}
+	link_counts, host_counts = extract_url_links_from_html_file.count_referencing_pages(graph)
+	assert link_counts["https://a.org/1"] == 2
+	assert host_counts == {"a.org": 2}
+	graph_file = tmp_path / "graph.tsv"
+	extract_url_links_from_html_file.write_link_graph(str(graph_file), graph)
+	lines = graph_file.read_text(encoding="utf-8").splitlines()
+	assert lines[0] == "page\tlink"
+	assert lines[1:] == ["p1.html\thttps://a.org/1", "p1.html\thttps://a.org/2", "p1.html\t/local",
+		"p2.html\thttps://a.org/1"]
@@ -0,0 +1,89 @@
+"""
+Tests for duplicate PG block normalization and clustering.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import find_duplicate_pg_blocks
+
+
+#============================================
+# Tests for normalization
+#============================================
+
+
+def test_strip_perl_comment_keeps_quoted_hash():
+	"""A '#' inside quotes or after '$' is not a comment."""
+	line = "$s = 'a # b'; $n = $#list;  # trailing note"
+	result = find_duplicate_pg_blocks.strip_perl_comment(line)
+	assert result == "$s = 'a # b'; $n = $#list;  "
+
+
+def test_strip_perl_comment_escaped_backslash_closes_string():
+	"""An escaped backslash before the closing quote does not keep the string open."""
+	line = '$s = "\\\\"; $t = 1;  # note'
+	result = find_duplicate_pg_blocks.strip_perl_comment(line)
+	assert result == '$s = "\\\\"; $t = 1;  '
+
+
+def test_normalize_keeps_strings_and_heredocs_verbatim():
+	"""Whitespace is collapsed in code only; string and heredoc contents stay in the key."""
+	normalize = find_duplicate_pg_blocks.normalize_pg_block
+	assert normalize('  $a  =  "x  y" ;  ') == '$a = "x  y" ;'
+	assert normalize('$a = "x  y";') != normalize('$a = "x y";')
+	assert normalize("$s = 'a\n\n   b  # c';\n$t = 2;") == "$s = 'a\n\n   b  # c';\n$t = 2;"
+	heredoc = '$text = <<"END_TEXT";\n  two  spaces # kept\n\nEND_TEXT\n$x  =  1;'
+	assert normalize(heredoc) == '$text = <<"END_TEXT";\n  two  spaces # kept\n\nEND_TEXT\n$x = 1;'
+
+
+def test_normalize_keeps_pgml_headings():
+	"""Comments are stripped in Perl code but '#' lines inside PGML are kept."""
+	text = "$a = 1;   # set a\n\n# comment line\nBEGIN_PGML\n# Heading\n[$a]\nEND_PGML\n"
+	result = find_duplicate_pg_blocks.normalize_pg_block(text)
+	assert result == "$a = 1;\nBEGIN_PGML\n# Heading\n[$a]\nEND_PGML"
+
+
+def test_normalize_keeps_pgml_layout():
+	"""Blank lines and indentation inside PGML stay in the key; trailing spaces do not."""
+	paragraphs = "BEGIN_PGML\nFirst  line   \n\n    code line\nEND_PGML\r\n"
+	joined = "BEGIN_PGML\nFirst  line\n    code line\nEND_PGML"
+	result = find_duplicate_pg_blocks.normalize_pg_block(paragraphs)
+	assert result == "BEGIN_PGML\nFirst  line\n\n    code line\nEND_PGML"
+	fingerprint = find_duplicate_pg_blocks.fingerprint_pg_block
+	assert fingerprint(paragraphs) != fingerprint(joined)
+
+
+def test_canonicalize_variables():
+	"""Variables are renamed in order of first appearance."""
+	result = find_duplicate_pg_blocks.canonicalize_variables("$x = $y + @list; [$x]")
+	assert result == "$v1 = $v2 + @v3; [$v1]"
+
+
+#============================================
+# Tests for clustering
+#============================================
+
+
+def test_cluster_blocks():
+	"""Whitespace/comment variants are exact duplicates; renames are near duplicates."""
+	base = "DOCUMENT();\n$a = random(1, 5, 1);\n$ans = Compute(\"$a + 2\");\nENDDOCUMENT();"
+	blocks = [
+		{"text": base},
+		{"text": base.replace("\n", "   # note\n", 1)},
+		{"text": base.replace("$a", "$b")},
+		{"text": "BEGIN_PGML\nSomething else entirely\nEND_PGML"},
+	]
+	find_duplicate_pg_blocks.cluster_blocks(blocks, 0.8)
+	assert blocks[0]["exact_cluster"] == blocks[1]["exact_cluster"]
+	assert blocks[0]["exact_size"] == 2
+	assert blocks[2]["exact_cluster"] != blocks[0]["exact_cluster"]
+	assert blocks[2]["near_cluster"] == blocks[0]["near_cluster"]
+	assert blocks[0]["near_size"] == 3
+	assert blocks[3]["near_cluster"] != blocks[0]["near_cluster"]
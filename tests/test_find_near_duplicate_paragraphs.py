@@ -0,0 +1,61 @@
+"""
+Tests for MinHash/LSH near-duplicate paragraph detection.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import find_near_duplicate_paragraphs
+
+
+ORIGINAL = (
+	"<p>A MultiAnswer is used to verify that the student answers satisfy the equation "
+	"for the circle and have the required starting and ending points.</p>"
+)
+PARAPHRASE = (
+	"<p>A MultiAnswer is used to verify that the student answers satisfy the equation "
+	"for the circle and also have the required starting and ending points.</p>"
+)
+UNRELATED = "<p>LibreTexts pages can be remixed into new books with the Remixer tool today.</p>"
+
+
+#============================================
+
+
+def test_jaccard_similarity():
+	"""Exact Jaccard similarity of two small sets."""
+	result = find_near_duplicate_paragraphs.jaccard_similarity({1, 2, 3}, {2, 3, 4})
+	assert result == 0.5
+
+
+def test_candidate_probability_covers_default_threshold():
+	"""Nearly every pair at the default 0.5 similarity becomes an LSH candidate."""
+	assert find_near_duplicate_paragraphs.candidate_probability(0.5) > 0.99
+	assert find_near_duplicate_paragraphs.candidate_probability(0.1) < 0.05
+
+
+def test_finds_paraphrase_only(tmp_path):
+	"""A close paraphrase is reported and an unrelated paragraph is not."""
+	textbook_dir = tmp_path / "Textbook"
+	source_dir = tmp_path / "Sources"
+	textbook_dir.mkdir()
+	source_dir.mkdir()
+	(textbook_dir / "page.html").write_text(PARAPHRASE + "\n" + UNRELATED, encoding="utf-8")
+	(source_dir / "source.html").write_text("\n\n" + ORIGINAL, encoding="utf-8")
+	textbook_units = find_near_duplicate_paragraphs.collect_paragraph_units([str(textbook_dir)])
+	source_units = find_near_duplicate_paragraphs.collect_paragraph_units([str(source_dir)])
+	coeff_a, coeff_b = find_near_duplicate_paragraphs.make_permutations()
+	find_near_duplicate_paragraphs.add_signatures(textbook_units, coeff_a, coeff_b)
+	find_near_duplicate_paragraphs.add_signatures(source_units, coeff_a, coeff_b)
+	candidates = find_near_duplicate_paragraphs.find_candidate_pairs(textbook_units, source_units)
+	rows = find_near_duplicate_paragraphs.score_pairs(textbook_units, source_units, candidates, 0.5)
+	assert len(rows) == 1
+	assert rows[0]["textbook_line"] == 1
+	assert rows[0]["source_line"] == 3
+	assert rows[0]["similarity"] > 0.7
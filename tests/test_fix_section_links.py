@@ -0,0 +1,77 @@
+"""
+Tests for link text rewriting in fix_section_links.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import fix_section_links
+
+
+BOOK_URL = "https://chem.libretexts.org/Workbench/Book"
+PAGE_MAP_ROWS = [
+	{"page_id": "1", "section_number": "", "section_title": "Book", "url": BOOK_URL,
+		"relativePath": "", "parentID": ""},
+	{"page_id": "100", "section_number": "1.2", "section_title": "Answer_Checkers", "url": "",
+		"relativePath": "/01%3A_Intro/1.02%3A_Answer_Checkers", "parentID": "1"},
+	{"page_id": "200", "section_number": "3.4", "section_title": "Units", "url": "",
+		"relativePath": "/03%3A_More/3.04%3A_Units", "parentID": "1"},
+]
+
+
+#============================================
+# Tests for process_file
+#============================================
+
+
+def test_process_file_rewrites_outside_pre_only(tmp_path):
+	"""Links and parentheticals are fixed in prose; code blocks stay byte-identical."""
+	pre_block = '<pre class="pg">See <a href="/@go/page/100">Section 1.2</a> (Section 1.2)</pre>'
+	html = (
+		'<p>Read <a href="/@go/page/100">Section 1.2</a> (Section 1.2).</p>\n'
+		+ pre_block
+		+ '\n<p><a href="/@go/page/200">3.4 Old name</a> and <a href="/@go/page/999">5.6</a></p>\n'
+	)
+	path = tmp_path / "page.html"
+	path.write_text(html, encoding="utf-8")
+	index = fix_section_links.build_page_index(PAGE_MAP_ROWS)
+	result = fix_section_links.process_file(str(path), index, apply=True, display_path="page.html")
+	assert [(change["rule"], change["new"]) for change in result["changes"]] == [
+		("link_text", "Answer Checkers"),
+		("paren", ""),
+		("link_text", "Units"),
+	]
+	assert result["diff"].startswith("--- a/page.html\n+++ b/page.html\n")
+	new_html = path.read_text(encoding="utf-8")
+	assert '<p>Read <a href="/@go/page/100">Answer Checkers</a>.</p>' in new_html
+	assert pre_block in new_html
+	assert '<a href="/@go/page/999">5.6</a>' in new_html
+
+
+def test_book_urls_resolve_by_path_section_and_slug():
+	"""Absolute book links become /@go/page/ links even after the page moved."""
+	index = fix_section_links.build_page_index(PAGE_MAP_ROWS)
+	html = (
+		f'<a href="{BOOK_URL}/01%3A_Intro/1.02%3A_Answer_Checkers">1.2</a>'
+		f' <a href="{BOOK_URL}/09%3A_Old/3.04%3A_Renamed" class="x">units</a>'
+		f' <a href="{BOOK_URL}/09%3A_Old/answer-checkers">here</a>'
+	)
+	new_html, changes = fix_section_links.rewrite_html(html, index)
+	assert new_html == (
+		'<a href="/@go/page/100">Answer Checkers</a>'
+		' <a href="/@go/page/200" class="x">units</a>'
+		' <a href="/@go/page/100">here</a>'
+	)
+	assert [change["rule"] for change in changes] == ["book_url"] * 3
+
+
+def test_split_pre_segments_alternates():
+	"""Odd segments are whole <pre> blocks, including ones with attributes."""
+	segments = fix_section_links.split_pre_segments("a<pre>b</pre>c<PRE class='x'>d</PRE>e")
+	assert segments == ["a", "<pre>b</pre>", "c", "<PRE class='x'>d</PRE>", "e"]
@@ -0,0 +1,407 @@
+"""
+Tests for the concurrent fetch queue in get_insight.
+"""
+
+import os
+import sys
+import asyncio
+import functools
+import threading
+import http.server
+
+import requests
+import lxml.html
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import get_insight
+
+
+#============================================
+# Helpers
+#============================================
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+	"""Static file handler without per-request logging."""
+
+	def log_message(self, *args) -> None:
+		pass
+
+
+def fetch_text(url: str) -> str:
+	"""Fetch a URL from the test server and return the body text."""
+	response = requests.get(url, timeout=5)
+	response.raise_for_status()
+	return response.text
+
+
+def start_static_server(directory: str) -> http.server.ThreadingHTTPServer:
+	"""Serve directory on an ephemeral localhost port in a background thread."""
+	handler = functools.partial(QuietHandler, directory=directory)
+	server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	return server
+
+
+#============================================
+# Tests for run_worker_queue
+#============================================
+
+
+def test_worker_queue_fetches_every_url_concurrently(tmp_path):
+	"""All URLs are fetched once, with more than one request in flight."""
+	for index in range(8):
+		(tmp_path / f"page{index}.html").write_text(f"<p>page {index}</p>", encoding="utf-8")
+	server = start_static_server(str(tmp_path))
+	port = server.server_address[1]
+	# Two host names for the same server, so the per-host limit does not serialize everything
+	hosts = ("127.0.0.1", "localhost")
+	urls = [f"http://{hosts[index % 2]}:{port}/page{index}.html" for index in range(8)]
+	fetched = {}
+	in_flight = [0, 0]
+
+	async def handle_url(worker_index: int, url: str) -> None:
+		in_flight[0] += 1
+		in_flight[1] = max(in_flight[1], in_flight[0])
+		body = await asyncio.to_thread(fetch_text, url)
+		fetched[url] = (worker_index, body)
+		in_flight[0] -= 1
+
+	limiter = get_insight.HostRateLimiter(0.0, jitter=0.0)
+	asyncio.run(get_insight.run_worker_queue(urls, 3, handle_url, limiter))
+	server.shutdown()
+	assert sorted(fetched) == sorted(urls)
+	assert in_flight[1] > 1
+	assert {worker_index for worker_index, _ in fetched.values()} <= {0, 1, 2}
+
+
+def test_host_rate_limiter_spaces_same_host_only():
+	"""Requests to one host are spaced; another host is not delayed by them."""
+	starts = {}
+
+	async def run() -> None:
+		limiter = get_insight.HostRateLimiter(0.05, jitter=0.0)
+		loop = asyncio.get_running_loop()
+		origin = loop.time()
+
+		async def timed(name: str, url: str) -> None:
+			await limiter.wait(url)
+			starts[name] = loop.time() - origin
+
+		await asyncio.gather(
+			timed("a1", "http://a.example/1"),
+			timed("a2", "http://a.example/2"),
+			timed("a3", "http://a.example/3"),
+			timed("b1", "http://b.example/1"),
+		)
+
+	asyncio.run(run())
+	assert starts["a2"] >= 0.045
+	assert starts["a3"] >= 0.095
+	assert starts["b1"] < 0.04
+
+
+def test_host_rate_limiter_adds_random_jitter(monkeypatch):
+	"""Each reserved slot adds random.random() * jitter on top of the minimum interval."""
+	monkeypatch.setattr(get_insight.random, "random", lambda: 0.5)
+	slots = []
+
+	async def run() -> None:
+		limiter = get_insight.HostRateLimiter(0.02, jitter=0.04)
+		loop = asyncio.get_running_loop()
+		origin = loop.time()
+		for index in range(3):
+			await limiter.wait(f"http://a.example/{index}")
+			slots.append(loop.time() - origin)
+
+	asyncio.run(run())
+	assert slots[1] >= 0.035
+	assert slots[2] >= 0.075
+	assert get_insight.HostRateLimiter(0.5).jitter == 1.0
+
+
+#============================================
+# Tests for the static fetch path and resource blocking
+#============================================
+
+
+def test_static_fetch_extracts_mkdocs_article(tmp_path):
+	"""Plain HTTP fetch plus lxml keeps the article and drops the page chrome."""
+	page_html = (
+		"<html><head><title>Answer checkers</title></head><body>"
+		"<nav>menu</nav><article><h1>Answer checkers</h1><p>cmp()</p></article></body></html>"
+	)
+	(tmp_path / "checkers.html").write_text(page_html, encoding="utf-8")
+	server = start_static_server(str(tmp_path))
+	url = f"http://127.0.0.1:{server.server_address[1]}/checkers.html"
+	with get_insight.requests.Session() as session:
+		html_text, _ = get_insight.fetch_static_page(session, url)
+	server.shutdown()
+	title_text, meta_text, body_html = get_insight.extract_static_html(html_text, url)
+	assert title_text == "Answer checkers"
+	assert body_html == "<article><h1>Answer checkers</h1><p>cmp()</p></article>"
+
+
+def test_extract_static_html_mediawiki_and_fallback():
+	"""MediaWiki pages use #firstHeading; pages with no container return None."""
+	wiki_html = (
+		"<html><head><title>Wiki - WeBWorK</title></head><body>"
+		"<h1 id='firstHeading'>Units</h1><div id='mw-content-text'><p>m/s</p></div></body></html>"
+	)
+	url = "https://webwork.maa.org/wiki/Units"
+	title_text, _, body_html = get_insight.extract_static_html(wiki_html, url)
+	assert title_text == "Units"
+	assert "<p>m/s</p>" in body_html
+	assert get_insight.extract_static_html("<html><body><p>x</p></body></html>", url) is None
+	assert get_insight.is_static_url(url)
+	assert not get_insight.is_static_url("https://commons.libretexts.org/insight/page")
+
+
+def test_is_third_party():
+	"""Subdomains of the page's site and allowlisted hosts are first-party; other sites are not."""
+	page_url = "https://commons.libretexts.org/insight/page"
+	assert not get_insight.is_third_party("https://cdn.libretexts.org/app.js", page_url)
+	assert not get_insight.is_third_party("https://a.mtstatic.com/deki/skin.js", page_url)
+	assert get_insight.is_third_party("https://www.googletagmanager.com/gtm.js", page_url)
+	assert get_insight.is_third_party("https://evil-libretexts.net/a.js", page_url)
+	assert not get_insight.is_third_party("https://x.example/a.js", "about:blank")
+
+
+def test_block_heavy_resources_keeps_libretexts_page_scripts():
+	"""On a LibreTexts library page, only images and non-LibreTexts scripts are aborted."""
+	page_url = "https://chem.libretexts.org/Bookshelves/Introductory_Chemistry"
+	# Script tags of the kind a LibreTexts library page head carries, plus its logo
+	saved_page = (
+		"<html><head>"
+		'<script src="https://a.mtstatic.com/@cache/layout/anonymous.js?_=5c20fab"></script>'
+		'<script src="https://cdn.libretexts.net/github/LibreTextsMain/Glossarizer.js"></script>'
+		'<script src="https://chem.libretexts.org/@api/deki/files/46/library.js"></script>'
+		'<script src="/@embed/navigation.js"></script>'
+		'<script src="https://www.googletagmanager.com/gtag/js?id=G-X"></script>'
+		'</head><body><img src="https://a.mtstatic.com/skins/common/logo.png"></body></html>'
+	)
+	root = lxml.html.fromstring(saved_page, base_url=page_url)
+	root.make_links_absolute()
+	requests_seen = [("script", element.get("src")) for element in root.iter("script")]
+	requests_seen.append(("image", root.find(".//img").get("src")))
+	aborted = []
+
+	class FakeRoute:
+		def __init__(self, resource_type: str, url: str):
+			frame = type("Frame", (), {"url": page_url})()
+			request_fields = {"resource_type": resource_type, "url": url, "frame": frame}
+			self.request = type("Request", (), request_fields)()
+
+		async def abort(self) -> None:
+			aborted.append(self.request.url)
+
+		async def continue_(self) -> None:
+			pass
+
+	for resource_type, url in requests_seen:
+		asyncio.run(get_insight.block_heavy_resources(FakeRoute(resource_type, url)))
+	assert aborted == [
+		"https://www.googletagmanager.com/gtag/js?id=G-X",
+		"https://a.mtstatic.com/skins/common/logo.png",
+	]
+
+
+#============================================
+# Tests for resumable runs
+#============================================
+
+
+def test_snapshot_refresh_is_conditional_and_overwrites_in_place(tmp_path, monkeypatch):
+	"""A refresh sends validators, skips unchanged pages, and rewrites edited ones in place."""
+	site_dir = tmp_path / "site"
+	site_dir.mkdir()
+	source_page = site_dir / "units.html"
+	source_page.write_text("<html><body><article><p>v1</p></article></body></html>", encoding="utf-8")
+	server = start_static_server(str(site_dir))
+	url = f"http://127.0.0.1:{server.server_address[1]}/units.html"
+	monkeypatch.setattr(get_insight, "is_static_url", lambda url: True)
+	output_dir = tmp_path / "out"
+	output_dir.mkdir()
+	log_path = output_dir / "render_log.tsv"
+	get_insight.write_render_log(log_path, {})
+
+	def run_snapshot() -> dict:
+		state = get_insight.load_render_log(log_path)
+		with get_insight.requests.Session() as session:
+			asyncio.run(get_insight.snapshot_url(None, session, url, output_dir, log_path, state))
+		return get_insight.load_render_log(log_path)[url]
+
+	first = run_snapshot()
+	assert first["status"] == "OK"
+	assert first["last_modified"]
+	assert get_insight.is_fetched(first, output_dir)
+	saved_path = output_dir / first["output_file"]
+	first_mtime = saved_path.stat().st_mtime_ns
+
+	second = run_snapshot()
+	assert second["content_sha256"] == first["content_sha256"]
+	assert saved_path.stat().st_mtime_ns == first_mtime
+
+	source_page.write_text("<html><body><article><p>v2</p></article></body></html>", encoding="utf-8")
+	stat = source_page.stat()
+	os.utime(source_page, (stat.st_atime + 10, stat.st_mtime + 10))
+	third = run_snapshot()
+	server.shutdown()
+	assert third["output_file"] == first["output_file"]
+	assert third["content_sha256"] != first["content_sha256"]
+	assert "<p>v2</p>" in saved_path.read_text(encoding="utf-8")
+	saved_names = sorted(path.name for path in output_dir.iterdir())
+	assert saved_names == sorted([saved_path.name, "render_log.tsv"])
+
+
+def test_load_render_log_reads_old_header_and_keeps_last_row(tmp_path):
+	"""Four-column logs still load; the latest row per URL wins."""
+	log_path = tmp_path / "render_log.tsv"
+	log_path.write_text(
+		"url\tstatus\toutput_file\ttitle\n"
+		"https://a.example/x\tFAIL\ta-example__x.html\tTimeoutError: slow\n"
+		"https://a.example/x\tOK\ta-example__x.html\tX page\n",
+		encoding="utf-8",
+	)
+	state = get_insight.load_render_log(log_path)
+	assert state["https://a.example/x"]["status"] == "OK"
+	assert state["https://a.example/x"]["etag"] == ""
+	assert get_insight.choose_output_name("https://b.example/x", {
+		"https://b.example/y": {"output_file": "b-example__x.html"},
+	}) == "b-example__x_2.html"
+
+
+#============================================
+# Tests for crawl mode
+#============================================
+
+
+def test_normalize_url_dedupes_fragment_and_query_order():
+	"""Fragments drop, host case folds, and query order is sorted."""
+	left = get_insight.normalize_url("HTTPS://Example.org/docs/page?b=2&a=1#part")
+	right = get_insight.normalize_url("https://example.org/docs/page?a=1&b=2")
+	assert left == right == "https://example.org/docs/page?a=1&b=2"
+	assert get_insight.normalize_url("mailto:someone@example.org") == ""
+
+
+def make_crawl_site(tmp_path) -> tuple[http.server.ThreadingHTTPServer, str]:
+	"""Serve a small docs tree (index -> a, b; a -> c; c -> d) and return (server, base URL)."""
+	docs_dir = tmp_path / "site" / "docs"
+	docs_dir.mkdir(parents=True)
+	pages = {
+		"index.html": '<a href="a.html">a</a> <a href="b.html?x=1&amp;a=2">b</a>'
+		' <a href="b.html?a=2&amp;x=1#top">b</a>'
+		' <a href="../outside.html">out</a> <a href="logo.png">logo</a>',
+		"a.html": '<a href="c.html">c</a> <a href="index.html">home</a>',
+		"b.html": "<p>b</p>",
+		"c.html": '<a href="d.html">d</a>',
+		"d.html": "<p>d</p>",
+	}
+	for name, body in pages.items():
+		(docs_dir / name).write_text(f"<html><body><main>{body}</main></body></html>", encoding="utf-8")
+	server = start_static_server(str(tmp_path / "site"))
+	base = f"http://127.0.0.1:{server.server_address[1]}/docs/"
+	return server, base
+
+
+class CrawlRunner:
+	"""Run crawl_frontier the way render_urls does, against the static fetch path."""
+
+	def __init__(self, output_dir, seed: str):
+		self.output_dir = output_dir
+		self.seed = seed
+		self.log_path = output_dir / "render_log.tsv"
+		self.frontier_path = output_dir / "crawl_frontier.tsv"
+		self.state = {}
+		self.session = get_insight.requests.Session()
+
+	async def fetch_links(
+		self, worker_index: int, url: str, need_links: bool = False,
+	) -> list[str] | None:
+		return await get_insight.snapshot_url(
+			None, self.session, url, self.output_dir, self.log_path, self.state, True, not need_links,
+		)
+
+	def run(self, max_depth: int, refresh: bool = False) -> int:
+		frontier = get_insight.load_frontier(self.frontier_path)
+		scopes = get_insight.crawl_scopes([self.seed])
+		get_insight.add_to_frontier(frontier, self.frontier_path, self.seed, 0, scopes)
+
+		def is_pending(url: str) -> bool:
+			return refresh or not get_insight.is_fetched(self.state.get(url), self.output_dir)
+
+		limiter = get_insight.HostRateLimiter(0.0, jitter=0.0)
+		return asyncio.run(get_insight.crawl_frontier(
+			frontier, self.frontier_path, scopes, max_depth, 50, is_pending, self.fetch_links, 2, limiter,
+		))
+
+
+def test_crawl_frontier_bfs_scope_depth_and_resume(tmp_path, monkeypatch):
+	"""Crawl follows in-scope links to max depth, dedupes them, and resumes without re-fetching."""
+	server, base = make_crawl_site(tmp_path)
+	monkeypatch.setattr(get_insight, "is_static_url", lambda url: True)
+	output_dir = tmp_path / "out"
+	output_dir.mkdir()
+	runner = CrawlRunner(output_dir, base + "index.html")
+
+	assert runner.run(2) == 4
+	frontier = get_insight.load_frontier(runner.frontier_path)
+	assert frontier == {
+		base + "index.html": {"depth": 0, "expanded": True},
+		base + "a.html": {"depth": 1, "expanded": True},
+		base + "b.html?a=2&x=1": {"depth": 1, "expanded": True},
+		base + "c.html": {"depth": 2, "expanded": False},
+	}
+	assert all(row["status"] == "OK" for row in runner.state.values())
+	assert runner.run(2) == 0
+	runner.session.close()
+	server.shutdown()
+
+
+def test_crawl_expands_saved_pages_never_expanded(tmp_path, monkeypatch):
+	"""Seeds saved before --crawl, and the last level of a shallower crawl, still get expanded."""
+	server, base = make_crawl_site(tmp_path)
+	monkeypatch.setattr(get_insight, "is_static_url", lambda url: True)
+	output_dir = tmp_path / "out"
+	output_dir.mkdir()
+	runner = CrawlRunner(output_dir, base + "index.html")
+
+	# A plain snapshot run saves the seed with validators but expands nothing
+	asyncio.run(runner.fetch_links(0, base + "index.html"))
+	assert get_insight.is_fetched(runner.state[base + "index.html"], output_dir)
+	# Under --refresh the seed would answer 304; it is fetched unconditionally instead
+	assert runner.run(1, refresh=True) == 3
+	frontier = get_insight.load_frontier(runner.frontier_path)
+	assert sorted(frontier) == [base + "a.html", base + "b.html?a=2&x=1", base + "index.html"]
+	assert not frontier[base + "a.html"]["expanded"]
+
+	# A deeper crawl re-reads the depth-1 pages for links and finds c.html
+	assert runner.run(2) == 3
+	frontier = get_insight.load_frontier(runner.frontier_path)
+	assert frontier[base + "a.html"]["expanded"]
+	assert frontier[base + "c.html"] == {"depth": 2, "expanded": False}
+	assert runner.run(2) == 0
+	runner.session.close()
+	server.shutdown()
+
+
+def test_load_frontier_reads_old_two_column_file(tmp_path):
+	"""Frontiers written before the expanded column load as unexpanded; the last row wins."""
+	frontier_path = tmp_path / "crawl_frontier.tsv"
+	frontier_path.write_text(
+		"url\tdepth\nhttps://a.example/x\t0\nhttps://a.example/y\t1\n", encoding="utf-8",
+	)
+	frontier = get_insight.load_frontier(frontier_path)
+	assert frontier["https://a.example/x"] == {"depth": 0, "expanded": False}
+	get_insight.mark_expanded(frontier, frontier_path, "https://a.example/x")
+	get_insight.mark_expanded(frontier, frontier_path, "https://a.example/x")
+	assert get_insight.load_frontier(frontier_path)["https://a.example/x"]["expanded"]
+	get_insight.write_frontier(frontier_path, frontier)
+	assert frontier_path.read_text(encoding="utf-8").splitlines() == [
+		"url\tdepth\texpanded", "https://a.example/x\t0\t1", "https://a.example/y\t1\t0",
+	]
@@ -0,0 +1,94 @@
+"""
+Tests for the streaming map reader in libretexts_map_json_to_page_id_csv.
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import libretexts_map_json_to_page_id_csv
+
+MAP_BASE = os.path.join(REPO_ROOT, "Textbook", "The_ADAPT_WeBWorK_Handbook.reremix")
+
+
+#============================================
+# Helpers
+#============================================
+
+
+def read_rows(
+	text: str,
+	chunk_size: int = libretexts_map_json_to_page_id_csv.CHUNK_SIZE,
+) -> list[dict]:
+	"""Return the mapping rows for a JSON text."""
+	rows = list(libretexts_map_json_to_page_id_csv.iter_map_rows(io.StringIO(text), chunk_size))
+	return rows
+
+
+#============================================
+# Tests for iter_json_events
+#============================================
+
+
+def test_json_events_across_chunk_boundaries():
+	"""Tokens split across tiny chunks decode the same as with one chunk."""
+	text = json.dumps({"a": [1, -2.5, 3e2, True, None], "b": "x \"quoted\" \u00e9", "c": {}})
+	expected = list(libretexts_map_json_to_page_id_csv.iter_json_events(io.StringIO(text)))
+	assert list(libretexts_map_json_to_page_id_csv.iter_json_events(io.StringIO(text), 1)) == expected
+	values = [value for event, value in expected if event == "value"]
+	assert values == [1, -2.5, 300.0, True, None, "x \"quoted\" \u00e9"]
+	keys = [value for event, value in expected if event == "key"]
+	assert keys == ["a", "b", "c"]
+
+
+def test_json_events_truncated_input():
+	"""An unclosed object is reported instead of silently ending."""
+	try:
+		list(libretexts_map_json_to_page_id_csv.iter_json_events(io.StringIO('{"a": [1, 2')))
+	except ValueError as error:
+		assert "Truncated" in str(error)
+	else:
+		raise AssertionError("truncated JSON was accepted")
+
+
+#============================================
+# Tests for iter_map_rows
+#============================================
+
+
+def test_rows_match_committed_csv():
+	"""The streamed rows equal the CSV committed next to the map JSON."""
+	with open(MAP_BASE + ".json", encoding="utf-8") as handle:
+		text = handle.read()
+	with open(MAP_BASE + ".csv", encoding="utf-8", newline="") as handle:
+		expected = list(csv.DictReader(handle))
+	for chunk_size in (7, 1000):
+		assert read_rows(text, chunk_size) == expected
+
+
+def test_children_before_title():
+	"""A node listing children first still precedes them and names their parent."""
+	tree = {"children": [{"children": [{"title": "c", "data": {"id": 3}}],
+		"title": "b", "data": {"id": 2}}], "title": "1.1: a", "data": {"id": 1}}
+	rows = read_rows(json.dumps({"RemixTree": tree}))
+	assert [(row["label"], row["parent_title"]) for row in rows] == [
+		("1.1: a", ""), ("b", "1.1: a"), ("c", "b")]
+	assert rows[0]["section_number"] == "1.1"
+
+
+def test_deep_tree_has_no_recursion_limit():
+	"""A chain deeper than the recursion limit streams without error."""
+	depth = sys.getrecursionlimit() * 3
+	opening = "".join(f'{{"title": "T{i}", "data": {{"id": {i}}}, "children": [' for i in range(depth))
+	text = '{"RemixTree": ' + opening + "]}" * depth + "}"
+	rows = read_rows(text)
+	assert len(rows) == depth
+	assert rows[-1]["parent_title"] == f"T{depth - 2}"
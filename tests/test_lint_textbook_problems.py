@@ -155,6 +155,53 @@ def test_csv_report_columns(tmp_path):
 			assert col in reader.fieldnames
 
 
+#============================================
+# Tests for duplicate-aware renderer lint
+#============================================
+
+
+def test_renderer_lint_renders_duplicates_once(tmp_path, monkeypatch):
+	"""Exact-duplicate problems are rendered once and share the result."""
+	html_dir = tmp_path / "html"
+	html_dir.mkdir()
+	(html_dir / "a.html").write_text(SAMPLE_HTML, encoding="utf-8")
+	(html_dir / "b.html").write_text(SAMPLE_HTML, encoding="utf-8")
+	output_dir = tmp_path / "output"
+	output_dir.mkdir()
+	problems = lint_textbook_problems.extract_problems(str(html_dir), str(output_dir))
+	rendered_sources = []
+
+	def fake_render(source_text, host, seed):
+		rendered_sources.append(source_text)
+		return {}
+
+	monkeypatch.setattr(lint_textbook_problems, "render_pg_source", fake_render)
+	problems = lint_textbook_problems.run_renderer_lint(problems, "http://unused", 1)
+	assert len(problems) == 4
+	assert len(rendered_sources) == 2
+	assert problems[2]["duplicate_of"] == problems[0]["pg_file"]
+	assert problems[2]["status"] == "pass"
+
+
+def test_renderer_lint_keys_on_exact_source(tmp_path, monkeypatch):
+	"""Problems that differ only in string whitespace are rendered separately."""
+	problems = []
+	for index, source_text in enumerate(['$a = "x  y";\n', '$a = "x y";\n', '$a = "x y";\n']):
+		pg_file = tmp_path / f"p{index}.pg"
+		pg_file.write_text(source_text, encoding="utf-8")
+		problems.append({"text": source_text, "pg_file": str(pg_file)})
+	rendered_sources = []
+
+	def fake_render(source_text, host, seed):
+		rendered_sources.append(source_text)
+		return {}
+
+	monkeypatch.setattr(lint_textbook_problems, "render_pg_source", fake_render)
+	lint_textbook_problems.run_renderer_lint(problems, "http://unused", 1)
+	assert rendered_sources == ['$a = "x  y";\n', '$a = "x y";\n']
+	assert problems[2]["duplicate_of"] == problems[1]["pg_file"]
+
+
 #============================================
 # Tests for renderer health check
 #============================================
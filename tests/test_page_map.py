@@ -0,0 +1,90 @@
+"""
+Tests for the indexed page map in page_map.
+"""
+
+import os
+import csv
+import sys
+import json
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import page_map
+
+MAP_BASE = os.path.join(REPO_ROOT, "Textbook", "The_ADAPT_WeBWorK_Handbook.reremix")
+
+
+#============================================
+# Helpers
+#============================================
+
+
+def write_map(map_path, titles: list[str]) -> None:
+	"""Write a small map JSON with one child page per title under a book root."""
+	children = []
+	for offset, title in enumerate(titles):
+		children.append({"title": title, "data": {"id": 10 + offset, "parentID": 1,
+			"relativePath": f"/01%3A_Intro/{offset}"}})
+	tree = {
+		"title": "Book",
+		"data": {"id": 1, "url": "https://example.org/Book"},
+		"children": children,
+	}
+	map_path.write_text(json.dumps({"RemixTree": tree}), encoding="utf-8")
+
+
+#============================================
+# Tests
+#============================================
+
+
+def test_rows_match_committed_csv(tmp_path):
+	"""The indexed rows equal the CSV generated from the same map JSON."""
+	connection = page_map.open_page_map(MAP_BASE + ".json", str(tmp_path / "map.sqlite"))
+	with open(MAP_BASE + ".csv", encoding="utf-8", newline="") as handle:
+		expected = list(csv.DictReader(handle))
+	assert page_map.load_rows(connection) == expected
+	connection.close()
+
+
+def test_lookups(tmp_path):
+	"""Pages resolve by id, section number, relativePath, and folded title."""
+	map_path = tmp_path / "map.json"
+	write_map(map_path, ["1.1: First Page", "1.2: Second_Page"])
+	connection = page_map.open_page_map(str(map_path), str(tmp_path / "map.sqlite"))
+	assert page_map.get_page(connection, "10")["section_title"] == "First Page"
+	assert page_map.get_page(connection, 11)["section_number"] == "1.2"
+	assert page_map.find_by_section(connection, "1.2")["page_id"] == "11"
+	assert page_map.find_by_path(connection, "/01%3A_Intro/0")["page_id"] == "10"
+	assert page_map.find_by_title(connection, "second  page")["page_id"] == "11"
+	assert page_map.get_page(connection, "999") is None
+	connection.close()
+
+
+def test_rebuilds_only_when_json_changes(tmp_path, monkeypatch):
+	"""An unchanged map JSON reuses the artifact; an edited one is recompiled."""
+	map_path = tmp_path / "map.json"
+	index_path = str(tmp_path / "map.sqlite")
+	write_map(map_path, ["1.1: First Page"])
+	rebuilds = []
+	original_rebuild = page_map.rebuild_index
+
+	def counting_rebuild(*args):
+		rebuilds.append(args[1])
+		return original_rebuild(*args)
+
+	monkeypatch.setattr(page_map, "rebuild_index", counting_rebuild)
+	page_map.open_page_map(str(map_path), index_path).close()
+	page_map.open_page_map(str(map_path), index_path).close()
+	assert len(rebuilds) == 1
+
+	write_map(map_path, ["1.1: First Page", "1.2: Added Page"])
+	os.utime(map_path, ns=(0, os.stat(map_path).st_mtime_ns + 1))
+	connection = page_map.open_page_map(str(map_path), index_path)
+	assert len(rebuilds) == 2
+	assert page_map.find_by_section(connection, "1.2")["section_title"] == "Added Page"
+	connection.close()
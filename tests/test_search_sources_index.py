@@ -0,0 +1,54 @@
+"""
+Tests for the BM25 Sources search index.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import search_sources_index
+import extract_textbook_yake_keywords
+
+
+#============================================
+
+
+def test_text_paragraph_blocks_lines():
+	"""Plain-text paragraph blocks report their first line."""
+	text = "Title\n\nBody line one\nline two\n\n\nLast"
+	result = extract_textbook_yake_keywords.extract_text_paragraph_blocks(text)
+	assert result == [(1, "Title"), (3, "Body line one line two"), (7, "Last")]
+
+
+#============================================
+
+
+def test_build_and_search(tmp_path):
+	"""Indexed paragraphs are ranked by BM25 and updates are incremental."""
+	source_dir = tmp_path / "src"
+	source_dir.mkdir()
+	(source_dir / "a.html").write_text(
+		"<p>Answer hints for wrong answers.</p>\n<p>Unrelated text.</p>", encoding="utf-8",
+	)
+	(source_dir / "b.txt").write_text(
+		"Some intro.\n\nAnswer checkers compare answers.\n", encoding="utf-8",
+	)
+	connection = search_sources_index.open_index(tmp_path / "index.sqlite")
+	result = search_sources_index.update_index(connection, [str(source_dir)])
+	assert result == (2, 0, 0)
+	hits = search_sources_index.search_index(connection, "answer hints", 5)
+	assert hits[0]["path"] == str(source_dir / "a.html")
+	assert hits[0]["line"] == 1
+	assert hits[1]["line"] == 3
+	# A second update with no file changes re-indexes nothing
+	result = search_sources_index.update_index(connection, [str(source_dir)])
+	assert result == (0, 2, 0)
+	(source_dir / "b.txt").unlink()
+	result = search_sources_index.update_index(connection, [str(source_dir)])
+	assert result == (0, 1, 1)
+	connection.close()
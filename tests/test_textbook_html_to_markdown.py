@@ -0,0 +1,203 @@
+"""
+Tests for batched pandoc conversion in textbook_html_to_markdown.
+"""
+
+import os
+import re
+import sys
+import shutil
+
+import pytest
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import textbook_html_to_markdown
+
+HAS_PANDOC = shutil.which("pandoc") is not None
+# Repeated heading texts and explicit ids across pages, as in the real chapters
+REPEATED_HEADING_PAGES = [
+	'<h2>Apply it today</h2><p>one</p><h3 id="setup">Setup</h3><p>a</p>',
+	'<h2>Apply it today</h2><p>two</p><h3 id="setup">Setup</h3><p>b</p>',
+	'<h2>Apply it today</h2><p>three</p><h3 id="preamble">Preamble</h3>',
+]
+
+#============================================
+# Helpers
+#============================================
+
+
+def fake_convert(html_text: str) -> str:
+	"""Stand-in for pandoc: one line of text per paragraph."""
+	paragraphs = re.findall(r"<p>(.*?)</p>", html_text, re.DOTALL)
+	markdown_text = "\n\n".join(paragraphs) + "\n"
+	return markdown_text
+
+
+#============================================
+# Tests for batch join/split
+#============================================
+
+
+def test_split_batched_markdown_round_trip():
+	"""Joined pages split back into the same per-page output."""
+	html_texts = ["<p>one</p>", "<p>two</p><p>more</p>", "<p>three</p>"]
+	batch_html = textbook_html_to_markdown.join_pages_for_batch(html_texts)
+	sections = textbook_html_to_markdown.split_batched_markdown(fake_convert(batch_html), 3)
+	assert [section.strip() for section in sections] == ["one", "two\n\nmore", "three"]
+
+
+def test_split_batched_markdown_missing_marker():
+	"""A lost or reordered marker is reported instead of mis-assigning pages."""
+	markdown_text = "one\n\nTEXTBOOKPAGEBREAK2\n\nthree\n"
+	assert textbook_html_to_markdown.split_batched_markdown(markdown_text, 3) is None
+
+
+def test_batched_mode_matches_serial(monkeypatch):
+	"""Batch mode runs pandoc once and returns the same sections as serial mode."""
+	calls = []
+
+	def counting_convert(html_text: str) -> str:
+		calls.append(html_text)
+		return fake_convert(html_text)
+
+	monkeypatch.setattr(textbook_html_to_markdown, "convert_html_to_markdown", counting_convert)
+	html_texts = [f"<p>page {index}</p>" for index in range(5)]
+	serial = list(textbook_html_to_markdown.convert_pages_serial(html_texts, 1))
+	calls.clear()
+	batched = list(textbook_html_to_markdown.convert_pages_batched(html_texts, 1))
+	assert len(calls) == 1
+	assert [text.strip() for text in batched] == [text.strip() for text in serial]
+
+
+def test_batched_mode_runs_one_pandoc_per_batch(monkeypatch):
+	"""Pages are converted BATCH_PAGES at a time and yielded lazily in page order."""
+	calls = []
+
+	def counting_convert(html_text: str) -> str:
+		calls.append(html_text)
+		return fake_convert(html_text)
+
+	monkeypatch.setattr(textbook_html_to_markdown, "convert_html_to_markdown", counting_convert)
+	monkeypatch.setattr(textbook_html_to_markdown, "BATCH_PAGES", 2)
+	html_texts = [f"<p>page {index}</p>" for index in range(5)]
+	batched = textbook_html_to_markdown.convert_pages_batched(html_texts, 2)
+	assert calls == []
+	assert [text.strip() for text in batched] == [f"page {index}" for index in range(5)]
+	assert len(calls) == 3
+
+
+@pytest.mark.skipif(not HAS_PANDOC, reason="pandoc not installed")
+def test_batched_mode_matches_serial_with_real_pandoc():
+	"""Repeated headings across pages get the same ids batched as converted alone."""
+	serial = list(textbook_html_to_markdown.convert_pages_serial(REPEATED_HEADING_PAGES, 1))
+	batched = list(textbook_html_to_markdown.convert_pages_batched(REPEATED_HEADING_PAGES, 1))
+	assert [text.strip() for text in batched] == [text.strip() for text in serial]
+	assert "-1}" not in "".join(batched)
+
+
+def test_batched_mode_falls_back_when_markers_lost(monkeypatch):
+	"""If pandoc output loses markers, pages are converted separately."""
+
+	def marker_eating_convert(html_text: str) -> str:
+		return fake_convert(html_text).replace("TEXTBOOKPAGEBREAK", "-   TEXTBOOKPAGEBREAK")
+
+	monkeypatch.setattr(textbook_html_to_markdown, "convert_html_to_markdown", marker_eating_convert)
+	html_texts = ["<p>a</p>", "<p>b</p>"]
+	result = textbook_html_to_markdown.convert_pages_batched(html_texts, 2)
+	assert [text.strip() for text in result] == ["a", "b"]
+
+
+#============================================
+# Tests for the per-page cache
+#============================================
+
+
+def test_build_markdown_reconverts_only_changed_pages(tmp_path, monkeypatch):
+	"""A second export reuses cached pages and converts only the edited one."""
+	chapter_dir = tmp_path / "Textbook" / "01_Intro"
+	chapter_dir.mkdir(parents=True)
+	(chapter_dir / "1.1-First.html").write_text("<p>first</p>", encoding="utf-8")
+	(chapter_dir / "1.2-Second.html").write_text("<p>second</p>", encoding="utf-8")
+	converted = []
+
+	def counting_convert(html_text: str) -> str:
+		converted.append(html_text)
+		return fake_convert(html_text)
+
+	monkeypatch.setattr(textbook_html_to_markdown.shutil, "which", lambda name: "/usr/bin/pandoc")
+	monkeypatch.setattr(textbook_html_to_markdown, "get_pandoc_version", lambda: "pandoc 3.1")
+	monkeypatch.setattr(textbook_html_to_markdown, "convert_html_to_markdown", counting_convert)
+	output_md = tmp_path / "book.md"
+	build_dir = tmp_path / "build"
+
+	textbook_html_to_markdown.build_markdown(tmp_path, output_md, "serial", 1, build_dir)
+	assert len(converted) == 2
+	first_output = output_md.read_text(encoding="utf-8")
+	assert "# 01_Intro/1.1-First\n\nfirst\n" in first_output
+
+	converted.clear()
+	textbook_html_to_markdown.build_markdown(tmp_path, output_md, "serial", 1, build_dir)
+	assert converted == []
+	assert output_md.read_text(encoding="utf-8") == first_output
+
+	(chapter_dir / "1.2-Second.html").write_text("<p>second edited</p>", encoding="utf-8")
+	textbook_html_to_markdown.build_markdown(tmp_path, output_md, "serial", 1, build_dir)
+	assert converted == ["<p>second edited</p>"]
+	assert "second edited" in output_md.read_text(encoding="utf-8")
+	assert len(list((build_dir / "pages").glob("*.md"))) == 2
+
+
+def test_build_markdown_interrupted_write_leaves_no_cache_entry(tmp_path, monkeypatch):
+	"""A page whose cache write is cut short is converted again on the next export."""
+	chapter_dir = tmp_path / "Textbook" / "01_Intro"
+	chapter_dir.mkdir(parents=True)
+	(chapter_dir / "1.1-First.html").write_text("<p>first</p>", encoding="utf-8")
+	monkeypatch.setattr(textbook_html_to_markdown.shutil, "which", lambda name: "/usr/bin/pandoc")
+	monkeypatch.setattr(textbook_html_to_markdown, "get_pandoc_version", lambda: "pandoc 3.1")
+	monkeypatch.setattr(textbook_html_to_markdown, "convert_html_to_markdown", fake_convert)
+	output_md = tmp_path / "book.md"
+	build_dir = tmp_path / "build"
+	cache_key = textbook_html_to_markdown.page_cache_key("<p>first</p>", "pandoc 3.1")
+	cache_path = build_dir / "pages" / f"{cache_key}.md"
+
+	def interrupted_replace(source, target):
+		raise KeyboardInterrupt
+
+	with monkeypatch.context() as patch:
+		patch.setattr(textbook_html_to_markdown.os, "replace", interrupted_replace)
+		with pytest.raises(KeyboardInterrupt):
+			textbook_html_to_markdown.build_markdown(tmp_path, output_md, "serial", 1, build_dir)
+	assert not cache_path.exists()
+
+	textbook_html_to_markdown.build_markdown(tmp_path, output_md, "serial", 1, build_dir)
+	assert cache_path.read_text(encoding="utf-8") == fake_convert("<p>first</p>")
+	assert list((build_dir / "pages").iterdir()) == [cache_path]
+
+
+@pytest.mark.skipif(not HAS_PANDOC, reason="pandoc not installed")
+def test_build_markdown_same_output_from_any_cache_state(tmp_path):
+	"""Pages batched with different neighbours than when cached give the same book."""
+	chapter_dir = tmp_path / "Textbook" / "01_Intro"
+	chapter_dir.mkdir(parents=True)
+	for index, html_text in enumerate(REPEATED_HEADING_PAGES):
+		(chapter_dir / f"1.{index + 1}-Page.html").write_text(html_text, encoding="utf-8")
+	output_md = tmp_path / "book.md"
+	build_dir = tmp_path / "build"
+
+	textbook_html_to_markdown.build_markdown(tmp_path, output_md, "batch", 1, build_dir)
+	first_output = output_md.read_text(encoding="utf-8")
+
+	# Drop the first and last pages so they are re-batched without the middle one
+	pandoc_version = textbook_html_to_markdown.get_pandoc_version()
+	for html_text in (REPEATED_HEADING_PAGES[0], REPEATED_HEADING_PAGES[2]):
+		cache_key = textbook_html_to_markdown.page_cache_key(html_text, pandoc_version)
+		(build_dir / "pages" / f"{cache_key}.md").unlink()
+	textbook_html_to_markdown.build_markdown(tmp_path, output_md, "batch", 1, build_dir)
+	assert output_md.read_text(encoding="utf-8") == first_output
+
+	textbook_html_to_markdown.build_markdown(tmp_path, output_md, "serial", 1, build_dir, rebuild=True)
+	assert output_md.read_text(encoding="utf-8") == first_output
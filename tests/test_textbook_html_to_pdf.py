@@ -0,0 +1,420 @@
+"""
+Tests for the page build, caching, selection, and HTML preprocessing in textbook_html_to_pdf.
+
+WeasyPrint needs system libraries (Pango, Cairo) that test machines may lack.
+No test here renders a real PDF (build tests swap in a stand-in renderer), so a
+stand-in module is used when the real package cannot be imported.
+"""
+
+import os
+import sys
+import types
+import pathlib
+import multiprocessing
+
+import pytest
+import lxml.html
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+
+#============================================
+def build_weasyprint_stub() -> dict:
+	"""Return stand-in weasyprint modules with the names the tool touches at import time."""
+	weasyprint_module = types.ModuleType("weasyprint")
+	text_module = types.ModuleType("weasyprint.text")
+	fonts_module = types.ModuleType("weasyprint.text.fonts")
+	weasyprint_module.__version__ = "stub"
+	weasyprint_module.HTML = object
+	weasyprint_module.CSS = object
+	weasyprint_module.Document = object
+	fonts_module.FontConfiguration = object
+	weasyprint_module.text = text_module
+	text_module.fonts = fonts_module
+	stub_modules = {
+		"weasyprint": weasyprint_module,
+		"weasyprint.text": text_module,
+		"weasyprint.text.fonts": fonts_module,
+	}
+	return stub_modules
+
+
+try:
+	import textbook_html_to_pdf
+except (ImportError, OSError):
+	# Install the stand-in only for this import, so other test modules never see it
+	STUB_MODULES = build_weasyprint_stub()
+	sys.modules.update(STUB_MODULES)
+	try:
+		import textbook_html_to_pdf
+	finally:
+		for stub_name in STUB_MODULES:
+			sys.modules.pop(stub_name, None)
+
+import textbook_pages
+
+PAGE_NAMES = (
+	"05_Different_Question_Types/5.4-Matching.html",
+	"06_Advanced_PGML_Techniques/6.1-Text_Coloring.html",
+	"06_Advanced_PGML_Techniques/6.3-Tables.html",
+	"06_Advanced_PGML_Techniques/6.5-Graphs.html",
+	"06_Advanced_PGML_Techniques/6.10-Chemistry.html",
+	"90_Appendices/90.1-Glossary.html",
+)
+
+
+#============================================
+# Helpers
+#============================================
+
+
+def make_page(tmp_path: pathlib.Path, chapter_heading: str = "") -> dict:
+	"""Build the page context dict the transforms receive."""
+	input_root = tmp_path / "Textbook"
+	source_path = input_root / "06_Advanced_PGML_Techniques" / "6.1-Text_Coloring.html"
+	page = {
+		"source_path": source_path,
+		"input_root": input_root,
+		"chapter_heading": chapter_heading,
+		"highlight_cache_dir": None,
+	}
+	return page
+
+
+def parse(html_text: str) -> lxml.html.HtmlElement:
+	"""Parse a page the way preprocess_page_html does."""
+	root = lxml.html.document_fromstring(html_text)
+	return root
+
+
+#============================================
+# Helpers for build_book
+#============================================
+
+
+def make_textbook(tmp_path: pathlib.Path) -> pathlib.Path:
+	"""Write the first three PAGE_NAMES under tmp_path/Textbook and return that root."""
+	input_root = tmp_path / "Textbook"
+	for name in PAGE_NAMES[:3]:
+		page_path = input_root / name
+		page_path.parent.mkdir(parents=True, exist_ok=True)
+		page_path.write_text(f"<p>{page_path.stem}</p>", encoding="utf-8")
+	return input_root
+
+
+def install_fake_renderer(monkeypatch) -> list:
+	"""Replace WeasyPrint and cpdf with stand-ins; return the list that records merges."""
+	merged = []
+
+	def fake_run_weasyprint(html_text, base_url, pdf_path):
+		# The page HTML stands in for the PDF, tagged with the rendering process
+		pdf_path.parent.mkdir(parents=True, exist_ok=True)
+		pdf_path.write_text(f"{os.getpid()}\n{html_text}", encoding="utf-8")
+
+	def fake_merge_pdfs(pdf_paths, output_pdf):
+		merged.append(list(pdf_paths))
+
+	monkeypatch.setattr(textbook_html_to_pdf, "run_weasyprint", fake_run_weasyprint)
+	monkeypatch.setattr(textbook_html_to_pdf, "merge_pdfs", fake_merge_pdfs)
+	monkeypatch.setattr(textbook_html_to_pdf.shutil, "which", lambda name: "/usr/bin/" + name)
+	return merged
+
+
+#============================================
+# Tests for page_cache_key
+#============================================
+
+
+def test_page_cache_key_tracks_html_path_and_css(monkeypatch):
+	"""The key is stable, and changes with the page HTML, its path, or the injected CSS."""
+	relative_path = pathlib.Path("06_Advanced_PGML_Techniques/6.1-Text_Coloring.html")
+	key = textbook_html_to_pdf.page_cache_key("<p>one</p>", relative_path)
+	assert textbook_html_to_pdf.page_cache_key("<p>one</p>", relative_path) == key
+	assert textbook_html_to_pdf.page_cache_key("<p>two</p>", relative_path) != key
+	other_path = relative_path.with_name("6.2-Other.html")
+	assert textbook_html_to_pdf.page_cache_key("<p>one</p>", other_path) != key
+	monkeypatch.setattr(textbook_html_to_pdf, "DEFAULT_CODE_STYLE", "pre { font-size: 10pt; }")
+	assert textbook_html_to_pdf.page_cache_key("<p>one</p>", relative_path) != key
+
+
+def test_page_cache_key_tracks_preprocess_settings(monkeypatch):
+	"""Changing the link mode, the transform steps, or the cache version changes the key."""
+	relative_path = pathlib.Path("06_Advanced_PGML_Techniques/6.1-Text_Coloring.html")
+	key = textbook_html_to_pdf.page_cache_key("<p>one</p>", relative_path)
+	keys = {key}
+	monkeypatch.setattr(textbook_html_to_pdf, "RELATIVE_LINK_MODE", "absolute")
+	keys.add(textbook_html_to_pdf.page_cache_key("<p>one</p>", relative_path))
+	transforms = textbook_html_to_pdf.PAGE_TRANSFORMS[:-1]
+	monkeypatch.setattr(textbook_html_to_pdf, "PAGE_TRANSFORMS", transforms)
+	keys.add(textbook_html_to_pdf.page_cache_key("<p>one</p>", relative_path))
+	cache_version = textbook_html_to_pdf.PAGE_CACHE_VERSION + 1
+	monkeypatch.setattr(textbook_html_to_pdf, "PAGE_CACHE_VERSION", cache_version)
+	keys.add(textbook_html_to_pdf.page_cache_key("<p>one</p>", relative_path))
+	assert len(keys) == 4
+
+
+#============================================
+# Tests for build_book
+#============================================
+
+
+def test_build_book_renders_pages_on_a_process_pool(tmp_path, monkeypatch):
+	"""With jobs > 1, pages render in worker processes and merge in book order."""
+	make_textbook(tmp_path)
+	merged = install_fake_renderer(monkeypatch)
+	# fork keeps the stand-in renderer in the workers
+	textbook_html_to_pdf.build_book(
+		tmp_path, tmp_path / "book.pdf", jobs=2, build_dir=tmp_path / "build",
+		mp_context=multiprocessing.get_context("fork"),
+	)
+	assert len(merged) == 1
+	rendered = [pdf_path.read_text(encoding="utf-8") for pdf_path in merged[0]]
+	assert all(text.split("\n", 1)[0] != str(os.getpid()) for text in rendered)
+	for name, text in zip(PAGE_NAMES, rendered):
+		assert pathlib.Path(name).stem in text
+
+	with pytest.raises(ValueError):
+		textbook_html_to_pdf.build_book(tmp_path, tmp_path / "book.pdf", jobs=0)
+
+
+def test_build_book_reuses_cached_pages_and_prunes_stale_ones(tmp_path, monkeypatch):
+	"""Unchanged pages are not rendered again; an edited page replaces its old PDF."""
+	input_root = make_textbook(tmp_path)
+	merged = install_fake_renderer(monkeypatch)
+	build_dir = tmp_path / "build"
+	textbook_html_to_pdf.build_book(tmp_path, tmp_path / "book.pdf", build_dir=build_dir)
+	first_pdfs = merged[-1]
+	mtimes = [pdf_path.stat().st_mtime_ns for pdf_path in first_pdfs]
+
+	(input_root / PAGE_NAMES[1]).write_text("<p>edited</p>", encoding="utf-8")
+	textbook_html_to_pdf.build_book(tmp_path, tmp_path / "book.pdf", build_dir=build_dir)
+	second_pdfs = merged[-1]
+	assert second_pdfs[0] == first_pdfs[0] and second_pdfs[2] == first_pdfs[2]
+	assert second_pdfs[0].stat().st_mtime_ns == mtimes[0]
+	assert second_pdfs[1] != first_pdfs[1]
+	assert "edited" in second_pdfs[1].read_text(encoding="utf-8")
+	assert sorted((build_dir / "pdf").glob("*.pdf")) == sorted(second_pdfs)
+	manifest_lines = (build_dir / "rendered_pages.txt").read_text(encoding="utf-8").splitlines()
+	manifest_names = [line.split("\t")[1] + ".pdf" for line in manifest_lines]
+	assert manifest_names == [path.name for path in second_pdfs]
+
+
+def test_prune_highlight_cache_keeps_entries_in_use(tmp_path):
+	"""Entries for code no page contains, and leftover partial writes, are deleted."""
+	cache_dir = tmp_path / "highlight"
+	for code_text in ("$a = 1;", "$old = 2;"):
+		textbook_pages.highlight_code(code_text, cache_dir)
+	(cache_dir / "abc.123.tmp").write_text("partial", encoding="utf-8")
+	pages = [{"html_text": "<p>x</p><pre>$a = 1;</pre>"}, {"html_text": "<p>no code</p>"}]
+	assert textbook_html_to_pdf.prune_highlight_cache(cache_dir, pages) == 2
+	kept_key = textbook_pages.highlight_cache_key("$a = 1;")
+	assert [path.name for path in cache_dir.iterdir()] == [kept_key + ".html"]
+	assert textbook_html_to_pdf.prune_highlight_cache(tmp_path / "missing", pages) == 0
+
+
+def test_build_book_renders_from_the_loaded_page_text(tmp_path, monkeypatch):
+	"""Given a page model, pages render from its html_text and files are not read again."""
+	input_root = make_textbook(tmp_path)
+	merged = install_fake_renderer(monkeypatch)
+	pages = textbook_pages.load_pages(input_root)
+	pages[0]["html_text"] = "<p>from the model</p>"
+	(input_root / PAGE_NAMES[1]).unlink()
+	textbook_html_to_pdf.build_book(
+		tmp_path, tmp_path / "book.pdf", build_dir=tmp_path / "build", pages=pages,
+	)
+	rendered = [pdf_path.read_text(encoding="utf-8") for pdf_path in merged[0]]
+	assert len(rendered) == 3
+	assert "from the model" in rendered[0]
+	assert pathlib.Path(PAGE_NAMES[1]).stem in rendered[1]
+
+
+#============================================
+# Tests for chapter and page selectors
+#============================================
+
+
+def test_chapter_matches_number_or_glob():
+	"""Chapter selectors match by leading number (with or without zero padding) or glob."""
+	assert textbook_html_to_pdf.chapter_matches("06_Advanced_PGML_Techniques", "6")
+	assert textbook_html_to_pdf.chapter_matches("06_Advanced_PGML_Techniques", "06")
+	assert not textbook_html_to_pdf.chapter_matches("06_Advanced_PGML_Techniques", "60")
+	assert textbook_html_to_pdf.chapter_matches("06_Advanced_PGML_Techniques", "*PGML*")
+	assert not textbook_html_to_pdf.chapter_matches("05_Different_Question_Types", "*PGML*")
+
+
+def test_page_matches_sections_ranges_and_globs():
+	"""Sections compare numerically; a range's upper bound covers every subsection."""
+	matches = textbook_html_to_pdf.page_matches
+	page_6_3 = pathlib.Path("06_Advanced_PGML_Techniques/6.3-Tables.html")
+	page_6_10 = pathlib.Path("06_Advanced_PGML_Techniques/6.10-Chemistry.html")
+	assert matches(page_6_3, "6.3")
+	assert not matches(page_6_3, "6.1")
+	assert matches(page_6_3, "6.1-6.4")
+	assert not matches(page_6_10, "6.1-6.4")
+	assert matches(page_6_10, "6")
+	assert matches(page_6_10, "5-6")
+	assert matches(page_6_3, "*Tables*")
+	assert matches(page_6_3, "6.3-Tables")
+	assert not matches(page_6_3, "*Graphs*")
+
+
+def test_select_html_files_unions_selectors_in_book_order(tmp_path):
+	"""Pages matching any chapter or page selector are kept, in the given order."""
+	input_root = tmp_path / "Textbook"
+	html_files = [input_root / name for name in PAGE_NAMES]
+	select = textbook_html_to_pdf.select_html_files
+	assert select(html_files, input_root, [], []) == html_files
+	selected = select(html_files, input_root, ["90"], ["6.3-6.5", "*Matching*"])
+	assert [path.name for path in selected] == [
+		"5.4-Matching.html", "6.3-Tables.html", "6.5-Graphs.html", "90.1-Glossary.html",
+	]
+	assert select(html_files, input_root, ["07"], ["8.1"]) == []
+
+
+#============================================
+# Tests for the page transforms
+#============================================
+
+
+def test_transform_base_tag_points_at_source_folder(tmp_path):
+	"""A base tag with the source folder URI is the first head element."""
+	page = make_page(tmp_path)
+	root = parse("<p>body</p>")
+	textbook_html_to_pdf.transform_base_tag(root, page)
+	base_element = root.find("head")[0]
+	assert base_element.tag == "base"
+	assert base_element.get("href") == page["source_path"].parent.resolve().as_uri() + "/"
+
+
+def test_transform_default_style_appends_css(tmp_path):
+	"""The default CSS is appended after the page's own styles."""
+	root = parse("<html><head><style>p { color: red; }</style></head><body><p>x</p></body></html>")
+	textbook_html_to_pdf.transform_default_style(root, make_page(tmp_path))
+	styles = root.find("head").findall("style")
+	assert len(styles) == 2
+	assert styles[-1].text == textbook_html_to_pdf.get_default_style()
+
+
+def test_transform_highlight_wraps_code(tmp_path):
+	"""Each pre block is replaced by highlighted code, keeping the pre attributes."""
+	root = parse('<pre class="pg">$a = 1;</pre><pre><code>$b = 2;</code></pre>')
+	textbook_html_to_pdf.transform_highlight(root, make_page(tmp_path))
+	pre_elements = root.findall(".//pre")
+	assert pre_elements[0].get("class") == "pg"
+	for pre_element, code_text in zip(pre_elements, ("$a = 1;", "$b = 2;")):
+		assert len(pre_element) == 1
+		assert pre_element[0].get("class") == "codehilite"
+		assert pre_element[0].text_content().strip() == code_text
+
+
+def test_transform_page_header_inserts_header_and_chapter(tmp_path):
+	"""The source path header leads the body, preceded by the chapter heading when set."""
+	root = parse("<p>body</p>")
+	textbook_html_to_pdf.transform_page_header(root, make_page(tmp_path))
+	header_element = root.find("body")[0]
+	assert header_element.get("class") == "page-source-header"
+	assert header_element.get("id") == "page-06-advanced-pgml-techniques-6-1-text-coloring"
+	assert header_element.get("data-title") == "6.1 Text Coloring"
+	assert header_element.text == os.path.join("06_Advanced_PGML_Techniques", "6.1-Text_Coloring.html")
+
+	root = parse("<p>body</p>")
+	page = make_page(tmp_path, "Chapter 6: Advanced PGML Techniques")
+	textbook_html_to_pdf.transform_page_header(root, page)
+	body = root.find("body")
+	assert body[0].tag == "h1"
+	assert body[0].text == "Chapter 6: Advanced PGML Techniques"
+	assert body[1].get("class") == "page-source-header"
+
+
+def test_transform_relative_links_strip_or_absolutize(tmp_path, monkeypatch):
+	"""Relative hrefs are dropped by default, or resolved to file URIs; others are kept."""
+	page_html = (
+		'<a href="6.2-Other.html#top">a</a><a href="https://x.org/">b</a>'
+		'<a href="#local">c</a><a href="mailto:a@b.org">d</a>'
+	)
+	page = make_page(tmp_path)
+	root = parse(page_html)
+	textbook_html_to_pdf.transform_relative_links(root, page)
+	assert [anchor.get("href") for anchor in root.iter("a")] == [
+		None, "https://x.org/", "#local", "mailto:a@b.org",
+	]
+
+	monkeypatch.setattr(textbook_html_to_pdf, "RELATIVE_LINK_MODE", "absolute")
+	root = parse(page_html)
+	textbook_html_to_pdf.transform_relative_links(root, page)
+	target_uri = (page["source_path"].parent / "6.2-Other.html").resolve().as_uri()
+	assert next(root.iter("a")).get("href") == target_uri + "#top"
+
+
+def test_preprocess_page_html_applies_every_transform(tmp_path):
+	"""The serialized page carries the base tag, CSS, highlighting, header, and stripped links."""
+	page = make_page(tmp_path, "Chapter 6: Advanced PGML Techniques")
+	html_text = textbook_html_to_pdf.preprocess_page_html(
+		'<p><a href="x.html">x</a></p><pre>$a = 1;</pre>',
+		page["source_path"],
+		page["input_root"],
+		page["chapter_heading"],
+	)
+	root = parse(html_text)
+	assert root.find("head")[0].tag == "base"
+	assert root.find("head").findall("style")[-1].text == textbook_html_to_pdf.get_default_style()
+	assert root.find(".//pre/code").get("class") == "codehilite"
+	assert root.find("body")[0].get("class") == "chapter-title"
+	assert root.find(".//a").get("href") is None
+
+
+#============================================
+# Tests for the highlight memo
+#============================================
+
+
+def test_highlight_code_memo_and_disk_cache(tmp_path, monkeypatch):
+	"""Repeated code is highlighted once per process, and once across processes via the cache dir."""
+	calls = []
+	real_highlight = textbook_pages.pygments.highlight
+
+	def counting_highlight(code_text, lexer, formatter):
+		calls.append(code_text)
+		return real_highlight(code_text, lexer, formatter)
+
+	monkeypatch.setattr(textbook_pages.pygments, "highlight", counting_highlight)
+	monkeypatch.setattr(textbook_pages, "HIGHLIGHT_MEMO", {})
+	page = make_page(tmp_path)
+	page["highlight_cache_dir"] = tmp_path / "highlight"
+	for _ in range(2):
+		textbook_html_to_pdf.transform_highlight(parse("<pre>$a = 1;</pre><pre>$a = 1;</pre>"), page)
+	assert calls == ["$a = 1;"]
+	assert len(list(page["highlight_cache_dir"].glob("*.html"))) == 1
+
+	# A fresh process (empty memo) reads the highlighted HTML back from disk
+	monkeypatch.setattr(textbook_pages, "HIGHLIGHT_MEMO", {})
+	textbook_html_to_pdf.transform_highlight(parse("<pre>$a = 1;</pre>"), page)
+	assert calls == ["$a = 1;"]
+
+
+#============================================
+# Tests for the single-document table of contents
+#============================================
+
+
+def test_build_toc_html_groups_pages_by_chapter():
+	"""Pages nest under their chapter, link to header anchors, and number past the TOC pages."""
+	toc_entries = [
+		{"chapter": "Chapter 1: Intro", "title": "1.1 First", "anchor_id": "page-1-1", "page_index": 0},
+		{"chapter": "Chapter 1: Intro", "title": "1.2 A & B", "anchor_id": "page-1-2", "page_index": 3},
+		{"chapter": "Glossary", "title": "90.1 Terms", "anchor_id": "page-90-1", "page_index": 5},
+	]
+	toc_html = textbook_html_to_pdf.build_toc_html(toc_entries, 2)
+	root = parse(toc_html)
+	chapters = root.findall(".//ul[@class='toc']/li")
+	assert [chapter.text for chapter in chapters] == ["Chapter 1: Intro", "Glossary"]
+	links = root.findall(".//li[@class='page']/a")
+	assert [link.get("href") for link in links] == ["#page-1-1", "#page-1-2", "#page-90-1"]
+	assert [link.text for link in links] == ["1.1 First", "1.2 A & B", "90.1 Terms"]
+	assert [link.findtext("span") for link in links] == ["3", "6", "8"]
+	assert "1.2 A &amp; B" in toc_html
+	assert textbook_html_to_pdf.build_toc_html([], 1).count("<li") == 0
@@ -0,0 +1,51 @@
+"""
+Tests for the shared textbook page model in textbook_pages.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import textbook_pages
+
+
+#============================================
+# Tests for page ordering
+#============================================
+
+
+def test_find_html_files_sorts_numerically(tmp_path):
+	"""Section 1.10 sorts after 1.9, and chapters sort by number."""
+	for relative in ("02_Next/2.0-Index.html", "01_Intro/1.10-Late.html", "01_Intro/1.9-Early.html"):
+		path = tmp_path / relative
+		path.parent.mkdir(parents=True, exist_ok=True)
+		path.write_text("<p>x</p>", encoding="utf-8")
+	names = [path.name for path in textbook_pages.find_html_files(tmp_path)]
+	assert names == ["1.9-Early.html", "1.10-Late.html", "2.0-Index.html"]
+
+
+#============================================
+# Tests for load_pages
+#============================================
+
+
+def test_load_pages_reads_each_page_once(tmp_path):
+	"""Pages carry their text and ids; each parse_page_tree call returns a new tree."""
+	chapter_dir = tmp_path / "01_Intro"
+	chapter_dir.mkdir()
+	(chapter_dir / "1.1-First.html").write_text("<h2>Hello</h2><p>body</p>", encoding="utf-8")
+	pages = textbook_pages.load_pages(tmp_path)
+	assert len(pages) == 1
+	page = pages[0]
+	assert page["label"] == "01_Intro/1.1-First"
+	assert page["html_text"] == "<h2>Hello</h2><p>body</p>"
+	assert len(page["sha256"]) == 64
+	tree = textbook_pages.parse_page_tree(page)
+	assert textbook_pages.parse_page_tree(page) is not tree
+	assert "tree" not in page
+	assert tree.findtext(".//p") == "body"
@@ -0,0 +1,94 @@
+"""
+Tests for streaming and batch formatting in xml_formatter.
+"""
+
+import os
+import sys
+
+# Ensure tools/ is importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(REPO_ROOT, "tools")
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+import xml_formatter
+
+SAMPLE_XML = (
+	'<?xml version="1.0" encoding="UTF-8"?>\n'
+	'<!DOCTYPE quiz SYSTEM "quiz.dtd">\n'
+	"<!-- exported -->\n"
+	'<quiz xmlns="urn:qti" xmlns:m="urn:meta" m:id="q&amp;1">\n'
+	'  <item ident="1"><m:field>type</m:field><mattext>&lt;p&gt;caf&#233;&lt;/p&gt;</mattext>\n'
+	"    <choices><choice/><choice ident=\"b\"/><?render fast?></choices>\n"
+	"    <prompt>Pick <b>one</b> answer.</prompt><!-- hint --></item>\n"
+	'  <plain xmlns=""><leaf>x</leaf></plain>\n'
+	"</quiz>\n"
+	"<!-- end -->\n"
+)
+
+
+#============================================
+# Tests for stream_format_xml
+#============================================
+
+
+def test_stream_matches_tree_formatting(tmp_path):
+	"""Streaming output is identical to the whole-tree pretty printer."""
+	input_file = tmp_path / "quiz.xml"
+	input_file.write_text(SAMPLE_XML, encoding="utf-8")
+	output_file = tmp_path / "quiz.out.xml"
+	xml_formatter.stream_format_xml(str(input_file), str(output_file))
+	expected = xml_formatter.format_xml_with_lxml(str(input_file))
+	assert output_file.read_text(encoding="utf-8") == expected
+	assert "  <plain xmlns=\"\">\n    <leaf>x</leaf>\n  </plain>\n" in expected
+
+
+def test_stream_keeps_mixed_content_unchanged(tmp_path):
+	"""Text after a leading child keeps its element on one line, as in tree mode."""
+	output_file = tmp_path / "mixed.out.xml"
+	for index, xml_text in enumerate(["<r><a/>text</r>", "<q><s/>t</q>",
+			"<r><p><b>x</b><i>y</i> tail</p><e> </e></r>"]):
+		input_file = tmp_path / f"mixed{index}.xml"
+		input_file.write_text(xml_text, encoding="utf-8")
+		xml_formatter.stream_format_xml(str(input_file), str(output_file))
+		expected = xml_formatter.format_xml_with_lxml(str(input_file))
+		assert output_file.read_text(encoding="utf-8") == expected
+	assert expected.endswith("<r>\n  <p><b>x</b><i>y</i> tail</p>\n  <e> </e>\n</r>\n")
+
+
+def test_stream_keeps_doctype_internal_subset(tmp_path):
+	"""Entity and attribute declarations in the DOCTYPE are written out."""
+	input_file = tmp_path / "dtd.xml"
+	input_file.write_text(
+		'<!DOCTYPE r [\n<!ENTITY e "x">\n<!ATTLIST r id CDATA #IMPLIED>\n<!-- in dtd -->\n]>\n'
+		"<!-- before -->\n<r><a>&e;</a></r>\n", encoding="utf-8")
+	output_file = tmp_path / "dtd.out.xml"
+	xml_formatter.stream_format_xml(str(input_file), str(output_file))
+	output_text = output_file.read_text(encoding="utf-8")
+	assert output_text == xml_formatter.format_xml_with_lxml(str(input_file))
+	assert '<!ENTITY e "x">' in output_text
+	assert "<!ATTLIST r id CDATA #IMPLIED>" in output_text
+	assert output_text.count("<!-- in dtd -->") == 1
+
+
+#============================================
+# Tests for batch in-place formatting
+#============================================
+
+
+def test_format_files_in_place_with_backup(tmp_path):
+	"""Directories expand to their .xml files, each formatted with a .bak copy."""
+	sub_dir = tmp_path / "sub"
+	sub_dir.mkdir()
+	(tmp_path / "a.xml").write_text("<a><b/></a>", encoding="utf-8")
+	(sub_dir / "c.xml").write_text("<c><d>t</d></c>", encoding="utf-8")
+	(sub_dir / "notes.txt").write_text("", encoding="utf-8")
+	xml_files = xml_formatter.find_xml_files([str(tmp_path)])
+	relative_paths = [os.path.relpath(path, tmp_path) for path in xml_files]
+	assert relative_paths == ["a.xml", os.path.join("sub", "c.xml")]
+	for xml_file in xml_files:
+		xml_formatter.format_file_in_place(xml_file, stream=True)
+	assert (sub_dir / "c.xml").read_text(encoding="utf-8") == (
+		"<?xml version='1.0' encoding='utf-8'?>\n<c>\n  <d>t</d>\n</c>\n")
+	assert (sub_dir / "c.xml.bak").read_text(encoding="utf-8") == "<c><d>t</d></c>"
+	assert sorted(os.listdir(sub_dir)) == ["c.xml", "c.xml.bak", "notes.txt"]
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Build a multi-corpus back-of-book index on top of the YAKE keyword pipeline.
+
+Each source directory (HTML pages or plain-text guide files) gets a weight.
+Paragraph keywords are stored in a single SQLite index file, and only files
+whose content changed since the last run are re-extracted. The term table is
+then rebuilt from the stored keywords, so lookups never re-run YAKE.
+
+Usage:
+	python3 tools/build_yake_book_index.py
+	python3 tools/build_yake_book_index.py -s Textbook:1.0 -s Sources/Insight-HTML:0.5
+	python3 tools/build_yake_book_index.py -q "answer checker"
+"""
+
+# Standard Library
+import os
+import sys
+import sqlite3
+import argparse
+from pathlib import Path
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import sqlite_file_index
+import extract_textbook_yake_keywords
+
+DEFAULT_INDEX_PATH = os.path.join("output", "yake_book_index.sqlite")
+DEFAULT_SOURCES = (
+	("Textbook", 1.0),
+	("Sources/Insight-HTML", 0.6),
+	("Sources/WebWorK-HTML", 0.6),
+	("Sources/Construction_Guide_for_LibreTexts_2e", 0.4),
+)
+INDEX_SCHEMA = (
+	"CREATE TABLE IF NOT EXISTS files ("
+	"path TEXT PRIMARY KEY, source TEXT, weight REAL, "
+	"size INTEGER, mtime_ns INTEGER, sha1 TEXT); "
+	"CREATE TABLE IF NOT EXISTS paragraphs ("
+	"ref_id TEXT PRIMARY KEY, path TEXT, paragraph_index INTEGER, text TEXT); "
+	"CREATE TABLE IF NOT EXISTS keywords ("
+	"ref_id TEXT, path TEXT, keyword TEXT, canonical_term TEXT, score REAL); "
+	"CREATE TABLE IF NOT EXISTS terms ("
+	"canonical_term TEXT PRIMARY KEY, display_term TEXT, doc_count INTEGER, "
+	"page_count INTEGER, weighted_score REAL, avg_score REAL); "
+	"CREATE TABLE IF NOT EXISTS postings ("
+	"canonical_term TEXT, ref_id TEXT, path TEXT, weight REAL); "
+	"CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT); "
+	"CREATE INDEX IF NOT EXISTS paragraphs_path ON paragraphs (path); "
+	"CREATE INDEX IF NOT EXISTS keywords_path ON keywords (path); "
+	"CREATE INDEX IF NOT EXISTS postings_term ON postings (canonical_term);"
+)
+# Removes one file (the '?' path) with its paragraphs and keywords
+DELETE_FILE_STATEMENTS = (
+	"DELETE FROM files WHERE path = ?",
+	"DELETE FROM paragraphs WHERE path = ?",
+	"DELETE FROM keywords WHERE path = ?",
+)
+
+
+#============================================
+
+def parse_args() -> argparse.Namespace:
+	"""Parse command-line arguments."""
+	parser = argparse.ArgumentParser(
+		description="Build or query a weighted multi-source YAKE back-of-book index.",
+	)
+	parser.add_argument(
+		"-s",
+		"--source",
+		dest="sources",
+		action="append",
+		default=[],
+		help="Source directory with optional weight, PATH[:WEIGHT] (repeatable).",
+	)
+	parser.add_argument(
+		"-d",
+		"--database",
+		dest="index_path",
+		default=DEFAULT_INDEX_PATH,
+		help=f"On-disk index path (default: {DEFAULT_INDEX_PATH}).",
+	)
+	parser.add_argument(
+		"-q",
+		"--query",
+		dest="query",
+		default="",
+		help="Look up a term in the existing index instead of building it.",
+	)
+	parser.add_argument(
+		"-t",
+		"--top-k",
+		dest="top_k",
+		type=int,
+		default=25,
+		help="Top keywords to keep per paragraph (default: 25).",
+	)
+	return parser.parse_args()
+
+
+#============================================
+
+def parse_source_spec(spec: str) -> tuple[str, float]:
+	"""Split a PATH[:WEIGHT] source spec into its path and weight."""
+	path_text, separator, weight_text = spec.rpartition(":")
+	if not separator:
+		return spec, 1.0
+	weight = float(weight_text)
+	if weight <= 0:
+		raise ValueError(f"Source weight must be positive: {spec}")
+	return path_text, weight
+
+
+#============================================
+
+def open_index(index_path: Path) -> sqlite3.Connection:
+	"""Open the book index database, creating tables when needed."""
+	return sqlite_file_index.open_index(index_path, INDEX_SCHEMA)
+
+
+#============================================
+
+def keyword_settings(top_k: int) -> str:
+	"""Return the extractor settings that stored keywords depend on, as one string."""
+	return (
+		f"top_k={top_k} "
+		f"language={extract_textbook_yake_keywords.YAKE_LANGUAGE} "
+		f"ngram={extract_textbook_yake_keywords.YAKE_MAX_NGRAM} "
+		f"dedup={extract_textbook_yake_keywords.YAKE_DEDUP_LIMIT}"
+	)
+
+
+#============================================
+
+def index_file(
+	connection: sqlite3.Connection,
+	extractor,
+	path: Path,
+	source: str,
+	weight: float,
+	sha1: str,
+) -> int:
+	"""Extract paragraphs and YAKE keywords for one file and store them."""
+	path_text = str(path)
+	sqlite_file_index.delete_file_rows(connection, path_text, DELETE_FILE_STATEMENTS)
+	paragraphs = extract_textbook_yake_keywords.extract_file_paragraphs(path)
+	units = extract_textbook_yake_keywords.build_page_reference_units(path_text, paragraphs)
+	for unit in units:
+		paragraph_index = int(unit["ref_id"].rsplit("#p", 1)[1])
+		connection.execute(
+			"INSERT INTO paragraphs VALUES (?, ?, ?, ?)",
+			(unit["ref_id"], path_text, paragraph_index, unit["text"]),
+		)
+		for keyword_text, score in extractor.extract_keywords(unit["text"]):
+			term = extract_textbook_yake_keywords.clean_keyword(keyword_text)
+			if not term:
+				continue
+			canonical_term = extract_textbook_yake_keywords.canonicalize_term(term)
+			if not canonical_term:
+				continue
+			connection.execute(
+				"INSERT INTO keywords VALUES (?, ?, ?, ?, ?)",
+				(unit["ref_id"], path_text, term, canonical_term, score),
+			)
+	stat = path.stat()
+	connection.execute(
+		"INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+		(path_text, source, weight, stat.st_size, stat.st_mtime_ns, sha1),
+	)
+	return len(units)
+
+
+#============================================
+
+def update_sources(
+	connection: sqlite3.Connection,
+	extractor,
+	sources: list[tuple[str, float]],
+	settings: str,
+) -> tuple[int, int, int]:
+	"""
+	Bring the stored keywords in line with the source directories.
+
+	settings comes from keyword_settings(); when it differs from the stored
+	value every file is re-extracted, since the old keywords used other settings.
+	Returns (changed_files, unchanged_files, removed_files).
+	"""
+	stored = sqlite_file_index.load_file_stamps(connection)
+	meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+	stamps = stored
+	if meta.get("keyword_settings") != settings:
+		stamps = {}
+	seen_paths: set[str] = set()
+	changed_count = 0
+	unchanged_count = 0
+	for source, weight in sources:
+		source_dir = Path(source)
+		if not source_dir.is_dir():
+			raise RuntimeError(f"Source directory not found: {source_dir}")
+		for path in extract_textbook_yake_keywords.collect_source_files(source_dir):
+			path_text = str(path)
+			seen_paths.add(path_text)
+			status, stat, sha1 = sqlite_file_index.check_file(path, stamps.get(path_text))
+			if status != sqlite_file_index.CHANGED:
+				# Source and weight may have changed even when the content did not
+				connection.execute(
+					"UPDATE files SET source = ?, weight = ?, size = ?, mtime_ns = ? "
+					"WHERE path = ?",
+					(source, weight, stat.st_size, stat.st_mtime_ns, path_text),
+				)
+				unchanged_count += 1
+				continue
+			unit_count = index_file(connection, extractor, path, source, weight, sha1)
+			connection.commit()
+			changed_count += 1
+			print(f"Indexed {path_text} ({unit_count} paragraphs)")
+
+	removed_count = sqlite_file_index.remove_missing_files(
+		connection, stored, seen_paths, DELETE_FILE_STATEMENTS,
+	)
+	# Written last, so an interrupted run re-extracts everything again next time
+	connection.execute(
+		"INSERT OR REPLACE INTO meta (key, value) VALUES ('keyword_settings', ?)",
+		(settings,),
+	)
+	connection.commit()
+	return changed_count, unchanged_count, removed_count
+
+
+#============================================
+
+def rebuild_terms(connection: sqlite3.Connection) -> int:
+	"""Rebuild the term and posting tables from stored keywords."""
+	reference_units: list[dict[str, str]] = []
+	for (text,) in connection.execute("SELECT text FROM paragraphs"):
+		reference_units.append({"text_lower": text.lower()})
+	total_docs = len(reference_units)
+	word_doc_frequency = extract_textbook_yake_keywords.build_word_document_frequency(
+		reference_units,
+	)
+
+	# Corpus-wide filters depend on IDF, so they run on every rebuild
+	aggregate: dict[str, dict[str, object]] = {}
+	rows = connection.execute(
+		"SELECT keywords.canonical_term, keywords.keyword, keywords.score, "
+		"keywords.ref_id, keywords.path, files.weight "
+		"FROM keywords JOIN files ON files.path = keywords.path"
+	)
+	for canonical_term, term, score, ref_id, path_text, weight in rows:
+		if extract_textbook_yake_keywords.is_low_information_term(
+			term, word_doc_frequency, total_docs,
+		):
+			continue
+		if canonical_term not in aggregate:
+			aggregate[canonical_term] = {"variant_counts": {}, "scores": [], "refs": {}}
+		term_data = aggregate[canonical_term]
+		term_data["variant_counts"][term] = term_data["variant_counts"].get(term, 0) + 1
+		term_data["scores"].append(score)
+		term_data["refs"][ref_id] = (path_text, weight)
+
+	connection.execute("DELETE FROM terms")
+	connection.execute("DELETE FROM postings")
+	for canonical_term, term_data in aggregate.items():
+		refs = term_data["refs"]
+		scores = term_data["scores"]
+		display_term = extract_textbook_yake_keywords.choose_display_term(
+			canonical_term, term_data["variant_counts"],
+		)
+		page_count = len({path_text for path_text, _weight in refs.values()})
+		weighted_score = sum(weight for _path, weight in refs.values())
+		connection.execute(
+			"INSERT INTO terms VALUES (?, ?, ?, ?, ?, ?)",
+			(
+				canonical_term,
+				display_term,
+				len(refs),
+				page_count,
+				weighted_score,
+				sum(scores) / len(scores),
+			),
+		)
+		connection.executemany(
+			"INSERT INTO postings VALUES (?, ?, ?, ?)",
+			[(canonical_term, ref_id, path, weight) for ref_id, (path, weight) in refs.items()],
+		)
+	connection.commit()
+	return len(aggregate)
+
+
+#============================================
+
+def query_index(connection: sqlite3.Connection, query: str) -> list[str]:
+	"""Return printable index lines for terms matching the query."""
+	canonical_query = extract_textbook_yake_keywords.canonicalize_term(query)
+	if not canonical_query:
+		return []
+	# Exact term first, then longer terms that start with the query
+	term_rows = connection.execute(
+		"SELECT canonical_term, display_term, doc_count, page_count, weighted_score "
+		"FROM terms WHERE canonical_term = ? OR canonical_term LIKE ? "
+		"ORDER BY canonical_term != ?, weighted_score DESC, canonical_term",
+		(canonical_query, canonical_query + " %", canonical_query),
+	).fetchall()
+
+	lines: list[str] = []
+	for canonical_term, display_term, doc_count, page_count, weighted_score in term_rows:
+		lines.append(
+			f"{display_term} (score {weighted_score:.2f}, "
+			f"{doc_count} paragraphs, {page_count} pages)"
+		)
+		pages: dict[str, list[str]] = {}
+		page_weights: dict[str, float] = {}
+		for ref_id, path_text, weight in connection.execute(
+			"SELECT ref_id, path, weight FROM postings WHERE canonical_term = ?",
+			(canonical_term,),
+		):
+			pages.setdefault(path_text, []).append(ref_id.rsplit("#", 1)[1])
+			page_weights[path_text] = weight
+		for path_text in sorted(pages, key=lambda p: (-page_weights[p], p)):
+			paragraph_ids = sorted(pages[path_text], key=lambda ref: int(ref[1:]))
+			lines.append(f"\t{path_text}: {', '.join(paragraph_ids)}")
+	return lines
+
+
+#============================================
+
+def main() -> None:
+	"""Program entry point."""
+	args = parse_args()
+	index_path = Path(args.index_path)
+
+	if args.query:
+		if not index_path.exists():
+			raise RuntimeError(f"Index not found, build it first: {index_path}")
+		connection = open_index(index_path)
+		lines = query_index(connection, args.query)
+		connection.close()
+		if not lines:
+			print(f"No index entries for: {args.query}")
+			return
+		print("\n".join(lines))
+		return
+
+	yake = extract_textbook_yake_keywords.load_yake_module()
+	if yake is None:
+		print(
+			"Missing dependency 'yake'. Install with: "
+			"source source_me.sh && python -m pip install yake"
+		)
+		return
+
+	if args.sources:
+		sources = [parse_source_spec(spec) for spec in args.sources]
+	else:
+		sources = list(DEFAULT_SOURCES)
+
+	extractor = yake.KeywordExtractor(
+		lan=extract_textbook_yake_keywords.YAKE_LANGUAGE,
+		n=extract_textbook_yake_keywords.YAKE_MAX_NGRAM,
+		dedupLim=extract_textbook_yake_keywords.YAKE_DEDUP_LIMIT,
+		top=args.top_k,
+	)
+
+	connection = open_index(index_path)
+	changed_count, unchanged_count, removed_count = update_sources(
+		connection, extractor, sources, keyword_settings(args.top_k),
+	)
+	# Term rebuild only reads stored keywords, so it is cheap and also picks up weight changes
+	term_count = rebuild_terms(connection)
+	connection.close()
+
+	for source, weight in sources:
+		print(f"Source: {source} (weight {weight})")
+	print(f"Files re-indexed: {changed_count}")
+	print(f"Files unchanged: {unchanged_count}")
+	print(f"Files removed: {removed_count}")
+	print(f"Index terms: {term_count} -> {index_path}")
+
+
+if __name__ == "__main__":
+	main()
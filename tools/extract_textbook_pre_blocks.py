@@ -134,14 +134,14 @@ def write_block(
 #============================================
 
 
-def extract_blocks(input_dir: str, output_dir: str) -> list[tuple[str, bool]]:
+def iter_pre_blocks(input_dir: str) -> list[dict]:
 	"""
-	Extract <pre> blocks from HTML files and return written file paths.
+	Collect <pre> blocks from HTML files without writing them.
+
+	Returns a list of dicts with keys: rel_path, block_index, line, text.
 	"""
-	written_files: list[tuple[str, bool]] = []
-	html_files = find_html_files(input_dir)
-	os.makedirs(output_dir, exist_ok=True)
-	for file_path in html_files:
+	blocks: list[dict] = []
+	for file_path in find_html_files(input_dir):
 		with open(file_path, "r", encoding="utf-8") as handle:
 			html_text = handle.read()
 		tree = parse_html_fragment(html_text, file_path)
@@ -150,17 +150,35 @@ def extract_blocks(input_dir: str, output_dir: str) -> list[tuple[str, bool]]:
 			continue
 		rel_path = os.path.relpath(file_path, start=input_dir)
 		for index, pre in enumerate(pre_blocks, start=1):
-			text = pre.text_content()
-			full_problem = is_full_problem(text)
 			line = getattr(pre, "sourceline", None)
-			output_path = write_block(
-				output_dir=output_dir,
-				rel_path=rel_path,
-				block_index=index,
-				line=str(line) if line is not None else None,
-				text=text,
-			)
-			written_files.append((output_path, full_problem))
+			blocks.append({
+				"rel_path": rel_path,
+				"block_index": index,
+				"line": str(line) if line is not None else None,
+				"text": pre.text_content(),
+			})
+	return blocks
+
+
+#============================================
+
+
+def extract_blocks(input_dir: str, output_dir: str) -> list[tuple[str, bool]]:
+	"""
+	Extract <pre> blocks from HTML files and return written file paths.
+	"""
+	written_files: list[tuple[str, bool]] = []
+	os.makedirs(output_dir, exist_ok=True)
+	for block in iter_pre_blocks(input_dir):
+		full_problem = is_full_problem(block["text"])
+		output_path = write_block(
+			output_dir=output_dir,
+			rel_path=block["rel_path"],
+			block_index=block["block_index"],
+			line=block["line"],
+			text=block["text"],
+		)
+		written_files.append((output_path, full_problem))
 	return written_files
 
 
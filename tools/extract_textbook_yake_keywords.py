@@ -15,6 +15,9 @@ import math
 import re
 from pathlib import Path
 
+# PIP3 modules
+import lxml.etree
+
 YAKE_LANGUAGE = "en"
 YAKE_MAX_NGRAM = 3
 YAKE_DEDUP_LIMIT = 0.9
@@ -48,6 +51,10 @@ CONNECTOR_WORDS = {
 	"without",
 }
 
+SKIP_TEXT_TAGS = {"script", "style"}
+PARAGRAPH_TAGS = {"p", "li", "td", "th", "h2", "h3", "h4", "h5", "h6"}
+HTML_PARSER = lxml.etree.HTMLParser(encoding="utf-8")
+
 LOW_SIGNAL_TOKENS = {
 	"attribution",
 	"easier",
@@ -98,8 +105,6 @@ class VisibleTextExtractor(html.parser.HTMLParser):
 class ParagraphExtractor(html.parser.HTMLParser):
 	"""Collect paragraph-like text blocks and ignore script/style blocks."""
 
-	PARAGRAPH_TAGS = {"p", "li", "td", "th", "h2", "h3", "h4", "h5", "h6"}
-
 	def __init__(self) -> None:
 		super().__init__()
 		self.paragraphs: list[str] = []
@@ -114,7 +119,7 @@ class ParagraphExtractor(html.parser.HTMLParser):
 			return
 		if self.skip_stack:
 			return
-		if tag_name in self.PARAGRAPH_TAGS:
+		if tag_name in PARAGRAPH_TAGS:
 			self.capture_depth += 1
 			if self.capture_depth == 1:
 				self.current_chunks = []
@@ -126,7 +131,7 @@ class ParagraphExtractor(html.parser.HTMLParser):
 			return
 		if self.skip_stack:
 			return
-		if tag_name in self.PARAGRAPH_TAGS and self.capture_depth > 0:
+		if tag_name in PARAGRAPH_TAGS and self.capture_depth > 0:
 			self.capture_depth -= 1
 			if self.capture_depth == 0:
 				text = " ".join(self.current_chunks).strip()
@@ -232,6 +237,24 @@ def collect_html_files(input_dir: Path) -> list[Path]:
 	return filtered_files
 
 
+#============================================
+
+def collect_text_files(input_dir: Path) -> list[Path]:
+	"""Return sorted plain-text file paths under input_dir."""
+	text_files = sorted(input_dir.rglob("*.txt"))
+	filtered_files = [path for path in text_files if path.is_file()]
+	return filtered_files
+
+
+#============================================
+
+def collect_source_files(input_dir: Path) -> list[Path]:
+	"""Return sorted HTML and plain-text file paths under input_dir."""
+	source_files = collect_html_files(input_dir) + collect_text_files(input_dir)
+	source_files.sort()
+	return source_files
+
+
 #============================================
 
 def extract_visible_text(html_content: str) -> str:
@@ -241,10 +264,93 @@ def extract_visible_text(html_content: str) -> str:
 	return " ".join(parser.text_chunks).strip()
 
 
+#============================================
+
+def extract_paragraph_blocks(html_content: str) -> list[tuple[int, str]]:
+	"""
+	Extract (source_line, text) paragraph blocks with one lxml parse.
+
+	Paragraph boundaries match ParagraphExtractor: the outermost PARAGRAPH_TAGS
+	element starts a block and nested paragraph tags join it. Visible text is
+	collected in the same walk and returned as one block when no paragraphs exist.
+	"""
+	if not html_content.strip():
+		return []
+	root = lxml.etree.fromstring(html_content.encode("utf-8"), HTML_PARSER)
+	if root is None:
+		return []
+
+	blocks: list[tuple[int, str]] = []
+	visible_chunks: list[str] = []
+	paragraph_chunks: list[str] = []
+	paragraph_line = 0
+	skip_depth = 0
+	capture_depth = 0
+	# Explicit stack of (element, closing) keeps deep trees off the call stack
+	stack: list[tuple[object, bool]] = [(root, False)]
+	while stack:
+		element, closing = stack.pop()
+		# Comments and processing instructions have a non-string tag
+		is_tag = isinstance(element.tag, str)
+		tag_name = element.tag.lower() if is_tag else ""
+		if not closing:
+			stack.append((element, True))
+			if not is_tag:
+				continue
+			if tag_name in SKIP_TEXT_TAGS:
+				skip_depth += 1
+				continue
+			if skip_depth:
+				continue
+			if tag_name in PARAGRAPH_TAGS:
+				capture_depth += 1
+				if capture_depth == 1:
+					paragraph_chunks = []
+					paragraph_line = element.sourceline or 0
+			if element.text:
+				visible_chunks.append(element.text)
+				if capture_depth:
+					paragraph_chunks.append(element.text)
+			for child in reversed(element):
+				stack.append((child, False))
+			continue
+
+		if tag_name in SKIP_TEXT_TAGS:
+			skip_depth -= 1
+		elif is_tag and not skip_depth and tag_name in PARAGRAPH_TAGS:
+			capture_depth -= 1
+			if capture_depth == 0:
+				# Normalize whitespace once per block instead of once per text node
+				text = " ".join(" ".join(paragraph_chunks).split())
+				if text:
+					blocks.append((paragraph_line, text))
+		# The tail belongs to the parent, after this element has closed
+		if element.tail and not skip_depth:
+			visible_chunks.append(element.tail)
+			if capture_depth:
+				paragraph_chunks.append(element.tail)
+
+	if blocks:
+		return blocks
+	visible_text = " ".join(" ".join(visible_chunks).split())
+	if not visible_text:
+		return []
+	fallback_blocks = [(1, visible_text)]
+	return fallback_blocks
+
+
 #============================================
 
 def extract_paragraph_texts(html_content: str) -> list[str]:
 	"""Extract paragraph-like text blocks from HTML content."""
+	paragraphs = [text for _line, text in extract_paragraph_blocks(html_content)]
+	return paragraphs
+
+
+#============================================
+
+def extract_paragraph_texts_htmlparser(html_content: str) -> list[str]:
+	"""Extract paragraph-like text blocks with the pure-Python html.parser classes."""
 	parser = ParagraphExtractor()
 	parser.feed(html_content)
 	if parser.paragraphs:
@@ -255,6 +361,73 @@ def extract_paragraph_texts(html_content: str) -> list[str]:
 	return [visible_text]
 
 
+#============================================
+
+def extract_text_paragraph_blocks(text_content: str) -> list[tuple[int, str]]:
+	"""Extract (start_line, text) blank-line separated paragraphs from plain text."""
+	blocks: list[tuple[int, str]] = []
+	current_lines: list[str] = []
+	start_line = 0
+	for line_number, line in enumerate(text_content.splitlines(), start=1):
+		if line.strip():
+			if not current_lines:
+				start_line = line_number
+			current_lines.append(line)
+			continue
+		if current_lines:
+			blocks.append((start_line, " ".join(" ".join(current_lines).split())))
+			current_lines = []
+	if current_lines:
+		blocks.append((start_line, " ".join(" ".join(current_lines).split())))
+	return blocks
+
+
+#============================================
+
+def extract_text_paragraphs(text_content: str) -> list[str]:
+	"""Extract blank-line separated paragraphs from plain text content."""
+	paragraphs = [text for _line, text in extract_text_paragraph_blocks(text_content)]
+	return paragraphs
+
+
+#============================================
+
+def extract_file_paragraph_blocks(path: Path) -> list[tuple[int, str]]:
+	"""Read one HTML or plain-text file and return (line, text) paragraph blocks."""
+	content = path.read_text(encoding="utf-8", errors="replace")
+	if path.suffix.lower() == ".txt":
+		return extract_text_paragraph_blocks(content)
+	return extract_paragraph_blocks(content)
+
+
+#============================================
+
+def extract_file_paragraphs(path: Path) -> list[str]:
+	"""Read one HTML or plain-text file and return its paragraph texts."""
+	paragraphs = [text for _line, text in extract_file_paragraph_blocks(path)]
+	return paragraphs
+
+
+#============================================
+
+def build_page_reference_units(page_id: str, paragraphs: list[str]) -> list[dict[str, str]]:
+	"""Build paragraph reference units for one page, skipping short paragraphs."""
+	reference_units: list[dict[str, str]] = []
+	for index, paragraph_text in enumerate(paragraphs, start=1):
+		word_count = len(tokenize_words(paragraph_text))
+		if word_count < MIN_REFERENCE_WORDS:
+			continue
+		reference_units.append(
+			{
+				"ref_id": f"{page_id}#p{index}",
+				"page_path": page_id,
+				"text": paragraph_text,
+				"text_lower": paragraph_text.lower(),
+			},
+		)
+	return reference_units
+
+
 #============================================
 
 def normalize_keyword(term: str) -> str:
@@ -281,6 +454,18 @@ def tokenize_words(text: str) -> list[str]:
 	return re.findall(r"[a-z0-9]+(?:[-_][a-z0-9]+)*", text.lower())
 
 
+#============================================
+
+def clean_keyword(keyword_text: str) -> str:
+	"""Normalize a raw YAKE keyword, returning an empty string when unusable."""
+	term = normalize_keyword(keyword_text)
+	if len(term) < 3:
+		return ""
+	if not contains_letters(term):
+		return ""
+	return term
+
+
 #============================================
 
 def singularize_token(token: str) -> str:
@@ -637,25 +822,8 @@ def main() -> None:
 	all_reference_units: list[dict[str, str]] = []
 
 	for page_path in html_files:
-		html_content = page_path.read_text(encoding="utf-8", errors="replace")
-		page_id = str(page_path)
-		reference_units: list[tuple[str, str]] = []
-		paragraphs = extract_paragraph_texts(html_content)
-		for index, paragraph_text in enumerate(paragraphs, start=1):
-			word_count = len(tokenize_words(paragraph_text))
-			if word_count < MIN_REFERENCE_WORDS:
-				continue
-			ref_id = f"{page_id}#p{index}"
-			reference_units.append((ref_id, paragraph_text))
-		for ref_id, paragraph_text in reference_units:
-			all_reference_units.append(
-				{
-					"ref_id": ref_id,
-					"page_path": page_id,
-					"text": paragraph_text,
-					"text_lower": paragraph_text.lower(),
-				},
-			)
+		paragraphs = extract_file_paragraphs(page_path)
+		all_reference_units.extend(build_page_reference_units(str(page_path), paragraphs))
 
 	total_reference_units = len(all_reference_units)
 	word_doc_frequency = build_word_document_frequency(all_reference_units)
@@ -666,10 +834,8 @@ def main() -> None:
 		reference_text = unit["text"]
 		keywords: list[tuple[str, float]] = extractor.extract_keywords(reference_text)
 		for keyword_text, score in keywords:
-			term = normalize_keyword(keyword_text)
-			if len(term) < 3:
-				continue
-			if not contains_letters(term):
+			term = clean_keyword(keyword_text)
+			if not term:
 				continue
 			if is_low_information_term(term, word_doc_frequency, total_reference_units):
 				continue
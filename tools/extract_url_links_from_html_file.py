@@ -1,56 +1,62 @@
 #!/usr/bin/env python3
 """
-Extract all links from an HTML file and write a sorted, unique list.
+Extract all links from HTML files and write a sorted, unique list.
+
+Inputs may be files or directories; directories are searched recursively
+for .html/.htm files, which are parsed with lxml on a process pool.
 
 Defaults:
-- If -o/--output is not provided, write to <input_root>_links.txt next to the input file.
-- Output appends by default.
+- If -o/--output is not provided, a single input file writes to
+  <input_root>_links.txt next to it; directories write to Links/html_links.txt.
+- Output merges by default: new links are merged into the existing sorted,
+  deduplicated list. The existing file is streamed in sorted runs, never
+  read into memory whole.
+- -g/--graph writes the link graph (one "page<TAB>link" row per outgoing
+  link) and the most referenced links and hosts are printed.
 
 Usage:
 	python3 extract_url_links_from_html_file.py -i file.html
 	python3 extract_url_links_from_html_file.py -i file.html -o file_links.txt
 	python3 extract_url_links_from_html_file.py -i file.html --no-append
+	python3 extract_url_links_from_html_file.py -i Sources -i Textbook -g output/link_graph.tsv
 """
 
+# Standard Library
+import os
+import heapq
 import argparse
-import html.parser
+import tempfile
+import itertools
+import collections
+import concurrent.futures
 from pathlib import Path
-from urllib.parse import urldefrag
-
-
-#============================================
+from urllib.parse import urldefrag, urlsplit
 
-class LinkExtractor(html.parser.HTMLParser):
-	"""HTML parser that collects href and src links."""
-
-	def __init__(self) -> None:
-		super().__init__()
-		self.links: list[str] = []
-
-	def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
-		attr_map: dict[str, str] = {}
-		for key, value in attrs:
-			if value is None:
-				continue
-			attr_map[key.lower()] = value
+# PIP3 modules
+import lxml.etree
+import lxml.html
 
-		for key in ("href", "src"):
-			if key in attr_map:
-				self.links.append(attr_map[key])
+DEFAULT_BATCH_OUTPUT = os.path.join("Links", "html_links.txt")
+HTML_SUFFIXES = (".html", ".htm")
+# Lines per sorted run when merging into an existing output file
+RUN_LINES = 100000
+LINK_XPATH = lxml.etree.XPath("//@href | //@src")
+HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
 
 
 #============================================
 
 def parse_args() -> argparse.Namespace:
 	"""Parse command-line arguments."""
-	parser = argparse.ArgumentParser(description="Extract and sort all links from an HTML file.")
+	parser = argparse.ArgumentParser(description="Extract and sort all links from HTML files.")
 
 	parser.add_argument(
 		"-i",
 		"--input",
-		dest="input_file",
+		dest="inputs",
+		action="append",
 		required=True,
-		help="Input HTML file",
+		help="Input HTML file or directory (repeatable)",
 	)
 
 	parser.add_argument(
@@ -58,7 +64,10 @@ def parse_args() -> argparse.Namespace:
 		"--output",
 		dest="output_file",
 		default="",
-		help="Output text file (defaults to <input_root>_links.txt)",
+		help=(
+			"Output text file (defaults to <input_root>_links.txt, "
+			"or Links/html_links.txt for directories)"
+		),
 	)
 
 	parser.add_argument(
@@ -66,7 +75,7 @@ def parse_args() -> argparse.Namespace:
 		"--append",
 		dest="append",
 		action="store_true",
-		help="Append to output file (default)",
+		help="Merge into the existing output file (default)",
 	)
 
 	parser.add_argument(
@@ -77,6 +86,32 @@ def parse_args() -> argparse.Namespace:
 	)
 	parser.set_defaults(append=True)
 
+	parser.add_argument(
+		"-g",
+		"--graph",
+		dest="graph_file",
+		default="",
+		help="Write the page -> link graph as a TSV file",
+	)
+
+	parser.add_argument(
+		"-j",
+		"--jobs",
+		dest="jobs",
+		type=int,
+		default=os.cpu_count() or 1,
+		help="Parallel worker processes (default: CPU count)",
+	)
+
+	parser.add_argument(
+		"-t",
+		"--top",
+		dest="top",
+		type=int,
+		default=10,
+		help="Most referenced links and hosts to print for multiple files (default: 10)",
+	)
+
 	return parser.parse_args()
 
 
@@ -88,6 +123,24 @@ def default_output_path(input_file: str) -> str:
 	return str(in_path.with_name(in_path.stem + "_links.txt"))
 
 
+#============================================
+
+def find_html_files(inputs: list[str]) -> list[str]:
+	"""Expand input files and directories into a sorted list of HTML file paths."""
+	html_files: set[str] = set()
+	for input_path in inputs:
+		path = Path(input_path)
+		if path.is_dir():
+			for child in path.rglob("*"):
+				if child.suffix.lower() in HTML_SUFFIXES and child.is_file():
+					html_files.add(str(child))
+		elif path.is_file():
+			html_files.add(str(path))
+		else:
+			raise FileNotFoundError(f"Input not found: {input_path}")
+	return sorted(html_files)
+
+
 #============================================
 
 def normalize_link(raw_link: str) -> str:
@@ -105,14 +158,19 @@ def normalize_link(raw_link: str) -> str:
 
 def extract_all_links(html_text: str) -> list[str]:
 	"""Extract all href and src attribute values from HTML."""
-	parser = LinkExtractor()
-	parser.feed(html_text)
+	if not html_text.strip():
+		return []
+	try:
+		root = lxml.html.fromstring(html_text.encode("utf-8"), parser=HTML_PARSER)
+	except lxml.etree.ParserError:
+		# No elements at all (for example a file holding only a comment)
+		return []
 
 	seen: set[str] = set()
 	out: list[str] = []
 
-	for raw in parser.links:
-		link = normalize_link(raw)
+	for raw in LINK_XPATH(root):
+		link = normalize_link(str(raw))
 		if not link:
 			continue
 		if link in seen:
@@ -126,15 +184,135 @@ def extract_all_links(html_text: str) -> list[str]:
 
 #============================================
 
-def write_links(output_file: str, links: list[str], append: bool) -> None:
-	"""Write links to the output file."""
-	mode = "a" if append else "w"
+def extract_links_from_file(html_file: str) -> tuple[str, list[str]]:
+	"""Read one HTML file and return (path, sorted unique links); used by the pool."""
+	html_text = Path(html_file).read_text(encoding="utf-8", errors="replace")
+	links = extract_all_links(html_text)
+	return html_file, links
+
+
+#============================================
+
+def build_link_graph(html_files: list[str], jobs: int) -> dict[str, list[str]]:
+	"""Extract links from every file, in parallel when jobs > 1, as page -> links."""
+	if jobs > 1 and len(html_files) > 1:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+			results = list(executor.map(extract_links_from_file, html_files, chunksize=8))
+	else:
+		results = [extract_links_from_file(html_file) for html_file in html_files]
+	graph = dict(results)
+	return graph
 
-	out_text = ""
-	for link in links:
-		out_text += link + "\n"
 
-	Path(output_file).open(mode, encoding="utf-8").write(out_text)
+#============================================
+
+def spill_run(run: list[str], work_dir: str) -> str:
+	"""Write one sorted run to a temporary file in work_dir and return its path."""
+	run_fd, run_path = tempfile.mkstemp(dir=work_dir, suffix=".run")
+	with os.fdopen(run_fd, "w", encoding="utf-8") as run_handle:
+		run_handle.writelines(line + "\n" for line in run)
+	return run_path
+
+
+#============================================
+
+def read_run(run_path: str):
+	"""Yield the lines of a spilled run."""
+	with open(run_path, encoding="utf-8") as run_handle:
+		for line in run_handle:
+			yield line.rstrip("\n")
+
+
+#============================================
+
+def split_sorted_runs(input_file: str, work_dir: str) -> list:
+	"""
+	Return sorted iterators over the lines of input_file, RUN_LINES at a time.
+
+	A file that fits in one run is sorted in memory; longer files spill each
+	sorted run to a temporary file in work_dir so they can be merged lazily.
+	"""
+	held_run = None
+	run_paths: list[str] = []
+	with open(input_file, encoding="utf-8", errors="replace") as handle:
+		lines = (line.strip() for line in handle)
+		links = (line for line in lines if line)
+		while True:
+			run = sorted(itertools.islice(links, RUN_LINES))
+			if not run:
+				break
+			if held_run is None and not run_paths:
+				held_run = run
+				continue
+			# More than one run: keep only one in memory at a time
+			if held_run is not None:
+				run_paths.append(spill_run(held_run, work_dir))
+				held_run = None
+			run_paths.append(spill_run(run, work_dir))
+	if held_run is not None:
+		return [iter(held_run)]
+	runs = [read_run(run_path) for run_path in run_paths]
+	return runs
+
+
+#============================================
+
+def write_links(output_file: str, links: list[str], append: bool) -> int:
+	"""
+	Write links to the output file as one sorted, deduplicated list.
+
+	With append, the existing file is merged in; the result replaces it
+	atomically. Returns the number of lines written.
+	"""
+	output_dir = os.path.dirname(os.path.abspath(output_file))
+	os.makedirs(output_dir, exist_ok=True)
+	new_links = sorted(set(links))
+	line_count = 0
+	with tempfile.TemporaryDirectory(dir=output_dir) as work_dir:
+		runs = [iter(new_links)]
+		if append and os.path.exists(output_file):
+			runs.extend(split_sorted_runs(output_file, work_dir))
+		merged_path = os.path.join(work_dir, "merged.txt")
+		with open(merged_path, "w", encoding="utf-8") as out_handle:
+			previous = None
+			for link in heapq.merge(*runs):
+				if link == previous:
+					continue
+				out_handle.write(link + "\n")
+				previous = link
+				line_count += 1
+		os.replace(merged_path, output_file)
+	return line_count
+
+
+#============================================
+
+def write_link_graph(graph_file: str, graph: dict[str, list[str]]) -> None:
+	"""Write one "page<TAB>link" row per outgoing link, sorted by page then link."""
+	graph_dir = os.path.dirname(graph_file)
+	if graph_dir:
+		os.makedirs(graph_dir, exist_ok=True)
+	with open(graph_file, "w", encoding="utf-8") as handle:
+		handle.write("page\tlink\n")
+		for page in sorted(graph):
+			for link in graph[page]:
+				handle.write(f"{page}\t{link}\n")
+
+
+#============================================
+
+def count_referencing_pages(
+	graph: dict[str, list[str]],
+) -> tuple[collections.Counter, collections.Counter]:
+	"""Return (link -> page count, host -> page count) over the link graph."""
+	link_counts: collections.Counter = collections.Counter()
+	host_counts: collections.Counter = collections.Counter()
+	for links in graph.values():
+		link_counts.update(links)
+		hosts = {urlsplit(link).netloc.lower() for link in links}
+		hosts.discard("")
+		host_counts.update(hosts)
+	return link_counts, host_counts
 
 
 #============================================
@@ -143,15 +321,30 @@ def main() -> None:
 	"""Program entry point."""
 	args = parse_args()
 
+	html_files = find_html_files(args.inputs)
 	output_file = args.output_file
 	if not output_file:
-		output_file = default_output_path(args.input_file)
-
-	html_text = Path(args.input_file).read_text(encoding="utf-8", errors="replace")
-	links = extract_all_links(html_text)
-
-	write_links(output_file, links, args.append)
-	print(f"Wrote {len(links)} links to {output_file}")
+		single_file = len(args.inputs) == 1 and Path(args.inputs[0]).is_file()
+		output_file = default_output_path(args.inputs[0]) if single_file else DEFAULT_BATCH_OUTPUT
+
+	graph = build_link_graph(html_files, args.jobs)
+	links = [link for page_links in graph.values() for link in page_links]
+
+	line_count = write_links(output_file, links, args.append)
+	print(f"Extracted {len(set(links))} unique links from {len(html_files)} files")
+	print(f"Wrote {line_count} links to {output_file}")
+
+	if args.graph_file:
+		write_link_graph(args.graph_file, graph)
+		print(f"Wrote link graph ({len(links)} edges) to {args.graph_file}")
+	if len(html_files) > 1 and args.top > 0:
+		link_counts, host_counts = count_referencing_pages(graph)
+		print("Most referenced links (pages linking):")
+		for link, count in link_counts.most_common(args.top):
+			print(f"  {count:5d}  {link}")
+		print("Most referenced hosts (pages linking):")
+		for host, count in host_counts.most_common(args.top):
+			print(f"  {count:5d}  {host}")
 
 
 if __name__ == "__main__":
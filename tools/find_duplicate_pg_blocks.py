@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+
+"""
+Cluster duplicate and near-duplicate PG code blocks in textbook HTML.
+
+Each <pre> block is normalized before fingerprinting:
+- Perl comments are stripped, whitespace outside string literals is
+  collapsed per line, and blank lines are dropped. Quoted strings (including
+  ones spanning lines) and heredoc bodies are kept verbatim.
+- Text blocks such as BEGIN_PGML ... END_PGML are kept verbatim apart from
+  trailing whitespace, because '#' starts a PGML heading there and blank
+  lines and indentation carry meaning.
+
+Blocks with the same normalized text form an exact-duplicate cluster. The
+renderer lint only needs to render one representative per exact cluster.
+Near-duplicate clusters additionally canonicalize variable names ($a, @list,
+%hash become $v1, @v2, ...) and join blocks whose token-shingle Jaccard
+similarity reaches the threshold.
+"""
+
+# Standard Library
+import os
+import re
+import csv
+import sys
+import hashlib
+import argparse
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import extract_textbook_pre_blocks
+
+TEXT_BLOCK_START_RE = re.compile(r"^\s*BEGIN_(?:PGML\w*|TEXT|SOLUTION|HINT)\b")
+TEXT_BLOCK_END_RE = re.compile(r"^\s*END_(?:PGML\w*|TEXT|SOLUTION|HINT)\b")
+# <<EOF, <<"EOF", <<'EOF' and <<~EOF; the body ends at a line holding only the tag
+HEREDOC_RE = re.compile(r"<<~?(?:\"(\w+)\"|'(\w+)'|([A-Za-z_]\w*))")
+VARIABLE_RE = re.compile(r"([$@%])\{?([A-Za-z_]\w*)\}?")
+CODE_TOKEN_RE = re.compile(r"[$@%]v\d+|\w+|[^\w\s]")
+SHINGLE_TOKENS = 5
+FINGERPRINT_CHARS = 12
+
+
+#============================================
+
+
+def parse_args() -> argparse.Namespace:
+	"""
+	Parse command-line arguments.
+	"""
+	parser = argparse.ArgumentParser(
+		description="Cluster duplicate and near-duplicate PG blocks from textbook HTML.",
+	)
+	parser.add_argument(
+		"-d",
+		"--directory",
+		dest="input_dir",
+		default="Textbook",
+		help="Directory to scan for .html files (default: Textbook).",
+	)
+	parser.add_argument(
+		"-o",
+		"--output",
+		dest="output_file",
+		default=os.path.join("output", "pg_block_clusters.csv"),
+		help="Output CSV path (default: output/pg_block_clusters.csv).",
+	)
+	parser.add_argument(
+		"-m",
+		"--min-similarity",
+		dest="min_similarity",
+		type=float,
+		default=0.8,
+		help="Shingle Jaccard similarity for near-duplicates (default: 0.8).",
+	)
+	args = parser.parse_args()
+	return args
+
+
+#============================================
+
+
+def split_perl_line(
+	line: str,
+	quote_char: str = "",
+) -> tuple[list[tuple[bool, str]], str, list[str]]:
+	"""
+	Split a Perl line into (is_string, text) segments, dropping a trailing '#' comment.
+
+	quote_char is the quote left open by the previous line ("" when none).
+	Returns the segments, the quote still open at the end of the line, and the
+	tags of heredocs started on it. A backslash escapes the next character
+	inside quotes, so "\\" closes its string.
+	"""
+	segments: list[tuple[bool, str]] = []
+	heredoc_tags: list[str] = []
+	start = 0
+	escaped = False
+	for index, char in enumerate(line):
+		if quote_char:
+			if escaped:
+				escaped = False
+			elif char == "\\":
+				escaped = True
+			elif char == quote_char:
+				segments.append((True, line[start:index + 1]))
+				start = index + 1
+				quote_char = ""
+		elif char in ("'", '"'):
+			segments.append((False, line[start:index]))
+			start = index
+			quote_char = char
+		elif char == "#" and line[index - 1:index] != "$":
+			segments.append((False, line[start:index]))
+			start = len(line)
+			break
+		elif char == "<":
+			heredoc_match = HEREDOC_RE.match(line, index)
+			if heredoc_match:
+				heredoc_tags.append(next(tag for tag in heredoc_match.groups() if tag))
+	segments.append((bool(quote_char), line[start:]))
+	segments = [segment for segment in segments if segment[1]]
+	return segments, quote_char, heredoc_tags
+
+
+#============================================
+
+
+def strip_perl_comment(line: str) -> str:
+	"""
+	Remove a trailing Perl '#' comment, ignoring '#' inside quotes and '$#'.
+	"""
+	segments, _quote_char, _heredoc_tags = split_perl_line(line)
+	stripped = "".join(text for _is_string, text in segments)
+	return stripped
+
+
+#============================================
+
+
+def normalize_code_line(line: str, quote_char: str) -> tuple[str, str, list[str]]:
+	"""
+	Strip the comment and collapse whitespace outside strings in one Perl line.
+
+	Returns the normalized line, the quote still open at its end, and the tags
+	of heredocs started on it.
+	"""
+	segments, end_quote, heredoc_tags = split_perl_line(line, quote_char)
+	parts = []
+	for is_string, text in segments:
+		parts.append(text if is_string else re.sub(r"\s+", " ", text))
+	normalized = "".join(parts)
+	# Whitespace at either end is code layout unless a string reaches that end
+	if not quote_char:
+		normalized = normalized.lstrip()
+	if not end_quote:
+		normalized = normalized.rstrip()
+	return normalized, end_quote, heredoc_tags
+
+
+#============================================
+
+
+def normalize_pg_block(text: str) -> str:
+	"""
+	Strip Perl comments and collapse whitespace outside strings.
+
+	Text-block lines lose only trailing whitespace; multi-line strings and
+	heredoc bodies are kept verbatim.
+	"""
+	normalized_lines: list[str] = []
+	in_text_block = False
+	quote_char = ""
+	heredoc_tags: list[str] = []
+	for line in text.splitlines():
+		if heredoc_tags:
+			normalized_lines.append(line)
+			if line.strip() == heredoc_tags[0]:
+				heredoc_tags.pop(0)
+			continue
+		if in_text_block:
+			if TEXT_BLOCK_END_RE.match(line):
+				in_text_block = False
+			# Blank lines and indentation are meaningful in PGML; only trailing space is dropped
+			normalized_lines.append(line.rstrip())
+			continue
+		if not quote_char and TEXT_BLOCK_START_RE.match(line):
+			in_text_block = True
+			normalized_lines.append(" ".join(line.split()))
+			continue
+		in_string = bool(quote_char)
+		normalized, quote_char, line_tags = normalize_code_line(line, quote_char)
+		heredoc_tags.extend(line_tags)
+		# A blank line inside a multi-line string is part of the string
+		if normalized or in_string:
+			normalized_lines.append(normalized)
+	normalized = "\n".join(normalized_lines)
+	return normalized
+
+
+#============================================
+
+
+def canonicalize_variables(normalized_text: str) -> str:
+	"""
+	Rename variables to $v1, @v2, ... in order of first appearance.
+	"""
+	names: dict[str, str] = {}
+
+	def replace_variable(match: re.Match) -> str:
+		sigil = match.group(1)
+		name = match.group(2)
+		if name not in names:
+			names[name] = f"v{len(names) + 1}"
+		renamed = sigil + names[name]
+		return renamed
+
+	canonical_text = VARIABLE_RE.sub(replace_variable, normalized_text)
+	return canonical_text
+
+
+#============================================
+
+
+def fingerprint_text(text: str) -> str:
+	"""
+	Return a short SHA-1 fingerprint of normalized text.
+	"""
+	digest = hashlib.sha1(text.encode("utf-8"), usedforsecurity=False).hexdigest()
+	fingerprint = digest[:FINGERPRINT_CHARS]
+	return fingerprint
+
+
+#============================================
+
+
+def fingerprint_pg_block(text: str) -> str:
+	"""
+	Return the exact-duplicate fingerprint of a PG block.
+	"""
+	fingerprint = fingerprint_text(normalize_pg_block(text))
+	return fingerprint
+
+
+#============================================
+
+
+def make_token_shingles(canonical_text: str) -> set[tuple[str, ...]]:
+	"""
+	Return the set of token shingles for canonical PG text.
+	"""
+	tokens = CODE_TOKEN_RE.findall(canonical_text)
+	if len(tokens) < SHINGLE_TOKENS:
+		return {tuple(tokens)} if tokens else set()
+	shingles: set[tuple[str, ...]] = set()
+	for index in range(len(tokens) - SHINGLE_TOKENS + 1):
+		shingles.add(tuple(tokens[index:index + SHINGLE_TOKENS]))
+	return shingles
+
+
+#============================================
+
+
+def find_root(parents: list[int], index: int) -> int:
+	"""
+	Find the union-find root of index, compressing the path.
+	"""
+	root = index
+	while parents[root] != root:
+		root = parents[root]
+	while parents[index] != root:
+		parents[index], index = root, parents[index]
+	return root
+
+
+#============================================
+
+
+def cluster_blocks(blocks: list[dict], min_similarity: float) -> list[dict]:
+	"""
+	Add exact and near-duplicate cluster ids to each block dict.
+
+	Adds keys: fingerprint, exact_cluster, exact_size, near_cluster, near_size.
+	"""
+	# Exact clusters: identical normalized text
+	exact_members: dict[str, list[int]] = {}
+	canonical_by_fingerprint: dict[str, str] = {}
+	for index, block in enumerate(blocks):
+		normalized = normalize_pg_block(block["text"])
+		fingerprint = fingerprint_text(normalized)
+		block["fingerprint"] = fingerprint
+		exact_members.setdefault(fingerprint, []).append(index)
+		canonical_by_fingerprint[fingerprint] = canonicalize_variables(normalized)
+
+	# Near clusters: union exact-cluster representatives that are similar enough
+	fingerprints = list(exact_members)
+	positions = {fingerprint: position for position, fingerprint in enumerate(fingerprints)}
+	shingle_sets = [make_token_shingles(canonical_by_fingerprint[fp]) for fp in fingerprints]
+	parents = list(range(len(fingerprints)))
+	for left in range(len(fingerprints)):
+		for right in range(left + 1, len(fingerprints)):
+			left_set = shingle_sets[left]
+			right_set = shingle_sets[right]
+			small_size, large_size = sorted((len(left_set), len(right_set)))
+			# Jaccard can never exceed the size ratio, so skip before intersecting
+			if large_size == 0 or small_size / large_size < min_similarity:
+				continue
+			shared = len(left_set & right_set)
+			similarity = shared / (small_size + large_size - shared)
+			if similarity >= min_similarity:
+				parents[find_root(parents, right)] = find_root(parents, left)
+
+	# Number clusters in block order so ids are stable across runs
+	exact_ids: dict[str, int] = {}
+	near_ids: dict[int, int] = {}
+	near_sizes: dict[int, int] = {}
+	for position, fingerprint in enumerate(fingerprints):
+		root = find_root(parents, position)
+		near_sizes[root] = near_sizes.get(root, 0) + len(exact_members[fingerprint])
+	for block in blocks:
+		fingerprint = block["fingerprint"]
+		if fingerprint not in exact_ids:
+			exact_ids[fingerprint] = len(exact_ids) + 1
+		root = find_root(parents, positions[fingerprint])
+		if root not in near_ids:
+			near_ids[root] = len(near_ids) + 1
+		block["exact_cluster"] = exact_ids[fingerprint]
+		block["exact_size"] = len(exact_members[fingerprint])
+		block["near_cluster"] = near_ids[root]
+		block["near_size"] = near_sizes[root]
+	return blocks
+
+
+#============================================
+
+
+def write_cluster_csv(blocks: list[dict], output_file: str) -> None:
+	"""
+	Write one CSV row per block with its cluster assignments.
+	"""
+	output_dir = os.path.dirname(output_file)
+	if output_dir:
+		os.makedirs(output_dir, exist_ok=True)
+	fieldnames = [
+		"rel_path",
+		"block_index",
+		"line",
+		"full_problem",
+		"fingerprint",
+		"exact_cluster",
+		"exact_size",
+		"near_cluster",
+		"near_size",
+	]
+	ordered = sorted(
+		blocks,
+		key=lambda b: (b["near_cluster"], b["exact_cluster"], b["rel_path"], b["block_index"]),
+	)
+	with open(output_file, "w", encoding="utf-8", newline="") as handle:
+		writer = csv.DictWriter(handle, fieldnames=fieldnames, extrasaction="ignore")
+		writer.writeheader()
+		for block in ordered:
+			writer.writerow(block)
+
+
+#============================================
+
+
+def print_cluster_summary(blocks: list[dict]) -> None:
+	"""
+	Print counts and the largest duplicate clusters.
+	"""
+	exact_count = len({block["exact_cluster"] for block in blocks})
+	near_count = len({block["near_cluster"] for block in blocks})
+	print(f"Blocks: {len(blocks)}")
+	print(f"Exact-duplicate clusters: {exact_count}")
+	print(f"Near-duplicate clusters: {near_count}")
+
+	near_groups: dict[int, list[dict]] = {}
+	for block in blocks:
+		near_groups.setdefault(block["near_cluster"], []).append(block)
+	repeated = [group for group in near_groups.values() if len(group) > 1]
+	repeated.sort(key=lambda group: (-len(group), group[0]["near_cluster"]))
+	for group in repeated[:10]:
+		print(f"  Cluster {group[0]['near_cluster']} ({len(group)} blocks):")
+		for block in group:
+			marker = "=" if block["exact_size"] > 1 else "~"
+			print(f"    {marker} {block['rel_path']}:{block['line']} (block {block['block_index']})")
+
+
+#============================================
+
+
+def main() -> None:
+	"""
+	Cluster textbook <pre> blocks and write the report.
+	"""
+	args = parse_args()
+	blocks = extract_textbook_pre_blocks.iter_pre_blocks(args.input_dir)
+	for block in blocks:
+		block["full_problem"] = extract_textbook_pre_blocks.is_full_problem(block["text"])
+	cluster_blocks(blocks, args.min_similarity)
+	write_cluster_csv(blocks, args.output_file)
+	print_cluster_summary(blocks)
+	print(f"Cluster report written to: {args.output_file}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Find Textbook paragraphs that closely paraphrase Sources material.
+
+Every paragraph is reduced to word shingles and a MinHash signature.
+Locality-sensitive hashing (LSH) over signature bands proposes candidate
+Textbook/Sources pairs without comparing every paragraph to every other
+one; candidates are then scored by exact shingle Jaccard similarity.
+
+Output: one CSV row per near-duplicate pair with the similarity score and
+both locations (file and line), for licensing and attribution review.
+
+Usage:
+	python3 tools/find_near_duplicate_paragraphs.py
+	python3 tools/find_near_duplicate_paragraphs.py -s Sources/Insight-HTML -m 0.6
+"""
+
+# Standard Library
+import os
+import csv
+import sys
+import zlib
+import argparse
+from pathlib import Path
+
+# PIP3 modules
+import numpy
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import extract_textbook_yake_keywords
+
+SHINGLE_WORDS = 3
+# A pair with Jaccard s becomes a candidate with probability 1 - (1 - s^r)^b.
+# 42 bands of 3 rows proposes 99.6% of pairs at the default 0.5 (32x4 missed 13%)
+LSH_BANDS = 42
+LSH_ROWS = 3
+NUM_PERMUTATIONS = LSH_BANDS * LSH_ROWS
+# Mersenne prime 2^31 - 1; CRC32 shingle hashes are reduced mod p, and p < 2^31
+# keeps a*x+b (a, b, x < p) within uint64
+HASH_PRIME = (1 << 31) - 1
+PERMUTATION_SEED = 20260219
+SNIPPET_CHARS = 200
+
+
+#============================================
+
+def parse_args() -> argparse.Namespace:
+	"""Parse command-line arguments."""
+	parser = argparse.ArgumentParser(
+		description="Find near-duplicate paragraphs between Textbook and Sources via MinHash/LSH.",
+	)
+	parser.add_argument(
+		"-t",
+		"--textbook-dir",
+		dest="textbook_dir",
+		default="Textbook",
+		help="Textbook directory (default: Textbook).",
+	)
+	parser.add_argument(
+		"-s",
+		"--source-dir",
+		dest="source_dirs",
+		action="append",
+		default=[],
+		help="Source directory to compare against (repeatable, default: Sources).",
+	)
+	parser.add_argument(
+		"-o",
+		"--output",
+		dest="output_file",
+		default=os.path.join("output", "near_duplicate_paragraphs.csv"),
+		help="Output CSV path (default: output/near_duplicate_paragraphs.csv).",
+	)
+	parser.add_argument(
+		"-m",
+		"--min-similarity",
+		dest="min_similarity",
+		type=float,
+		default=0.5,
+		help="Minimum shingle Jaccard similarity to report (default: 0.5).",
+	)
+	return parser.parse_args()
+
+
+#============================================
+
+def make_shingles(text: str) -> set[int]:
+	"""Return the set of hashed word shingles for a paragraph."""
+	tokens = extract_textbook_yake_keywords.tokenize_words(text)
+	shingles: set[int] = set()
+	for index in range(len(tokens) - SHINGLE_WORDS + 1):
+		shingle_text = " ".join(tokens[index:index + SHINGLE_WORDS])
+		# CRC32 is stable across runs, unlike the salted built-in hash()
+		shingles.add(zlib.crc32(shingle_text.encode("utf-8")) % HASH_PRIME)
+	return shingles
+
+
+#============================================
+
+def make_permutations() -> tuple[numpy.ndarray, numpy.ndarray]:
+	"""Return fixed (a, b) coefficients for the universal hash permutations."""
+	rng = numpy.random.default_rng(PERMUTATION_SEED)
+	coeff_a = rng.integers(1, HASH_PRIME, size=NUM_PERMUTATIONS, dtype=numpy.uint64)
+	coeff_b = rng.integers(0, HASH_PRIME, size=NUM_PERMUTATIONS, dtype=numpy.uint64)
+	return coeff_a, coeff_b
+
+
+#============================================
+
+def minhash_signature(
+	shingles: set[int],
+	coeff_a: numpy.ndarray,
+	coeff_b: numpy.ndarray,
+) -> numpy.ndarray:
+	"""Compute the MinHash signature of a shingle set."""
+	values = numpy.fromiter(shingles, dtype=numpy.uint64, count=len(shingles))
+	# (permutations x shingles) matrix of hashed values, minimum per permutation
+	hashed = (coeff_a[:, None] * values[None, :] + coeff_b[:, None]) % HASH_PRIME
+	signature = hashed.min(axis=1)
+	return signature
+
+
+#============================================
+
+def jaccard_similarity(left: set[int], right: set[int]) -> float:
+	"""Return the exact Jaccard similarity of two shingle sets."""
+	union_size = len(left | right)
+	if union_size == 0:
+		return 0.0
+	similarity = len(left & right) / union_size
+	return similarity
+
+
+#============================================
+
+def collect_paragraph_units(input_dirs: list[str]) -> list[dict]:
+	"""Extract paragraph units with shingles from all files under input_dirs."""
+	units: list[dict] = []
+	for input_dir in input_dirs:
+		source_dir = Path(input_dir)
+		if not source_dir.is_dir():
+			raise RuntimeError(f"Input directory not found: {source_dir}")
+		for path in extract_textbook_yake_keywords.collect_source_files(source_dir):
+			blocks = extract_textbook_yake_keywords.extract_file_paragraph_blocks(path)
+			for line, text in blocks:
+				word_count = len(extract_textbook_yake_keywords.tokenize_words(text))
+				if word_count < extract_textbook_yake_keywords.MIN_REFERENCE_WORDS:
+					continue
+				shingles = make_shingles(text)
+				if not shingles:
+					continue
+				units.append({"path": str(path), "line": line, "text": text, "shingles": shingles})
+	return units
+
+
+#============================================
+
+def add_signatures(units: list[dict], coeff_a: numpy.ndarray, coeff_b: numpy.ndarray) -> None:
+	"""Attach a MinHash signature to each paragraph unit."""
+	for unit in units:
+		unit["signature"] = minhash_signature(unit["shingles"], coeff_a, coeff_b)
+
+
+#============================================
+
+def candidate_probability(similarity: float) -> float:
+	"""Return the chance that a pair with this Jaccard similarity shares an LSH bucket."""
+	return 1.0 - (1.0 - similarity ** LSH_ROWS) ** LSH_BANDS
+
+
+#============================================
+
+def band_keys(signature: numpy.ndarray) -> list[tuple[int, bytes]]:
+	"""Split a signature into LSH band bucket keys."""
+	keys: list[tuple[int, bytes]] = []
+	for band in range(LSH_BANDS):
+		rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+		keys.append((band, rows.tobytes()))
+	return keys
+
+
+#============================================
+
+def find_candidate_pairs(
+	textbook_units: list[dict],
+	source_units: list[dict],
+) -> set[tuple[int, int]]:
+	"""Return (textbook_index, source_index) pairs sharing at least one LSH bucket."""
+	buckets: dict[tuple[int, bytes], list[int]] = {}
+	for source_index, unit in enumerate(source_units):
+		for key in band_keys(unit["signature"]):
+			buckets.setdefault(key, []).append(source_index)
+
+	candidates: set[tuple[int, int]] = set()
+	for textbook_index, unit in enumerate(textbook_units):
+		for key in band_keys(unit["signature"]):
+			for source_index in buckets.get(key, []):
+				candidates.add((textbook_index, source_index))
+	return candidates
+
+
+#============================================
+
+def score_pairs(
+	textbook_units: list[dict],
+	source_units: list[dict],
+	candidates: set[tuple[int, int]],
+	min_similarity: float,
+) -> list[dict]:
+	"""Score candidate pairs and keep those at or above min_similarity."""
+	rows: list[dict] = []
+	for textbook_index, source_index in candidates:
+		textbook_unit = textbook_units[textbook_index]
+		source_unit = source_units[source_index]
+		similarity = jaccard_similarity(textbook_unit["shingles"], source_unit["shingles"])
+		if similarity < min_similarity:
+			continue
+		matching_rows = numpy.count_nonzero(textbook_unit["signature"] == source_unit["signature"])
+		rows.append(
+			{
+				"similarity": similarity,
+				"minhash_estimate": matching_rows / NUM_PERMUTATIONS,
+				"textbook_path": textbook_unit["path"],
+				"textbook_line": textbook_unit["line"],
+				"source_path": source_unit["path"],
+				"source_line": source_unit["line"],
+				"textbook_text": textbook_unit["text"][:SNIPPET_CHARS],
+				"source_text": source_unit["text"][:SNIPPET_CHARS],
+			},
+		)
+	rows.sort(
+		key=lambda row: (
+			-row["similarity"],
+			row["textbook_path"],
+			row["textbook_line"],
+			row["source_path"],
+			row["source_line"],
+		)
+	)
+	return rows
+
+
+#============================================
+
+def write_pairs_csv(output_path: Path, rows: list[dict]) -> None:
+	"""Write near-duplicate pairs to CSV."""
+	extract_textbook_yake_keywords.ensure_parent(output_path)
+	fieldnames = [
+		"similarity",
+		"minhash_estimate",
+		"textbook_path",
+		"textbook_line",
+		"source_path",
+		"source_line",
+		"textbook_text",
+		"source_text",
+	]
+	with output_path.open("w", newline="", encoding="utf-8") as handle:
+		writer = csv.DictWriter(handle, fieldnames=fieldnames, lineterminator="\n")
+		writer.writeheader()
+		for row in rows:
+			csv_row = dict(row)
+			csv_row["similarity"] = f"{row['similarity']:.4f}"
+			csv_row["minhash_estimate"] = f"{row['minhash_estimate']:.4f}"
+			writer.writerow(csv_row)
+
+
+#============================================
+
+def main() -> None:
+	"""Program entry point."""
+	args = parse_args()
+	source_dirs = args.source_dirs or ["Sources"]
+
+	textbook_units = collect_paragraph_units([args.textbook_dir])
+	source_units = collect_paragraph_units(source_dirs)
+	if not textbook_units:
+		raise RuntimeError(f"No paragraphs found in: {args.textbook_dir}")
+
+	coeff_a, coeff_b = make_permutations()
+	add_signatures(textbook_units, coeff_a, coeff_b)
+	add_signatures(source_units, coeff_a, coeff_b)
+
+	candidates = find_candidate_pairs(textbook_units, source_units)
+	rows = score_pairs(textbook_units, source_units, candidates, args.min_similarity)
+
+	output_path = Path(args.output_file)
+	write_pairs_csv(output_path, rows)
+
+	all_pairs = len(textbook_units) * len(source_units)
+	print(f"Textbook paragraphs: {len(textbook_units)}")
+	print(f"Source paragraphs: {len(source_units)}")
+	print(f"LSH candidate pairs: {len(candidates)} of {all_pairs} possible")
+	recall = candidate_probability(args.min_similarity)
+	print(f"LSH recall at similarity {args.min_similarity}: {recall:.1%}")
+	print(f"Near-duplicate pairs (>= {args.min_similarity}): {len(rows)} -> {output_path}")
+	for row in rows[:10]:
+		print(
+			f"\t{row['similarity']:.2f}  {row['textbook_path']}:{row['textbook_line']}"
+			f"  <->  {row['source_path']}:{row['source_line']}"
+		)
+
+
+if __name__ == "__main__":
+	main()
@@ -1,26 +1,42 @@
 #!/usr/bin/env python3
 
-"""Replace section/chapter number link text with titles in textbook HTML files.
+"""Rewrite cross-references in textbook HTML files.
 
-Reads the CSV mapping of pageID -> section_title from the reremix CSV and
-replaces link text that contains section/chapter numbers with the actual
-section titles. Also removes redundant parenthetical section references
-after links.
+The reremix page map (tools/page_map.py) is loaded once into an index: page
+id, section number, title slug, and relativePath each resolve to a page, and
+every page has one canonical title (TITLE_OVERRIDES win over section_title).
+
+Each file is split once into <pre> and non-<pre> segments, and one combined
+regex applies every rewrite rule to the non-<pre> segments in a single pass:
+
+  link_text: <a href="/@go/page/{id}">Section X.Y</a>  ->  canonical title
+             (also "Chapter X", bare "X.Y", and "X.Y Old title")
+  book_url:  absolute links into the book  ->  /@go/page/{id}, with the
+             link text rewritten as above
+  paren:     a redundant "(Section X.Y)" right after a link  ->  removed
+
+Files are processed in parallel. Every run, dry-run or --apply, writes a
+unified diff of the changes to output/fix_section_links.diff.
 
 Usage:
     python3 tools/fix_section_links.py            # dry-run (default)
     python3 tools/fix_section_links.py --apply     # write changes to files
+    python3 tools/fix_section_links.py -d Sources  # scan another tree
 """
 
 import argparse
-import csv
+import concurrent.futures
+import difflib
+import functools
 import glob
 import os
 import re
 import sys
 
+import page_map
+
 # ============================================================
-# PageID -> title mapping from CSV + overrides
+# Page map index from the page map + overrides
 # ============================================================
 
 # Title overrides: shorter or corrected link text for specific pages.
@@ -37,138 +53,227 @@ TITLE_OVERRIDES = {
 }
 
 
-def load_page_titles(repo_root):
-	"""Load page_id -> title mapping from the reremix CSV file."""
-	csv_path = os.path.join(
-		repo_root, "Textbook", "The_ADAPT_WeBWorK_Handbook.reremix.csv"
+def load_page_map_rows(repo_root):
+	"""Read the page map rows (page_id, section_number, section_title, url, relativePath, ...).
+
+	Rows come from the indexed page map (tools/page_map.py), which is rebuilt
+	from the reremix JSON only when that file changes.
+	"""
+	map_path = os.path.join(
+		repo_root, "Textbook", "The_ADAPT_WeBWorK_Handbook.reremix.json"
 	)
-	if not os.path.exists(csv_path):
-		print(f"ERROR: CSV not found: {csv_path}", file=sys.stderr)
+	if not os.path.exists(map_path):
+		print(f"ERROR: page map JSON not found: {map_path}", file=sys.stderr)
 		sys.exit(1)
 
-	titles = {}
-	with open(csv_path, encoding="utf-8") as f:
-		for row in csv.DictReader(f):
-			page_id = row["page_id"]
-			title = row["section_title"].replace("_", " ")
-			if title and page_id:
-				titles[page_id] = title
+	index_path = os.path.join(repo_root, "output", "page_map.sqlite")
+	connection = page_map.open_page_map(map_path, index_path)
+	rows = page_map.load_rows(connection)
+	connection.close()
+	return rows
+
+
+def title_slug(title):
+	"""Lowercase title with every run of other characters collapsed to '-'."""
+	return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+
+
+def normalize_section_number(number):
+	"""Drop zero padding per component: '2.03' -> '2.3'."""
+	return ".".join(str(int(part)) for part in number.split("."))
+
+
+def build_page_index(rows):
+	"""Index page map rows for O(1) lookup.
+
+	Returns a dict with:
+	  titles:     page_id -> canonical title
+	  by_section: section number ("2.3") -> page_id
+	  by_slug:    title slug -> page_id
+	  by_path:    relativePath -> page_id
+	  book_url:   URL of the book root page ("" when unknown)
+	"""
+	index = {"titles": {}, "by_section": {}, "by_slug": {}, "by_path": {}, "book_url": ""}
+	for row in rows:
+		page_id = row["page_id"]
+		title = row["section_title"].replace("_", " ")
+		if not page_id or not title:
+			continue
+		index["titles"][page_id] = title
+		index["by_slug"].setdefault(title_slug(title), page_id)
+		number = row["section_number"]
+		# Zero-padded numbers ("01") are front matter pages, not chapter sections
+		if number and not number.startswith("0"):
+			index["by_section"][number] = page_id
+		if row["relativePath"]:
+			index["by_path"][row["relativePath"]] = page_id
+		elif not row["parentID"]:
+			index["book_url"] = row["url"]
 
 	# Apply overrides (shorter/corrected titles for link text)
-	titles.update(TITLE_OVERRIDES)
-	return titles
+	for page_id, title in TITLE_OVERRIDES.items():
+		index["titles"][page_id] = title
+		index["by_slug"].setdefault(title_slug(title), page_id)
+	return index
+
 
+def load_page_titles(repo_root):
+	"""Load page_id -> canonical title mapping from the reremix page map."""
+	return build_page_index(load_page_map_rows(repo_root))["titles"]
+
+
+def resolve_book_path(path, index):
+	"""Resolve a path under the book URL to a page id: relativePath, then section number, then slug."""
+	if path in index["by_path"]:
+		return index["by_path"][path]
+	# Last segment looks like "2.03%3A_PG_Problem_Files"
+	leaf = path.rstrip("/").split("/")[-1].replace("%3A", ":")
+	number, _, title = leaf.partition(":")
+	if re.fullmatch(NUM_PADDED, number):
+		page_id = index["by_section"].get(normalize_section_number(number))
+		if page_id:
+			return page_id
+	return index["by_slug"].get(title_slug(title or leaf))
+
+
+# ============================================================
+# Rewrite rules
+# ============================================================
 
 # Number pattern: matches "1", "1.2", "1.23", etc.
 NUM = r"\d+(?:\.\d+)?"
+# Section numbers in book URLs may be zero padded: "2.03"
+NUM_PADDED = r"\d+(?:\.\d+)*"
 
+# Capturing group, so re.split keeps the <pre> blocks as odd-indexed segments
+PRE_BLOCK_RE = re.compile(r"(<pre[\s>].*?</pre>)", re.DOTALL | re.IGNORECASE)
 
-def strip_pre_blocks(html):
-	"""Return list of (start, end) char ranges that are inside <pre> blocks."""
-	ranges = []
-	for m in re.finditer(r"<pre[\s>].*?</pre>", html, re.DOTALL | re.IGNORECASE):
-		ranges.append((m.start(), m.end()))
-	return ranges
+SECTION_REF_RE = re.compile(r"(?:Section|Chapter)\s+" + NUM + r"$", re.IGNORECASE)
+BARE_NUMBER_RE = re.compile(NUM + r"$")
+NUMBER_PLUS_TITLE_RE = re.compile(NUM + r"\s+")
 
+# Anchor with /@go/page/{id} href and text starting with Section/Chapter/number
+LINK_TEXT_RULE = (
+	r'(?P<link_open><a\s+href="/@go/page/(?P<link_id>\d+)"[^>]*>)'
+	r"(?P<link_text>(?:Section|Chapter)\s+" + NUM + r"|" + NUM + r"(?:\s+\S.*?)?)"
+	r"</a>"
+)
 
-def in_pre_block(pos, pre_ranges):
-	"""Check whether character position pos falls inside any <pre> block."""
-	for start, end in pre_ranges:
-		if start <= pos < end:
-			return True
-	return False
+# Parenthetical ref right after a link; the lookbehind still sees a </a>
+# that the link_text rule consumed earlier in the same pass
+PAREN_RULE = r"(?<=</a>)\s*\((?:Section|Chapter)\s+" + NUM + r"\)"
 
 
-def fix_link_text(html, pre_ranges, page_titles):
-	"""Replace section/chapter number link text with titles.
+def book_url_rule(book_url):
+	"""Pattern for anchors whose href is an absolute URL under the book root."""
+	return (
+		r'<a\s+href="' + re.escape(book_url) + r'(?P<url_path>/[^"#]*)"(?P<url_attrs>[^>]*)>'
+		r"(?P<url_text>.*?)</a>"
+	)
 
-	Patterns handled:
-	  A: <a href="/@go/page/{id}">Section X.Y</a>
-	  B: <a href="/@go/page/{id}">Chapter X</a>
-	  C: <a href="/@go/page/{id}">Chapter X.Y</a>
-	  D: <a href="/@go/page/{id}">X.Y</a>  (bare number)
-	  E: <a href="/@go/page/{id}">X.Y Title</a>  (number + title)
-	"""
-	changes = []
 
-	# Combined pattern: anchor with /@go/page/{id} href and text starting with
-	# Section/Chapter/number
-	pattern = re.compile(
-		r'(<a\s+href="/@go/page/(\d+)"[^>]*>)'  # group 1=open tag, group 2=pageID
-		r"((?:Section|Chapter)\s+" + NUM + r"|" + NUM + r"(?:\s+\S.*?)?)"  # group 3=link text
-		r"(</a>)",  # group 4=close tag
-		re.IGNORECASE,
-	)
+def compile_rules(index):
+	"""Combine every rewrite rule into one alternation, one named group per rule."""
+	rules = []
+	if index["book_url"]:
+		rules.append(("book_url", book_url_rule(index["book_url"])))
+	rules.append(("link_text", LINK_TEXT_RULE))
+	rules.append(("paren", PAREN_RULE))
+	combined = "|".join(f"(?P<rule_{name}>{pattern})" for name, pattern in rules)
+	return re.compile(combined, re.IGNORECASE)
+
+
+def new_link_text(page_id, old_text, index):
+	"""Return the canonical title for a numeric link text, or None to keep old_text."""
+	title = index["titles"].get(page_id)
+	if title is None:
+		return None
+	# Skip if the link text already equals the title
+	if old_text.strip() == title:
+		return None
+	if (
+		SECTION_REF_RE.match(old_text)
+		or BARE_NUMBER_RE.match(old_text)
+		or NUMBER_PLUS_TITLE_RE.match(old_text)
+	):
+		return title
+	return None
 
-	def replacer(m):
-		if in_pre_block(m.start(), pre_ranges):
-			return m.group(0)
-		page_id = m.group(2)
-		old_text = m.group(3)
-		title = page_titles.get(page_id)
-		if title is None:
-			return m.group(0)
-		# Skip if the link text already equals the title
-		if old_text.strip() == title:
-			return m.group(0)
-		# Check: is the link text a section/chapter ref or bare number?
-		is_section_ref = re.match(
-			r"(?:Section|Chapter)\s+" + NUM + r"$", old_text, re.IGNORECASE
-		)
-		is_bare_number = re.match(NUM + r"$", old_text)
-		is_number_plus_title = re.match(NUM + r"\s+", old_text)
-		if is_section_ref or is_bare_number or is_number_plus_title:
-			changes.append((page_id, old_text, title))
-			return m.group(1) + title + m.group(4)
-		return m.group(0)
 
-	new_html = pattern.sub(replacer, html)
-	return new_html, changes
+def split_pre_segments(html):
+	"""Split html into segments outside (even index) and inside (odd index) <pre> blocks.
+
+	One regex pass over the document; rewrites then only touch even segments,
+	so code blocks are skipped without any per-match position lookups.
+	"""
+	return PRE_BLOCK_RE.split(html)
 
 
-def fix_parenthetical_refs(html, pre_ranges):
-	"""Remove redundant parenthetical section/chapter refs after links.
+def rewrite_html(html, index, rules_re=None):
+	"""Apply every rewrite rule to html in one pass per non-<pre> segment.
 
-	Patterns:
-	  </a> (Section X.Y)  ->  </a>
-	  </a> (Chapter X)    ->  </a>
-	  </a> (Chapter X.Y)  ->  </a>
+	Returns (new_html, changes); each change is a dict with rule, page_id,
+	old, and new.
 	"""
+	if rules_re is None:
+		rules_re = compile_rules(index)
 	changes = []
-	pattern = re.compile(
-		r"(</a>)\s*\((?:Section|Chapter)\s+" + NUM + r"\)",
-		re.IGNORECASE,
-	)
 
 	def replacer(m):
-		if in_pre_block(m.start(), pre_ranges):
+		if m.group("rule_link_text") is not None:
+			page_id = m.group("link_id")
+			old_text = m.group("link_text")
+			title = new_link_text(page_id, old_text, index)
+			if title is None:
+				return m.group(0)
+			changes.append({"rule": "link_text", "page_id": page_id, "old": old_text, "new": title})
+			return m.group("link_open") + title + "</a>"
+		if m.group("rule_paren") is not None:
+			changes.append({"rule": "paren", "page_id": "", "old": m.group(0).strip(), "new": ""})
+			return ""
+		page_id = resolve_book_path(m.group("url_path"), index)
+		if page_id is None:
 			return m.group(0)
-		changes.append(m.group(0))
-		return m.group(1)
+		new_href = f"/@go/page/{page_id}"
+		link_text = new_link_text(page_id, m.group("url_text"), index) or m.group("url_text")
+		changes.append(
+			{"rule": "book_url", "page_id": page_id, "old": m.group("url_path"), "new": new_href},
+		)
+		return f'<a href="{new_href}"{m.group("url_attrs")}>{link_text}</a>'
 
-	new_html = pattern.sub(replacer, html)
-	return new_html, changes
+	segments = split_pre_segments(html)
+	for i in range(0, len(segments), 2):
+		segments[i] = rules_re.sub(replacer, segments[i])
+	return "".join(segments), changes
 
 
-def process_file(filepath, page_titles, apply=False):
-	"""Process a single HTML file, return summary of changes."""
-	with open(filepath, "r", encoding="utf-8") as f:
-		original = f.read()
+# ============================================================
+# File processing
+# ============================================================
 
-	pre_ranges = strip_pre_blocks(original)
 
-	html, link_changes = fix_link_text(original, pre_ranges, page_titles)
-	# Recompute pre ranges after link text changes (positions may shift)
-	pre_ranges = strip_pre_blocks(html)
-	html, paren_changes = fix_parenthetical_refs(html, pre_ranges)
+def process_file(filepath, index, apply=False, display_path=None):
+	"""Rewrite one HTML file; return None or a dict with file, changes, and diff."""
+	with open(filepath, "r", encoding="utf-8") as f:
+		original = f.read()
 
-	if not link_changes and not paren_changes:
+	html, changes = rewrite_html(original, index)
+	if not changes:
 		return None
 
+	display_path = display_path or filepath
+	diff_text = "".join(
+		difflib.unified_diff(
+			original.splitlines(keepends=True),
+			html.splitlines(keepends=True),
+			fromfile=f"a/{display_path.lstrip(os.sep)}",
+			tofile=f"b/{display_path.lstrip(os.sep)}",
+		)
+	)
 	result = {
 		"file": filepath,
-		"link_changes": link_changes,
-		"paren_changes": paren_changes,
+		"changes": changes,
+		"diff": diff_text,
 	}
 
 	if apply and html != original:
@@ -178,56 +283,108 @@ def process_file(filepath, page_titles, apply=False):
 	return result
 
 
+def get_display_path(filepath, repo_root):
+	"""Repo-relative path for files inside the repo, else the absolute path."""
+	filepath = os.path.abspath(filepath)
+	if filepath.startswith(repo_root + os.sep):
+		return os.path.relpath(filepath, repo_root)
+	return filepath
+
+
+def process_file_for_pool(filepath, index, apply, repo_root):
+	"""Worker entry point: process_file with a repo-relative display path."""
+	return process_file(filepath, index, apply, get_display_path(filepath, repo_root))
+
+
 def main():
 	parser = argparse.ArgumentParser(
-		description="Replace section/chapter numbers with titles in link text"
+		description="Rewrite section/chapter number cross-references to page titles"
 	)
 	parser.add_argument(
 		"--apply",
 		action="store_true",
 		help="Write changes to files (default is dry-run)",
 	)
+	parser.add_argument(
+		"-d",
+		"--directory",
+		dest="input_dirs",
+		action="append",
+		default=[],
+		help="Directory to scan for .html files (repeatable, default: Textbook)",
+	)
+	parser.add_argument(
+		"-j",
+		"--jobs",
+		dest="jobs",
+		type=int,
+		default=os.cpu_count() or 1,
+		help="Parallel worker processes (default: CPU count)",
+	)
+	parser.add_argument(
+		"-o",
+		"--diff-output",
+		dest="diff_output",
+		default=os.path.join("output", "fix_section_links.diff"),
+		help="Unified diff report path (default: output/fix_section_links.diff)",
+	)
 	args = parser.parse_args()
 
 	repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-	textbook_dir = os.path.join(repo_root, "Textbook")
+	input_dirs = args.input_dirs or [os.path.join(repo_root, "Textbook")]
 
-	page_titles = load_page_titles(repo_root)
+	index = build_page_index(load_page_map_rows(repo_root))
 
-	html_files = sorted(glob.glob(os.path.join(textbook_dir, "**", "*.html"), recursive=True))
+	html_files = []
+	for input_dir in input_dirs:
+		html_files.extend(glob.glob(os.path.join(input_dir, "**", "*.html"), recursive=True))
+	html_files.sort()
 
 	if not html_files:
-		print("ERROR: No HTML files found in Textbook/", file=sys.stderr)
+		print(f"ERROR: No HTML files found in {', '.join(input_dirs)}", file=sys.stderr)
 		sys.exit(1)
 
 	mode = "APPLYING" if args.apply else "DRY-RUN"
-	print(f"=== {mode} mode === ({len(html_files)} files, {len(page_titles)} page titles)")
+	print(f"=== {mode} mode === ({len(html_files)} files, {len(index['titles'])} page titles)")
 	print()
 
-	total_link = 0
-	total_paren = 0
-
-	for filepath in html_files:
-		result = process_file(filepath, page_titles, apply=args.apply)
-		if result is None:
-			continue
-
-		rel_path = os.path.relpath(filepath, repo_root)
-		print(f"  {rel_path}:")
-
-		for page_id, old_text, new_title in result["link_changes"]:
-			print(f"    LINK: [{old_text}] -> [{new_title}] (page {page_id})")
-			total_link += 1
-
-		for old_match in result["paren_changes"]:
-			print(f"    PAREN: removed '{old_match.strip()}'")
-			total_paren += 1
-
-		print()
-
-	print(f"Total: {total_link} link text replacements, {total_paren} parenthetical removals")
+	worker = functools.partial(
+		process_file_for_pool, index=index, apply=args.apply, repo_root=repo_root,
+	)
+	if args.jobs > 1 and len(html_files) > 1:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+			results = list(executor.map(worker, html_files, chunksize=16))
+	else:
+		results = [worker(filepath) for filepath in html_files]
+
+	totals = {"link_text": 0, "book_url": 0, "paren": 0}
+	diff_dir = os.path.dirname(args.diff_output)
+	if diff_dir:
+		os.makedirs(diff_dir, exist_ok=True)
+	with open(args.diff_output, "w", encoding="utf-8") as diff_file:
+		for result in results:
+			if result is None:
+				continue
+			diff_file.write(result["diff"])
+
+			print(f"  {get_display_path(result['file'], repo_root)}:")
+			for change in result["changes"]:
+				totals[change["rule"]] += 1
+				if change["rule"] == "link_text":
+					print(f"    LINK: [{change['old']}] -> [{change['new']}] (page {change['page_id']})")
+				elif change["rule"] == "book_url":
+					print(f"    URL: [{change['old']}] -> [{change['new']}]")
+				else:
+					print(f"    PAREN: removed '{change['old']}'")
+			print()
+
+	print(
+		f"Total: {totals['link_text']} link text replacements, {totals['book_url']} book URL links,"
+		f" {totals['paren']} parenthetical removals"
+	)
+	print(f"Diff report: {args.diff_output}")
 	if not args.apply:
-		print("(dry-run — use --apply to write changes)")
+		print("(dry-run - use --apply to write changes)")
 
 
 if __name__ == "__main__":
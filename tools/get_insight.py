@@ -16,21 +16,72 @@ Input:
 Output:
 - One simplified HTML file per URL.
 - Filenames are deterministic and do not include hex hashes.
+- render_log.tsv keeps one row per URL (status, ETag, Last-Modified, content
+  hash, fetch time). URLs already saved OK are skipped unless --refresh;
+  refreshed pages are fetched conditionally and overwritten in place.
+- --crawl treats the input URLs as seeds: links on each fetched page that stay
+  under a seed's host and directory are normalized, deduplicated in
+  crawl_frontier.tsv, and fetched breadth-first up to --max-depth and
+  --max-pages. The frontier records which pages had their links expanded;
+  a page that was saved but never expanded (a seed saved without --crawl, or
+  the last level of a shallower crawl) is fetched again for its links.
 - URL order is shuffled by default.
-- Between pages: time.sleep(random.random())
+- --concurrency N browser tabs share one persistent context and pull URLs
+  from a worker queue; requests to the same host are spaced by --host-delay
+  plus a random 0-1 s jitter.
+- Static hosts (openwebwork.github.io mkdocs pages, the webwork.maa.org
+  MediaWiki) are fetched with plain HTTP and extracted with lxml; only
+  JavaScript-rendered pages such as Insight go through the browser.
+- The browser skips images, media, fonts, and third-party scripts.
 
 ASCII only. No Unicode punctuation.
 """
 
 import argparse
+import asyncio
+import hashlib
 import html
 import random
 import re
 import time
 from pathlib import Path
-from urllib.parse import parse_qsl, urlparse
-
-from playwright.sync_api import sync_playwright
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlparse, urlunparse
+
+import lxml.html
+import requests
+from playwright.async_api import async_playwright
+
+# Resource types the extractors never read; aborting them saves most of the page weight
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+# Script hosts LibreTexts pages load their content with (libraries on
+# *.libretexts.org, shared code on *.libretexts.net, the MindTouch CDN on
+# *.mtstatic.com); they are never blocked as third-party scripts
+ALLOWED_SCRIPT_HOSTS = ("libretexts.org", "libretexts.net", "mtstatic.com")
+STATIC_TIMEOUT = 30
+# render_log.tsv is the resume state: the last row per URL wins
+RENDER_LOG_COLUMNS = [
+	"url",
+	"status",
+	"output_file",
+	"title",
+	"etag",
+	"last_modified",
+	"content_sha256",
+	"fetch_seconds",
+]
+# crawl_frontier.tsv is the crawl state: the last row per URL wins
+FRONTIER_COLUMNS = ["url", "depth", "expanded"]
+# Linked files that are never HTML pages worth snapshotting
+NON_PAGE_EXTENSIONS = (
+	".pdf", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".zip", ".gz", ".tgz", ".mp4", ".css", ".js",
+)
+# Containers tried in order for mkdocs pages (same order as extract_webworkish)
+MKDOCS_BODY_XPATHS = [
+	"//article",
+	"//main",
+	"//div[contains(concat(' ', normalize-space(@class), ' '), ' md-content ')]",
+	"//div[@id='content']",
+]
 
 
 #============================================
@@ -94,6 +145,63 @@ def parse_args() -> argparse.Namespace:
 	)
 	parser.set_defaults(shuffle=True)
 
+	parser.add_argument(
+		"--no-block",
+		dest="block_resources",
+		action="store_false",
+		help="Load images, media, fonts, and third-party scripts in the browser",
+	)
+	parser.set_defaults(block_resources=True)
+
+	parser.add_argument(
+		"-r",
+		"--refresh",
+		dest="refresh",
+		action="store_true",
+		help="Re-fetch URLs already saved OK (conditional requests; unchanged pages are not rewritten)",
+	)
+
+	parser.add_argument(
+		"--crawl",
+		dest="crawl",
+		action="store_true",
+		help="Treat input URLs as seeds and follow in-scope links breadth-first",
+	)
+
+	parser.add_argument(
+		"--max-depth",
+		dest="max_depth",
+		type=int,
+		default=2,
+		help="Crawl: link depth to follow from the seeds (default: 2)",
+	)
+
+	parser.add_argument(
+		"--max-pages",
+		dest="max_pages",
+		type=int,
+		default=200,
+		help="Crawl: maximum pages to fetch in this run (default: 200)",
+	)
+
+	parser.add_argument(
+		"-c",
+		"--concurrency",
+		dest="concurrency",
+		type=int,
+		default=4,
+		help="Number of browser tabs fetching in parallel (default: 4)",
+	)
+
+	parser.add_argument(
+		"-d",
+		"--host-delay",
+		dest="host_delay",
+		type=float,
+		default=0.5,
+		help="Minimum seconds between requests to one host, plus 0-1 s jitter (default: 0.5)",
+	)
+
 	return parser.parse_args()
 
 
@@ -162,21 +270,203 @@ def make_basename(url: str) -> str:
 
 #============================================
 
-def uniquify_path(path: Path) -> Path:
-	"""If path exists, append _2, _3, ... (no hashes)."""
-	if not path.exists():
-		return path
+def normalize_url(url: str) -> str:
+	"""
+	Canonical form of an http(s) URL for deduplication, or "" for other schemes.
+
+	Drops the fragment, lowercases scheme and host, and sorts the query the
+	same way make_basename does, so equivalent links collapse to one entry.
+	"""
+	url, _ = urldefrag(url.strip())
+	parsed = urlparse(url)
+	scheme = parsed.scheme.lower()
+	if scheme not in ("http", "https"):
+		return ""
+	query_items = parse_qsl(parsed.query, keep_blank_values=True)
+	query_items.sort()
+	return urlunparse(
+		(scheme, parsed.netloc.lower(), parsed.path or "/", "", urlencode(query_items), ""),
+	)
+
+
+#============================================
+
+def crawl_scopes(seeds: list[str]) -> set[tuple[str, str]]:
+	"""Return (host, directory prefix) pairs; a link is in scope under any of them."""
+	scopes: set[tuple[str, str]] = set()
+	for seed in seeds:
+		parsed = urlparse(normalize_url(seed))
+		prefix = parsed.path[:parsed.path.rfind("/") + 1]
+		scopes.add((parsed.netloc, prefix))
+	return scopes
+
+
+#============================================
 
-	stem = path.stem
-	suffix = path.suffix
-	parent = path.parent
+def is_in_scope(url: str, scopes: set[tuple[str, str]]) -> bool:
+	"""True when a normalized url sits under one of the crawl scopes and looks like a page."""
+	parsed = urlparse(url)
+	if parsed.path.lower().endswith(NON_PAGE_EXTENSIONS):
+		return False
+	for host, prefix in scopes:
+		if parsed.netloc == host and parsed.path.startswith(prefix):
+			return True
+	return False
+
+
+#============================================
+
+def load_frontier(frontier_path: Path) -> dict[str, dict]:
+	"""
+	Read crawl_frontier.tsv into normalized url -> {"depth", "expanded"}.
+
+	Older two-column frontiers load with every page unexpanded.
+	"""
+	frontier: dict[str, dict] = {}
+	if not frontier_path.exists():
+		return frontier
+	for line in frontier_path.read_text(encoding="utf-8").splitlines()[1:]:
+		if not line.strip():
+			continue
+		values = line.split("\t")
+		expanded = len(values) > 2 and values[2] == "1"
+		frontier[values[0]] = {"depth": int(values[1]), "expanded": expanded}
+	return frontier
+
+
+#============================================
 
+def format_frontier_line(url: str, entry: dict) -> str:
+	"""Format one frontier row as a TSV line."""
+	return f"{url}\t{entry['depth']}\t{int(entry['expanded'])}\n"
+
+
+#============================================
+
+def write_frontier(frontier_path: Path, frontier: dict[str, dict]) -> None:
+	"""Rewrite crawl_frontier.tsv with the current header and one row per URL."""
+	partial_path = frontier_path.with_name(frontier_path.name + ".partial")
+	with partial_path.open("w", encoding="utf-8") as f:
+		f.write("\t".join(FRONTIER_COLUMNS) + "\n")
+		for url, entry in frontier.items():
+			f.write(format_frontier_line(url, entry))
+	partial_path.replace(frontier_path)
+
+
+#============================================
+
+def append_frontier_row(frontier_path: Path, url: str, entry: dict) -> None:
+	"""Append one frontier row, writing the header first for a new file."""
+	if not frontier_path.exists():
+		frontier_path.write_text("\t".join(FRONTIER_COLUMNS) + "\n", encoding="utf-8")
+	with frontier_path.open("a", encoding="utf-8") as f:
+		f.write(format_frontier_line(url, entry))
+
+
+#============================================
+
+def add_to_frontier(
+	frontier: dict[str, dict],
+	frontier_path: Path,
+	url: str,
+	depth: int,
+	scopes: set[tuple[str, str]],
+) -> bool:
+	"""Record a newly discovered in-scope URL; return False when it is out of scope or seen."""
+	url = normalize_url(url)
+	if not url or url in frontier or not is_in_scope(url, scopes):
+		return False
+	frontier[url] = {"depth": depth, "expanded": False}
+	append_frontier_row(frontier_path, url, frontier[url])
+	return True
+
+
+#============================================
+
+def mark_expanded(frontier: dict[str, dict], frontier_path: Path, url: str) -> None:
+	"""Record that url's links were added to the frontier."""
+	entry = frontier[url]
+	if entry["expanded"]:
+		return
+	entry["expanded"] = True
+	append_frontier_row(frontier_path, url, entry)
+
+
+#============================================
+
+def choose_output_name(url: str, state: dict[str, dict]) -> str:
+	"""
+	Return the snapshot filename for url (no hashes).
+
+	A URL keeps the file it was saved to before, so refreshes overwrite in
+	place. A new URL gets make_basename(url), with _2, _3, ... appended only
+	when another logged URL already owns that name.
+	"""
+	previous = state.get(url, {})
+	if previous.get("output_file"):
+		return previous["output_file"]
+
+	owned = {row["output_file"] for row_url, row in state.items() if row_url != url}
+	base = make_basename(url)
+	name = f"{base}.html"
 	i = 2
-	while True:
-		candidate = parent / f"{stem}_{i}{suffix}"
-		if not candidate.exists():
-			return candidate
+	while name in owned:
+		name = f"{base}_{i}.html"
 		i += 1
+	return name
+
+
+#============================================
+
+def load_render_log(log_path: Path) -> dict[str, dict]:
+	"""
+	Read render_log.tsv into url -> latest row.
+
+	Older logs with fewer columns load with the missing fields empty.
+	"""
+	state: dict[str, dict] = {}
+	if not log_path.exists():
+		return state
+	lines = log_path.read_text(encoding="utf-8").splitlines()
+	if not lines:
+		return state
+	header = lines[0].split("\t")
+	for line in lines[1:]:
+		if not line.strip():
+			continue
+		values = dict(zip(header, line.split("\t")))
+		row = {column: values.get(column, "") for column in RENDER_LOG_COLUMNS}
+		state[row["url"]] = row
+	return state
+
+
+#============================================
+
+def format_log_line(row: dict) -> str:
+	"""Format one render log row as a TSV line."""
+	values = [" ".join(str(row.get(column, "")).split()) for column in RENDER_LOG_COLUMNS]
+	return "\t".join(values) + "\n"
+
+
+#============================================
+
+def write_render_log(log_path: Path, state: dict[str, dict]) -> None:
+	"""Rewrite render_log.tsv with the current header and one row per URL."""
+	partial_path = log_path.with_name(log_path.name + ".partial")
+	with partial_path.open("w", encoding="utf-8") as f:
+		f.write("\t".join(RENDER_LOG_COLUMNS) + "\n")
+		for row in state.values():
+			f.write(format_log_line(row))
+	partial_path.replace(log_path)
+
+
+#============================================
+
+def is_fetched(row: dict | None, output_dir: Path) -> bool:
+	"""True when row records a successful fetch whose snapshot file still exists."""
+	if not row or row.get("status") != "OK" or not row.get("output_file"):
+		return False
+	return (output_dir / row["output_file"]).exists()
 
 
 #============================================
@@ -217,10 +507,181 @@ def html_template(title_text: str, source_url: str, meta_text: str, body_html: s
 
 #============================================
 
-def open_persistent_context(playwright, profile_dir: str, headed: bool):
+class HostRateLimiter:
+	"""
+	Space out requests per host instead of sleeping between every page.
+
+	Each call to wait() reserves the next free slot for the URL's host, so
+	workers hitting different hosts never wait on each other. Slots are
+	min_interval plus random.random() * jitter seconds apart, so a host never
+	sees requests at a fixed rate.
+	"""
+
+	def __init__(self, min_interval: float, jitter: float = 1.0):
+		self.min_interval = min_interval
+		self.jitter = jitter
+		self.next_slot: dict[str, float] = {}
+		self.lock = asyncio.Lock()
+
+	async def wait(self, url: str) -> None:
+		"""Sleep until this host may be requested again."""
+		host = urlparse(url).netloc.lower()
+		loop = asyncio.get_running_loop()
+		async with self.lock:
+			now = loop.time()
+			slot = max(now, self.next_slot.get(host, now))
+			self.next_slot[host] = slot + self.min_interval + random.random() * self.jitter
+		await asyncio.sleep(slot - now)
+
+
+#============================================
+
+async def run_worker_queue(
+	urls: list[str],
+	concurrency: int,
+	handle_url,
+	limiter: HostRateLimiter,
+) -> None:
+	"""
+	Run concurrency workers over a shared URL queue.
+
+	handle_url(worker_index, url) is awaited once per URL; worker_index picks
+	the worker's own browser tab.
+	"""
+	if concurrency < 1:
+		raise ValueError(f"--concurrency must be at least 1, got {concurrency}")
+
+	queue: asyncio.Queue = asyncio.Queue()
+	for url in urls:
+		queue.put_nowait(url)
+
+	async def worker(worker_index: int) -> None:
+		while not queue.empty():
+			url = queue.get_nowait()
+			await limiter.wait(url)
+			await handle_url(worker_index, url)
+
+	workers = [worker(index) for index in range(min(concurrency, len(urls)))]
+	await asyncio.gather(*workers)
+
+
+#============================================
+
+def is_static_url(url: str) -> bool:
+	"""True for hosts whose content is in the served HTML (no JavaScript rendering)."""
+	parsed = urlparse(url)
+	host = parsed.netloc.lower().split(":")[0]
+	if host.endswith("openwebwork.github.io"):
+		return True
+	if host.endswith("webwork.maa.org") and parsed.path.startswith("/wiki"):
+		return True
+	return False
+
+
+#============================================
+
+def is_third_party(request_url: str, page_url: str) -> bool:
+	"""
+	True when a script at request_url should be blocked on page_url.
+
+	Scripts on ALLOWED_SCRIPT_HOSTS (or their subdomains) and on the page's own
+	site (last two host labels) are first-party.
+	"""
+	page_host = urlparse(page_url).netloc.lower().split(":")[0]
+	if not page_host:
+		return False
+	request_host = urlparse(request_url).netloc.lower().split(":")[0]
+	for allowed_host in ALLOWED_SCRIPT_HOSTS:
+		if request_host == allowed_host or request_host.endswith("." + allowed_host):
+			return False
+	page_site = ".".join(page_host.split(".")[-2:])
+	request_site = ".".join(request_host.split(".")[-2:])
+	return request_site != page_site
+
+
+#============================================
+
+async def block_heavy_resources(route) -> None:
+	"""Playwright route handler: abort resources the extractors do not need."""
+	request = route.request
+	if request.resource_type in BLOCKED_RESOURCE_TYPES:
+		await route.abort()
+		return
+	if request.resource_type == "script" and is_third_party(request.url, request.frame.url):
+		await route.abort()
+		return
+	await route.continue_()
+
+
+#============================================
+
+def fetch_static_page(
+	session: requests.Session,
+	url: str,
+	etag: str = "",
+	last_modified: str = "",
+) -> tuple[str | None, requests.structures.CaseInsensitiveDict]:
+	"""
+	Fetch a static page with plain HTTP, conditionally when validators are given.
+
+	Returns (html_text, headers); html_text is None on 304 Not Modified.
+	"""
+	request_headers = {}
+	if etag:
+		request_headers["If-None-Match"] = etag
+	if last_modified:
+		request_headers["If-Modified-Since"] = last_modified
+	response = session.get(url, headers=request_headers, timeout=STATIC_TIMEOUT)
+	if response.status_code == 304:
+		return None, response.headers
+	response.raise_for_status()
+	return response.text, response.headers
+
+
+#============================================
+
+def extract_static_html(html_text: str, url: str) -> tuple[str, str, str] | None:
+	"""
+	Extract title and content container from served HTML with lxml.
+
+	Mirrors extract_webworkish for MediaWiki and mkdocs pages. Returns None
+	when no container matches, so the caller can fall back to the browser.
+	"""
+	root = lxml.html.document_fromstring(html_text)
+	title_text = (root.findtext(".//title") or "").strip() or "Untitled"
+	meta_text = ""
+
+	if urlparse(url).netloc.lower().endswith("webwork.maa.org"):
+		heading_nodes = root.xpath("//*[@id='firstHeading']")
+		if heading_nodes:
+			title_text = heading_nodes[0].text_content().strip()
+		body_xpaths = ["//*[@id='mw-content-text']"]
+	else:
+		body_xpaths = MKDOCS_BODY_XPATHS
+
+	for body_xpath in body_xpaths:
+		body_nodes = root.xpath(body_xpath)
+		if body_nodes:
+			body_html = lxml.html.tostring(body_nodes[0], encoding="unicode", with_tail=False)
+			return title_text, meta_text, body_html
+	return None
+
+
+#============================================
+
+def extract_static_links(html_text: str, url: str) -> list[str]:
+	"""Return absolute hrefs of every link in served HTML."""
+	root = lxml.html.document_fromstring(html_text)
+	links = [urljoin(url, href) for href in root.xpath("//a/@href")]
+	return links
+
+
+#============================================
+
+async def open_persistent_context(playwright, profile_dir: str, headed: bool):
 	"""Open a Playwright persistent context (Firefox)."""
 	profile_path = str(Path(profile_dir))
-	ctx = playwright.firefox.launch_persistent_context(
+	ctx = await playwright.firefox.launch_persistent_context(
 		user_data_dir=profile_path,
 		headless=not headed,
 	)
@@ -229,54 +690,54 @@ def open_persistent_context(playwright, profile_dir: str, headed: bool):
 
 #============================================
 
-def login_mode(ctx) -> None:
+async def login_mode(ctx) -> None:
 	"""Open a headed browser for manual checks, then exit."""
-	page = ctx.new_page()
-	page.goto("https://commons.libretexts.org/insight/welcome", wait_until="domcontentloaded")
+	page = await ctx.new_page()
+	await page.goto("https://commons.libretexts.org/insight/welcome", wait_until="domcontentloaded")
 	print("Browser opened. Complete any normal checks, then close the window.")
 	print("Return here and press Enter.")
-	input()
-	page.close()
+	await asyncio.to_thread(input)
+	await page.close()
 
 
 #============================================
 
-def extract_insight(page) -> tuple[str, str, str]:
+async def extract_insight(page) -> tuple[str, str, str]:
 	"""Extract content from LibreTexts Insight pages."""
 	title_sel = "p.text-4xl.font-semibold"
 	meta_sel = "p.text-sm.text-gray-500"
 	desc_sel = "p.max-w-6xl"
 	body_sel = "div.prose"
 
-	page.wait_for_load_state("domcontentloaded")
-	page.wait_for_selector(body_sel)
+	await page.wait_for_load_state("domcontentloaded")
+	await page.wait_for_selector(body_sel)
 
-	title_text = (page.eval_on_selector(title_sel, "el => el.textContent || ''") or "").strip()
+	title_text = (await page.eval_on_selector(title_sel, "el => el.textContent || ''") or "").strip()
 	if not title_text:
-		title_text = (page.title() or "").strip() or "Untitled"
+		title_text = (await page.title() or "").strip() or "Untitled"
 
 	meta_text = ""
-	meta_nodes = page.query_selector_all(meta_sel)
+	meta_nodes = await page.query_selector_all(meta_sel)
 	if meta_nodes:
-		meta_text = (meta_nodes[0].text_content() or "").strip()
+		meta_text = (await meta_nodes[0].text_content() or "").strip()
 
 	body_html = ""
-	desc_nodes = page.query_selector_all(desc_sel)
+	desc_nodes = await page.query_selector_all(desc_sel)
 	if desc_nodes:
-		body_html += desc_nodes[0].evaluate("el => el.outerHTML") + "\n"
+		body_html += await desc_nodes[0].evaluate("el => el.outerHTML") + "\n"
 
-	body_nodes = page.query_selector_all(body_sel)
-	body_html += body_nodes[0].evaluate("el => el.outerHTML")
+	body_nodes = await page.query_selector_all(body_sel)
+	body_html += await body_nodes[0].evaluate("el => el.outerHTML")
 
 	return title_text, meta_text, body_html
 
 
 #============================================
 
-def first_existing_selector(page, selectors: list[str]) -> str:
+async def first_existing_selector(page, selectors: list[str]) -> str:
 	"""Return the first selector that matches at least one element."""
 	for sel in selectors:
-		node = page.query_selector(sel)
+		node = await page.query_selector(sel)
 		if node:
 			return sel
 	return ""
@@ -284,7 +745,7 @@ def first_existing_selector(page, selectors: list[str]) -> str:
 
 #============================================
 
-def extract_webworkish(page, url: str) -> tuple[str, str, str]:
+async def extract_webworkish(page, url: str) -> tuple[str, str, str]:
 	"""
 	Extract content for common WeBWorK-related sites.
 
@@ -295,28 +756,30 @@ def extract_webworkish(page, url: str) -> tuple[str, str, str]:
 	parsed = urlparse(url)
 	host = parsed.netloc.lower()
 
-	page.wait_for_load_state("domcontentloaded")
+	await page.wait_for_load_state("domcontentloaded")
 
-	title_text = (page.title() or "").strip() or "Untitled"
+	title_text = (await page.title() or "").strip() or "Untitled"
 	meta_text = ""
 
 	if host.endswith("webwork.maa.org"):
 		title_sel = "#firstHeading"
 		body_sel = "#mw-content-text"
-		if page.query_selector(title_sel):
-			title_text = (page.eval_on_selector(title_sel, "el => el.textContent || ''") or "").strip()
-		if page.query_selector(body_sel):
-			body_html = page.eval_on_selector(body_sel, "el => el.outerHTML")
+		if await page.query_selector(title_sel):
+			title_text = (await page.eval_on_selector(title_sel, "el => el.textContent || ''") or "").strip()
+		if await page.query_selector(body_sel):
+			body_html = await page.eval_on_selector(body_sel, "el => el.outerHTML")
 			return title_text, meta_text, body_html
 
 	if host.endswith("openwebwork.github.io"):
-		body_sel = first_existing_selector(page, ["article", "main", "div.md-content", "div#content"])
+		body_sel = await first_existing_selector(
+			page, ["article", "main", "div.md-content", "div#content"],
+		)
 		if body_sel:
-			body_html = page.eval_on_selector(body_sel, "el => el.outerHTML")
+			body_html = await page.eval_on_selector(body_sel, "el => el.outerHTML")
 			return title_text, meta_text, body_html
 
 	if "webwork2" in parsed.path:
-		body_sel = first_existing_selector(
+		body_sel = await first_existing_selector(
 			page,
 			[
 				"#problemMainForm",
@@ -326,25 +789,258 @@ def extract_webworkish(page, url: str) -> tuple[str, str, str]:
 			],
 		)
 		if body_sel:
-			body_html = page.eval_on_selector(body_sel, "el => el.outerHTML")
+			body_html = await page.eval_on_selector(body_sel, "el => el.outerHTML")
 			return title_text, meta_text, body_html
 
-	body_sel = first_existing_selector(page, ["main", "article", "body"])
+	body_sel = await first_existing_selector(page, ["main", "article", "body"])
 	if body_sel:
-		body_html = page.eval_on_selector(body_sel, "el => el.outerHTML")
+		body_html = await page.eval_on_selector(body_sel, "el => el.outerHTML")
 		return title_text, meta_text, body_html
 
-	body_html = page.evaluate("() => document.body ? document.body.innerHTML : ''")
+	body_html = await page.evaluate("() => document.body ? document.body.innerHTML : ''")
 	return title_text, meta_text, body_html
 
 
 #============================================
 
-def extract_page(page, url: str) -> tuple[str, str, str]:
+async def extract_page(page, url: str) -> tuple[str, str, str]:
 	"""Dispatch extraction based on URL."""
 	if "commons.libretexts.org" in url and "/insight/" in url:
-		return extract_insight(page)
-	return extract_webworkish(page, url)
+		return await extract_insight(page)
+	return await extract_webworkish(page, url)
+
+
+#============================================
+
+async def fetch_url(
+	page,
+	session: requests.Session,
+	url: str,
+	previous: dict,
+	collect_links: bool = False,
+) -> dict:
+	"""
+	Fetch and extract url: plain HTTP for static hosts, else the browser tab.
+
+	Returns a dict with extracted (None when the server answered 304), etag,
+	last_modified, and links (absolute hrefs, only when collect_links).
+	"""
+	if is_static_url(url):
+		html_text, headers = await asyncio.to_thread(
+			fetch_static_page, session, url, previous.get("etag", ""), previous.get("last_modified", ""),
+		)
+		result = {
+			"etag": headers.get("ETag", ""),
+			"last_modified": headers.get("Last-Modified", ""),
+			"links": [],
+		}
+		if html_text is None:
+			result["extracted"] = None
+			return result
+		result["extracted"] = extract_static_html(html_text, url)
+		if result["extracted"] is not None:
+			if collect_links:
+				result["links"] = extract_static_links(html_text, url)
+			return result
+
+	response = await page.goto(url, wait_until="domcontentloaded")
+	headers = response.headers if response else {}
+	result = {
+		"extracted": await extract_page(page, url),
+		"etag": headers.get("etag", ""),
+		"last_modified": headers.get("last-modified", ""),
+		"links": [],
+	}
+	if collect_links:
+		result["links"] = await page.eval_on_selector_all("a[href]", "els => els.map(el => el.href)")
+	return result
+
+
+#============================================
+
+async def snapshot_url(
+	page,
+	session: requests.Session,
+	url: str,
+	output_dir: Path,
+	log_path: Path,
+	state: dict[str, dict],
+	collect_links: bool = False,
+	conditional: bool = True,
+) -> list[str] | None:
+	"""
+	Fetch one URL, save it in place if its content changed, and log the result.
+
+	Returns the page's links when collect_links, or None when none were read
+	(failure or 304). conditional=False skips the validators, so the server
+	always sends the page and its links.
+	"""
+	previous = state.get(url, {})
+	# Validators are only worth sending when the saved snapshot is still there
+	if not is_fetched(previous, output_dir):
+		previous = {"output_file": previous.get("output_file", "")}
+	validators = previous if conditional else {}
+	start_time = time.perf_counter()
+	links: list[str] | None = None
+	try:
+		result = await fetch_url(page, session, url, validators, collect_links)
+		if collect_links and result["extracted"] is not None:
+			links = result["links"]
+		# No await between claiming the name and writing, so tabs cannot claim the same file
+		out_name = choose_output_name(url, state)
+		row = {
+			"url": url,
+			"status": "OK",
+			"output_file": out_name,
+			"etag": result["etag"] or previous.get("etag", ""),
+			"last_modified": result["last_modified"] or previous.get("last_modified", ""),
+		}
+		if result["extracted"] is None:
+			row["title"] = previous.get("title", "")
+			row["content_sha256"] = previous.get("content_sha256", "")
+			print(f"Not modified {url}")
+		else:
+			title_text, meta_text, body_html = result["extracted"]
+			final_html = html_template(title_text, url, meta_text, body_html)
+			row["title"] = title_text
+			row["content_sha256"] = hashlib.sha256(final_html.encode("utf-8")).hexdigest()
+			if row["content_sha256"] == previous.get("content_sha256"):
+				print(f"Unchanged {url}")
+			else:
+				(output_dir / out_name).write_text(final_html, encoding="utf-8")
+				print(f"Saved {url} -> {out_name}")
+	except Exception as exc:
+		row = {
+			"url": url,
+			"status": "FAIL",
+			"output_file": choose_output_name(url, state),
+			"title": f"{type(exc).__name__}: {exc}",
+		}
+		print(f"Failed {url} -> {row['title']}")
+	row["fetch_seconds"] = f"{time.perf_counter() - start_time:.2f}"
+
+	state[url] = row
+	with log_path.open("a", encoding="utf-8") as f:
+		f.write(format_log_line(row))
+	return links
+
+
+#============================================
+
+async def crawl_frontier(
+	frontier: dict[str, dict],
+	frontier_path: Path,
+	scopes: set[tuple[str, str]],
+	max_depth: int,
+	max_pages: int,
+	is_pending,
+	fetch_links,
+	concurrency: int,
+	limiter: HostRateLimiter,
+) -> int:
+	"""
+	Fetch the frontier breadth-first, one depth level per worker queue run.
+
+	fetch_links(worker_index, url, need_links) fetches a page and returns its
+	links, or None when none were read; need_links asks for an unconditional
+	fetch. is_pending(url) says whether a frontier URL still needs fetching,
+	so a resumed crawl continues where the last one stopped. A page above
+	max_depth whose links were never expanded is fetched again even when
+	saved, so seeds saved earlier and a deeper re-crawl still find new pages.
+	Returns pages fetched.
+	"""
+	fetched = 0
+	for depth in range(max_depth + 1):
+		need_expanding = {
+			url for url, entry in frontier.items()
+			if entry["depth"] == depth and depth < max_depth and not entry["expanded"]
+		}
+		level = [
+			url for url, entry in frontier.items()
+			if entry["depth"] == depth and (url in need_expanding or is_pending(url))
+		]
+		level = level[:max_pages - fetched]
+		if not level:
+			continue
+		fetched += len(level)
+		print(f"Crawl depth {depth}: {len(level)} pages")
+
+		async def handle_url(worker_index: int, url: str) -> None:
+			links = await fetch_links(worker_index, url, url in need_expanding)
+			if links is None or depth >= max_depth:
+				return
+			for link in links:
+				add_to_frontier(frontier, frontier_path, link, depth + 1, scopes)
+			mark_expanded(frontier, frontier_path, url)
+
+		await run_worker_queue(level, concurrency, handle_url, limiter)
+		if fetched >= max_pages:
+			break
+	return fetched
+
+
+#============================================
+
+async def render_urls(
+	args: argparse.Namespace,
+	urls: list[str],
+	output_dir: Path,
+	log_path: Path,
+	state: dict[str, dict],
+) -> None:
+	"""Open the browser context and snapshot urls with args.concurrency tabs."""
+	async with async_playwright() as p:
+		ctx = await open_persistent_context(p, args.profile_dir, args.headed or args.login)
+
+		if args.login:
+			await login_mode(ctx)
+			await ctx.close()
+			return
+
+		if args.block_resources:
+			await ctx.route("**/*", block_heavy_resources)
+
+		# A crawl does not know its page count up front, so it opens every tab
+		tab_count = args.concurrency if args.crawl else min(args.concurrency, len(urls))
+		pages = []
+		sessions = []
+		for _ in range(tab_count):
+			pages.append(await ctx.new_page())
+			sessions.append(requests.Session())
+
+		async def fetch_links(worker_index: int, url: str, need_links: bool = False) -> list[str] | None:
+			return await snapshot_url(
+				pages[worker_index], sessions[worker_index], url, output_dir, log_path, state,
+				args.crawl, not need_links,
+			)
+
+		limiter = HostRateLimiter(args.host_delay)
+		if args.crawl:
+			frontier_path = output_dir / "crawl_frontier.tsv"
+			frontier = load_frontier(frontier_path)
+			# Compact to one row per URL under the current header, as for the render log
+			if frontier:
+				write_frontier(frontier_path, frontier)
+			scopes = crawl_scopes(urls)
+			for seed in urls:
+				add_to_frontier(frontier, frontier_path, seed, 0, scopes)
+
+			def is_pending(url: str) -> bool:
+				return args.refresh or not is_fetched(state.get(url), output_dir)
+
+			fetched = await crawl_frontier(
+				frontier, frontier_path, scopes, args.max_depth, args.max_pages,
+				is_pending, fetch_links, args.concurrency, limiter,
+			)
+			print(f"Crawl fetched {fetched} pages; frontier holds {len(frontier)} URLs")
+		else:
+			await run_worker_queue(urls, args.concurrency, fetch_links, limiter)
+
+		for page in pages:
+			await page.close()
+		for session in sessions:
+			session.close()
+		await ctx.close()
 
 
 #============================================
@@ -360,48 +1056,23 @@ def main() -> None:
 	if not urls:
 		raise ValueError("No URLs found in input file.")
 
-	if args.shuffle:
-		random.shuffle(urls)
-
+	# Compact the log to one row per URL under the current header before appending
 	log_path = output_dir / "render_log.tsv"
-	if not log_path.exists():
-		log_path.write_text("url\tstatus\toutput_file\ttitle\n", encoding="utf-8")
-
-	with sync_playwright() as p:
-		ctx = open_persistent_context(p, args.profile_dir, args.headed or args.login)
-
-		if args.login:
-			login_mode(ctx)
-			ctx.close()
+	state = load_render_log(log_path)
+	write_render_log(log_path, state)
+
+	if not args.refresh and not args.login and not args.crawl:
+		pending = [url for url in urls if not is_fetched(state.get(url), output_dir)]
+		if len(pending) < len(urls):
+			print(f"Skipping {len(urls) - len(pending)} URLs already saved (use --refresh to re-fetch)")
+		urls = pending
+		if not urls:
 			return
 
-		page = ctx.new_page()
-
-		for url in urls:
-			base = make_basename(url)
-			out_path = uniquify_path(output_dir / f"{base}.html")
-
-			try:
-				page.goto(url, wait_until="domcontentloaded")
-				title_text, meta_text, body_html = extract_page(page, url)
-				final_html = html_template(title_text, url, meta_text, body_html)
-				out_path.write_text(final_html, encoding="utf-8")
-				status = "OK"
-				title_log = title_text
-				print(f"Saved {url} -> {out_path.name}")
-			except Exception as exc:
-				status = "FAIL"
-				title_log = f"{type(exc).__name__}: {exc}"
-				print(f"Failed {url} -> {title_log}")
-
-			line = url + "\t" + status + "\t" + out_path.name + "\t" + title_log.replace("\t", " ") + "\n"
-			with log_path.open("a", encoding="utf-8") as f:
-				f.write(line)
-
-			time.sleep(random.random())
-
-		page.close()
-		ctx.close()
+	if args.shuffle:
+		random.shuffle(urls)
+
+	asyncio.run(render_urls(args, urls, output_dir, log_path, state))
 
 
 if __name__ == "__main__":
@@ -9,6 +9,17 @@ from pathlib import Path
 
 SECTION_PREFIX_RE = re.compile(r"^\s*(\d+(?:\.\d+)*)\s*:\s*(.+?)\s*$")
 
+# Streaming JSON reader
+CHUNK_SIZE = 1 << 16
+WHITESPACE_RE = re.compile(r"[ \t\r\n]*")
+STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+# Everything a number could still consume, so a split number is not cut short
+NUMBER_CHARS_RE = re.compile(r"[-+.\deE]+")
+JSON_LITERALS = {"true": True, "false": False, "null": None}
+# Node data keys the CSV needs; everything else under data is skipped
+DATA_FIELDS = {"id", "parentID", "url", "relativePath", "padded"}
+
 
 def parse_args() -> argparse.Namespace:
 	"""
@@ -53,41 +64,213 @@ def parse_section_label(title: str) -> tuple[str, str]:
 #============================================
 
 
-def walk_node(node: object, rows: list[dict[str, str]], parent_title: str = "") -> None:
+def iter_json_events(handle, chunk_size: int = CHUNK_SIZE):
 	"""
-	Walk a RemixTree node recursively and append mapping rows.
+	Yield (event, value) pairs from a JSON text stream, reading chunk_size at a time.
+
+	Events: start_map, end_map, start_array, end_array, key, value. Memory is
+	bounded by the chunk size plus the longest single token. Expects
+	well-formed JSON (commas and colons are skipped, not validated).
 	"""
-	if not isinstance(node, dict):
-		return
+	buffer = ""
+	pos = 0
+	eof = False
+	containers: list[str] = []
+	expect_key = False
+
+	while True:
+		# Keep at least one chunk of lookahead so most tokens are complete
+		if not eof and len(buffer) - pos < chunk_size:
+			chunk = handle.read(chunk_size)
+			eof = not chunk
+			buffer = buffer[pos:] + chunk
+			pos = 0
+		pos = WHITESPACE_RE.match(buffer, pos).end()
+		if pos >= len(buffer):
+			if eof:
+				break
+			continue
+
+		char = buffer[pos]
+		if char in "{[":
+			containers.append("map" if char == "{" else "array")
+			expect_key = char == "{"
+			pos += 1
+			yield ("start_map" if char == "{" else "start_array"), None
+		elif char in "}]":
+			containers.pop()
+			pos += 1
+			yield ("end_map" if char == "}" else "end_array"), None
+		elif char == ",":
+			expect_key = containers[-1] == "map"
+			pos += 1
+		elif char == ":":
+			pos += 1
+		else:
+			if char in "tfn":
+				literal = next((word for word in JSON_LITERALS if buffer.startswith(word, pos)), None)
+				if literal is not None:
+					pos += len(literal)
+					yield "value", JSON_LITERALS[literal]
+					continue
+			match = (STRING_RE if char == '"' else NUMBER_CHARS_RE).match(buffer, pos)
+			# A token running into the end of the buffer may continue in the next chunk
+			if (match is None or match.end() == len(buffer)) and not eof:
+				chunk = handle.read(chunk_size)
+				eof = not chunk
+				buffer = buffer[pos:] + chunk
+				pos = 0
+				continue
+			if match is not None and char != '"' and not NUMBER_RE.fullmatch(match.group(0)):
+				match = None
+			if match is None:
+				raise ValueError(f"Unexpected JSON text near: {buffer[pos:pos + 40]!r}")
+			text = match.group(0)
+			pos = match.end()
+			if char != '"':
+				value = float(text) if any(mark in text for mark in ".eE") else int(text)
+			elif "\\" in text:
+				value = json.loads(text)
+			else:
+				# Plain strings need no unescaping
+				value = text[1:-1]
+			if char == '"' and expect_key:
+				expect_key = False
+				yield "key", value
+			else:
+				yield "value", value
+
+	if containers:
+		raise ValueError("Truncated JSON: unclosed object or array at end of input")
+
+
+#============================================
+
 
-	title = (node.get("title") or "").strip()
-	data = node.get("data") if isinstance(node.get("data"), dict) else {}
+def make_row(frame: dict, parent_title: str) -> dict[str, str] | None:
+	"""
+	Build the CSV row for a finished node frame, or None if it has no title or id.
+	"""
+	title = (frame["title"] or "").strip()
+	data = frame["data"] or {}
 	page_id = data.get("id")
-	parent_id = data.get("parentID")
-	parent_id_text = str(parent_id or "")
+	if not title or page_id is None:
+		return None
+	parent_id_text = str(data.get("parentID") or "")
 	if parent_id_text == "0":
 		parent_id_text = ""
+	section_number, section_title = parse_section_label(title)
+	row = {
+		"page_id": str(page_id),
+		"section_number": section_number,
+		"section_title": section_title,
+		"label": title,
+		"url": str(data.get("url") or ""),
+		"relativePath": str(data.get("relativePath") or ""),
+		"padded": str(data.get("padded") or ""),
+		"parentID": parent_id_text,
+		"parent_title": parent_title.strip(),
+	}
+	return row
 
-	if title and (page_id is not None):
-		section_number, section_title = parse_section_label(title)
-		rows.append(
-			{
-				"page_id": str(page_id),
-				"section_number": section_number,
-				"section_title": section_title,
-				"label": title,
-				"url": str(data.get("url") or ""),
-				"relativePath": str(data.get("relativePath") or ""),
-				"padded": str(data.get("padded") or ""),
-				"parentID": parent_id_text,
-				"parent_title": parent_title.strip(),
-			},
-		)
-
-	children = node.get("children") or []
-	if isinstance(children, list):
-		for child in children:
-			walk_node(child, rows, parent_title=title)
+
+#============================================
+
+
+def iter_map_rows(handle, chunk_size: int = CHUNK_SIZE):
+	"""
+	Yield one mapping row per titled node with an id, in pre-order.
+
+	Walks the RemixTree with an explicit stack over iter_json_events, so
+	neither the JSON document nor the recursion depth grows with the tree.
+	Nodes that list title and data before children (as LibreTexts exports
+	do) are emitted as soon as their children start; a node whose children
+	come first holds its subtree's rows until the node closes.
+	"""
+
+	def new_node(parent: dict | None) -> dict:
+		# The sink is the nearest open ancestor holding back its subtree's rows
+		sink = None
+		if parent is not None:
+			sink = parent if parent["buffer"] is not None and not parent["done"] else parent["sink"]
+		return {"kind": "node", "key": None, "title": None, "data": None, "parent": parent,
+			"sink": sink, "done": False, "buffer": None, "top": False}
+
+	def route(items: list[tuple[dict, dict | None]], sink: dict | None) -> list[dict]:
+		# Rows go to the sink if there is one, else straight out
+		if sink is not None:
+			sink["buffer"].extend(items)
+			return []
+		return [row for row, _ in items]
+
+	def parent_title_of(frame: dict) -> str | None:
+		parent = frame["parent"]
+		if parent is None:
+			return ""
+		if parent["buffer"] is not None and not parent["done"]:
+			return None
+		return parent["title"] or ""
+
+	def finish(frame: dict) -> list[dict]:
+		# Emit the node's row, then any rows its subtree held back
+		if frame["done"]:
+			return []
+		frame["done"] = True
+		items = []
+		parent_title = parent_title_of(frame)
+		row = make_row(frame, parent_title or "")
+		if row is not None:
+			items.append((row, frame["parent"] if parent_title is None else None))
+		for held_row, held_parent in frame["buffer"] or []:
+			if held_parent is frame:
+				held_row["parent_title"] = (frame["title"] or "").strip()
+				held_parent = None
+			items.append((held_row, held_parent))
+		return route(items, frame["sink"])
+
+	top = new_node(None)
+	top["top"] = True
+	stack: list[dict] = [{"kind": "document", "key": None}]
+	for event, value in iter_json_events(handle, chunk_size):
+		frame = stack[-1]
+		kind = frame["kind"]
+		if event == "key":
+			frame["key"] = value
+			continue
+		if event in ("end_map", "end_array"):
+			stack.pop()
+			if kind == "node":
+				yield from finish(frame)
+			continue
+
+		key = frame["key"]
+		frame["key"] = None
+		pushed = None
+		if kind == "document" and event == "start_map":
+			pushed = top
+		elif kind == "node" and key == "RemixTree" and frame["top"] and event == "start_map":
+			# The wrapper object is not a node; the tree starts here
+			frame["kind"] = "wrapper"
+			pushed = new_node(None)
+		elif kind == "node" and key == "title" and event == "value":
+			frame["title"] = "" if value is None else str(value)
+		elif kind == "node" and key == "data" and event == "start_map":
+			frame["data"] = {}
+			pushed = {"kind": "data", "key": None, "node": frame}
+		elif kind == "node" and key == "children" and event == "start_array":
+			if frame["title"] is None or frame["data"] is None:
+				frame["buffer"] = []
+			else:
+				yield from finish(frame)
+			pushed = {"kind": "children", "key": None, "node": frame}
+		elif kind == "children" and event == "start_map":
+			pushed = new_node(frame["node"])
+		elif kind == "data" and event == "value" and key in DATA_FIELDS:
+			frame["node"]["data"][key] = value
+		if pushed is None and event in ("start_map", "start_array"):
+			pushed = {"kind": "skip", "key": None}
+		if pushed is not None:
+			stack.append(pushed)
 
 
 #============================================
@@ -105,14 +288,6 @@ def main() -> None:
 	else:
 		output_path = input_path.with_suffix(".csv")
 
-	with input_path.open("r", encoding="utf-8") as handle:
-		root = json.load(handle)
-
-	tree = root.get("RemixTree", root)
-
-	rows: list[dict[str, str]] = []
-	walk_node(tree, rows)
-
 	fieldnames = [
 		"page_id",
 		"section_number",
@@ -125,13 +300,17 @@ def main() -> None:
 		"parent_title",
 	]
 
-	with output_path.open("w", newline="", encoding="utf-8") as handle:
-		writer = csv.DictWriter(handle, fieldnames=fieldnames, lineterminator="\n")
+	# Rows are written as nodes are visited; nothing holds the whole tree
+	row_count = 0
+	with input_path.open("r", encoding="utf-8") as in_handle, \
+			output_path.open("w", newline="", encoding="utf-8") as out_handle:
+		writer = csv.DictWriter(out_handle, fieldnames=fieldnames, lineterminator="\n")
 		writer.writeheader()
-		for row in rows:
+		for row in iter_map_rows(in_handle):
 			writer.writerow(row)
+			row_count += 1
 
-	print(f"Wrote {len(rows)} rows to {output_path}")
+	print(f"Wrote {row_count} rows to {output_path}")
 
 
 if __name__ == "__main__":
@@ -242,9 +242,22 @@ def run_renderer_lint(problems: list[dict], host: str, seed: int) -> list[dict]:
 	"""
 	Render each extracted problem through the pg-renderer and record status.
 
-	Adds status and messages keys to each problem dict.
+	Problems with identical source text are rendered once; the others copy the
+	representative's result. The key is the exact text, not the normalized
+	find_duplicate_pg_blocks fingerprint, so problems differing only in
+	whitespace (PGML line breaks) or in something the normalizer misreads are
+	each rendered.
+
+	Adds status, messages and duplicate_of keys to each problem dict.
 	"""
+	representatives: dict[str, dict] = {}
 	for problem in problems:
+		representative = representatives.get(problem["text"])
+		if representative is not None:
+			problem["status"] = representative["status"]
+			problem["messages"] = representative["messages"]
+			problem["duplicate_of"] = representative["pg_file"]
+			continue
 		# read the extracted .pg file
 		with open(problem["pg_file"], "r", encoding="utf-8") as handle:
 			source_text = handle.read()
@@ -258,6 +271,9 @@ def run_renderer_lint(problems: list[dict], host: str, seed: int) -> list[dict]:
 		else:
 			problem["status"] = "pass"
 		problem["messages"] = "; ".join(messages)
+		problem["duplicate_of"] = ""
+		representatives[problem["text"]] = problem
+	print(f"Rendered {len(representatives)} unique problems for {len(problems)} extracted")
 	return problems
 
 
@@ -277,6 +293,7 @@ def write_csv_report(problems: list[dict], output_dir: str) -> str:
 		"pg_file",
 		"status",
 		"messages",
+		"duplicate_of",
 	]
 	with open(csv_path, "w", encoding="utf-8", newline="") as handle:
 		writer = csv.DictWriter(handle, fieldnames=fieldnames, extrasaction="ignore")
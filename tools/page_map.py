@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Indexed page map compiled from the LibreTexts reremix map JSON.
+
+The map JSON is streamed through libretexts_map_json_to_page_id_csv and its
+rows are stored in one SQLite file with indexes on page id, section number,
+relativePath, and title. The artifact records the size and mtime of the JSON
+it was built from and is rebuilt only when that file changes, so tools that
+need page ids, titles, or paths open it instead of re-reading the CSV.
+
+Usage:
+	python3 tools/page_map.py
+	python3 tools/page_map.py -p 488657
+	python3 tools/page_map.py -s 2.3
+	python3 tools/page_map.py -t "PG Problem Files"
+"""
+
+# Standard Library
+import os
+import sys
+import sqlite3
+import argparse
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import libretexts_map_json_to_page_id_csv
+
+REPO_ROOT = os.path.dirname(TOOLS_DIR)
+DEFAULT_MAP_PATH = os.path.join(REPO_ROOT, "Textbook", "The_ADAPT_WeBWorK_Handbook.reremix.json")
+DEFAULT_INDEX_PATH = os.path.join(REPO_ROOT, "output", "page_map.sqlite")
+# Bump when the table layout changes so old artifacts are rebuilt
+SCHEMA_VERSION = "1"
+PAGE_COLUMNS = (
+	"page_id",
+	"section_number",
+	"section_title",
+	"label",
+	"url",
+	"relativePath",
+	"padded",
+	"parentID",
+	"parent_title",
+)
+INDEX_SCHEMA = (
+	"CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT); "
+	"CREATE TABLE IF NOT EXISTS pages ("
+	"row_order INTEGER PRIMARY KEY, page_id TEXT, section_number TEXT, "
+	"section_title TEXT, label TEXT, url TEXT, relativePath TEXT, padded TEXT, "
+	"parentID TEXT, parent_title TEXT, title TEXT); "
+	"CREATE INDEX IF NOT EXISTS pages_page_id ON pages (page_id); "
+	"CREATE INDEX IF NOT EXISTS pages_section_number ON pages (section_number); "
+	"CREATE INDEX IF NOT EXISTS pages_relative_path ON pages (relativePath); "
+	"CREATE INDEX IF NOT EXISTS pages_title ON pages (title);"
+)
+# One prepared query per indexed lookup column
+LOOKUP_SQL = {
+	"page_id": "SELECT * FROM pages WHERE page_id = ? ORDER BY row_order LIMIT 1",
+	"section_number": "SELECT * FROM pages WHERE section_number = ? ORDER BY row_order LIMIT 1",
+	"relativePath": "SELECT * FROM pages WHERE relativePath = ? ORDER BY row_order LIMIT 1",
+	"title": "SELECT * FROM pages WHERE title = ? ORDER BY row_order LIMIT 1",
+}
+
+
+#============================================
+
+def parse_args() -> argparse.Namespace:
+	"""Parse command-line arguments."""
+	parser = argparse.ArgumentParser(
+		description="Build the indexed page map and look up pages in it.",
+	)
+	parser.add_argument(
+		"-i",
+		"--input",
+		dest="map_path",
+		default=DEFAULT_MAP_PATH,
+		help="LibreTexts map JSON (default: Textbook/The_ADAPT_WeBWorK_Handbook.reremix.json).",
+	)
+	parser.add_argument(
+		"-d",
+		"--database",
+		dest="index_path",
+		default=DEFAULT_INDEX_PATH,
+		help="On-disk index path (default: output/page_map.sqlite).",
+	)
+	parser.add_argument(
+		"-p",
+		"--page-id",
+		dest="page_id",
+		default="",
+		help="Print the page with this id.",
+	)
+	parser.add_argument(
+		"-s",
+		"--section",
+		dest="section_number",
+		default="",
+		help="Print the page with this section number (for example 2.3).",
+	)
+	parser.add_argument(
+		"-r",
+		"--relative-path",
+		dest="relative_path",
+		default="",
+		help="Print the page with this relativePath.",
+	)
+	parser.add_argument(
+		"-t",
+		"--title",
+		dest="title",
+		default="",
+		help="Print the page with this title (underscores and spaces are equivalent).",
+	)
+	return parser.parse_args()
+
+
+#============================================
+
+def normalize_title(title: str) -> str:
+	"""Return the lookup key for a title: underscores as spaces, case and spacing folded."""
+	key = " ".join(title.replace("_", " ").split()).lower()
+	return key
+
+
+#============================================
+
+def source_stamp(map_path: str) -> str:
+	"""Return the size and mtime of the map JSON as one comparable string."""
+	stat = os.stat(map_path)
+	stamp = f"{SCHEMA_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+	return stamp
+
+
+#============================================
+
+def rebuild_index(connection: sqlite3.Connection, map_path: str, stamp: str) -> int:
+	"""Replace the stored pages with the rows streamed from map_path."""
+	connection.execute("DELETE FROM pages")
+	insert_sql = (
+		f"INSERT INTO pages ({', '.join(PAGE_COLUMNS)}, title) "
+		f"VALUES ({', '.join('?' for _ in PAGE_COLUMNS)}, ?)"
+	)
+	row_count = 0
+	with open(map_path, encoding="utf-8") as handle:
+		for row in libretexts_map_json_to_page_id_csv.iter_map_rows(handle):
+			values = [row[column] for column in PAGE_COLUMNS]
+			values.append(normalize_title(row["section_title"]))
+			connection.execute(insert_sql, values)
+			row_count += 1
+	connection.execute(
+		"INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?), ('stamp', ?)",
+		(os.path.abspath(map_path), stamp),
+	)
+	connection.commit()
+	return row_count
+
+
+#============================================
+
+def open_page_map(
+	map_path: str = DEFAULT_MAP_PATH,
+	index_path: str = DEFAULT_INDEX_PATH,
+) -> sqlite3.Connection:
+	"""
+	Open the page map index, rebuilding it first if the map JSON changed.
+	"""
+	if not os.path.exists(map_path):
+		raise FileNotFoundError(f"Page map JSON not found: {map_path}")
+	index_dir = os.path.dirname(index_path)
+	if index_dir:
+		os.makedirs(index_dir, exist_ok=True)
+	connection = sqlite3.connect(index_path)
+	connection.row_factory = sqlite3.Row
+	connection.executescript(INDEX_SCHEMA)
+	stamp = source_stamp(map_path)
+	stored = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+	if stored.get("stamp") != stamp or stored.get("source") != os.path.abspath(map_path):
+		rebuild_index(connection, map_path, stamp)
+	return connection
+
+
+#============================================
+
+def row_to_dict(row: sqlite3.Row | None) -> dict[str, str] | None:
+	"""Convert a pages row to the same dict shape as the CSV rows."""
+	if row is None:
+		return None
+	page = {column: row[column] for column in PAGE_COLUMNS}
+	return page
+
+
+#============================================
+
+def find_one(connection: sqlite3.Connection, column: str, value: str) -> dict[str, str] | None:
+	"""Return the first page, in map order, whose indexed column equals value."""
+	row = connection.execute(LOOKUP_SQL[column], (value,)).fetchone()
+	page = row_to_dict(row)
+	return page
+
+
+#============================================
+
+def get_page(connection: sqlite3.Connection, page_id: str) -> dict[str, str] | None:
+	"""Look up a page by its LibreTexts page id."""
+	return find_one(connection, "page_id", str(page_id))
+
+
+#============================================
+
+def find_by_section(connection: sqlite3.Connection, section_number: str) -> dict[str, str] | None:
+	"""Look up a page by its section number as written in the map ("2.3")."""
+	return find_one(connection, "section_number", section_number)
+
+
+#============================================
+
+def find_by_path(connection: sqlite3.Connection, relative_path: str) -> dict[str, str] | None:
+	"""Look up a page by its relativePath under the book."""
+	return find_one(connection, "relativePath", relative_path)
+
+
+#============================================
+
+def find_by_title(connection: sqlite3.Connection, title: str) -> dict[str, str] | None:
+	"""Look up a page by title, ignoring case, spacing, and underscores."""
+	return find_one(connection, "title", normalize_title(title))
+
+
+#============================================
+
+def load_rows(connection: sqlite3.Connection) -> list[dict[str, str]]:
+	"""Return every page row in map (pre-order) order."""
+	rows = [row_to_dict(row) for row in connection.execute("SELECT * FROM pages ORDER BY row_order")]
+	return rows
+
+
+#============================================
+
+def main() -> None:
+	"""Program entry point."""
+	args = parse_args()
+	connection = open_page_map(args.map_path, args.index_path)
+	lookups = (
+		(args.page_id, get_page),
+		(args.section_number, find_by_section),
+		(args.relative_path, find_by_path),
+		(args.title, find_by_title),
+	)
+	queried = False
+	for value, lookup in lookups:
+		if not value:
+			continue
+		queried = True
+		page = lookup(connection, value)
+		if page is None:
+			print(f"{value}: not found")
+			continue
+		for column in PAGE_COLUMNS:
+			print(f"{column}: {page[column]}")
+		print()
+	if not queried:
+		page_count = connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+		print(f"Page map: {page_count} pages -> {args.index_path}")
+	connection.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Build and query a BM25 full-text index over the Sources reference corpus.
+
+Paragraphs from Sources/Insight-HTML, Sources/WebWorK-HTML and the
+Construction Guide text files are tokenized with the same tokenizer as
+extract_textbook_yake_keywords.tokenize_words and stored with their
+postings in one SQLite file. Rebuilds only re-index files whose content
+changed. Queries return ranked paragraph hits with file and line.
+
+Usage:
+	python3 tools/search_sources_index.py
+	python3 tools/search_sources_index.py -q "answer hints"
+	python3 tools/search_sources_index.py -q "custom checker" -n 5
+"""
+
+# Standard Library
+import os
+import sys
+import math
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import sqlite_file_index
+import extract_textbook_yake_keywords
+
+DEFAULT_INDEX_PATH = os.path.join("output", "sources_search_index.sqlite")
+DEFAULT_INPUT_DIRS = (
+	"Sources/Insight-HTML",
+	"Sources/WebWorK-HTML",
+	"Sources/Construction_Guide_for_LibreTexts_2e",
+)
+# Standard Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 160
+INDEX_SCHEMA = (
+	"CREATE TABLE IF NOT EXISTS files ("
+	"path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha1 TEXT); "
+	"CREATE TABLE IF NOT EXISTS paragraphs ("
+	"paragraph_id INTEGER PRIMARY KEY, path TEXT, line INTEGER, "
+	"token_count INTEGER, text TEXT); "
+	"CREATE TABLE IF NOT EXISTS postings ("
+	"token TEXT, paragraph_id INTEGER, term_frequency INTEGER); "
+	"CREATE INDEX IF NOT EXISTS paragraphs_path ON paragraphs (path); "
+	"CREATE INDEX IF NOT EXISTS postings_token ON postings (token);"
+)
+# Removes one file (the '?' path) with its paragraphs and postings
+DELETE_FILE_STATEMENTS = (
+	"DELETE FROM postings WHERE paragraph_id IN "
+	"(SELECT paragraph_id FROM paragraphs WHERE path = ?)",
+	"DELETE FROM paragraphs WHERE path = ?",
+	"DELETE FROM files WHERE path = ?",
+)
+
+
+#============================================
+
+def parse_args() -> argparse.Namespace:
+	"""Parse command-line arguments."""
+	parser = argparse.ArgumentParser(
+		description="Build or query a BM25 paragraph index over the Sources corpus.",
+	)
+	parser.add_argument(
+		"-i",
+		"--input-dir",
+		dest="input_dirs",
+		action="append",
+		default=[],
+		help="Source directory to index (repeatable, default: Insight, WeBWorK, Construction Guide).",
+	)
+	parser.add_argument(
+		"-d",
+		"--database",
+		dest="index_path",
+		default=DEFAULT_INDEX_PATH,
+		help=f"On-disk index path (default: {DEFAULT_INDEX_PATH}).",
+	)
+	parser.add_argument(
+		"-q",
+		"--query",
+		dest="query",
+		default="",
+		help="Search the existing index instead of updating it.",
+	)
+	parser.add_argument(
+		"-n",
+		"--limit",
+		dest="limit",
+		type=int,
+		default=10,
+		help="Maximum hits to print (default: 10).",
+	)
+	return parser.parse_args()
+
+
+#============================================
+
+def open_index(index_path: Path) -> sqlite3.Connection:
+	"""Open the search index database, creating tables when needed."""
+	return sqlite_file_index.open_index(index_path, INDEX_SCHEMA)
+
+
+#============================================
+
+def count_tokens(text: str) -> dict[str, int]:
+	"""Return token -> term frequency for one paragraph."""
+	counts: dict[str, int] = {}
+	for token in extract_textbook_yake_keywords.tokenize_words(text):
+		counts[token] = counts.get(token, 0) + 1
+	return counts
+
+
+#============================================
+
+def index_file(connection: sqlite3.Connection, path: Path, sha1: str) -> int:
+	"""Tokenize one file's paragraphs and store them with their postings."""
+	path_text = str(path)
+	sqlite_file_index.delete_file_rows(connection, path_text, DELETE_FILE_STATEMENTS)
+	blocks = extract_textbook_yake_keywords.extract_file_paragraph_blocks(path)
+	for line, text in blocks:
+		counts = count_tokens(text)
+		if not counts:
+			continue
+		cursor = connection.execute(
+			"INSERT INTO paragraphs (path, line, token_count, text) VALUES (?, ?, ?, ?)",
+			(path_text, line, sum(counts.values()), text),
+		)
+		paragraph_id = cursor.lastrowid
+		connection.executemany(
+			"INSERT INTO postings VALUES (?, ?, ?)",
+			[(token, paragraph_id, count) for token, count in counts.items()],
+		)
+	stat = path.stat()
+	connection.execute(
+		"INSERT INTO files VALUES (?, ?, ?, ?)",
+		(path_text, stat.st_size, stat.st_mtime_ns, sha1),
+	)
+	return len(blocks)
+
+
+#============================================
+
+def update_index(connection: sqlite3.Connection, input_dirs: list[str]) -> tuple[int, int, int]:
+	"""
+	Re-index new and changed files, and drop files that no longer exist.
+
+	Returns (changed_files, unchanged_files, removed_files).
+	"""
+	stored = sqlite_file_index.load_file_stamps(connection)
+	seen_paths: set[str] = set()
+	changed_count = 0
+	unchanged_count = 0
+	for input_dir in input_dirs:
+		source_dir = Path(input_dir)
+		if not source_dir.is_dir():
+			raise RuntimeError(f"Input directory not found: {source_dir}")
+		for path in extract_textbook_yake_keywords.collect_source_files(source_dir):
+			path_text = str(path)
+			seen_paths.add(path_text)
+			status, stat, sha1 = sqlite_file_index.check_file(path, stored.get(path_text))
+			if status == sqlite_file_index.TOUCHED:
+				connection.execute(
+					"UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+					(stat.st_size, stat.st_mtime_ns, path_text),
+				)
+			if status != sqlite_file_index.CHANGED:
+				unchanged_count += 1
+				continue
+			index_file(connection, path, sha1)
+			changed_count += 1
+
+	removed_count = sqlite_file_index.remove_missing_files(
+		connection, stored, seen_paths, DELETE_FILE_STATEMENTS,
+	)
+	connection.commit()
+	return changed_count, unchanged_count, removed_count
+
+
+#============================================
+
+def bm25_idf(doc_frequency: int, total_docs: int) -> float:
+	"""Return the non-negative BM25 inverse document frequency."""
+	idf = math.log(1 + (total_docs - doc_frequency + 0.5) / (doc_frequency + 0.5))
+	return idf
+
+
+#============================================
+
+def search_index(connection: sqlite3.Connection, query: str, limit: int) -> list[dict]:
+	"""Return the top BM25 paragraph hits for a query."""
+	query_tokens = sorted(set(extract_textbook_yake_keywords.tokenize_words(query)))
+	if not query_tokens:
+		return []
+	total_docs, avg_length = connection.execute(
+		"SELECT COUNT(*), AVG(token_count) FROM paragraphs"
+	).fetchone()
+	if not total_docs:
+		return []
+
+	scores: dict[int, float] = {}
+	for token in query_tokens:
+		rows = connection.execute(
+			"SELECT postings.paragraph_id, postings.term_frequency, paragraphs.token_count "
+			"FROM postings JOIN paragraphs ON paragraphs.paragraph_id = postings.paragraph_id "
+			"WHERE postings.token = ?",
+			(token,),
+		).fetchall()
+		if not rows:
+			continue
+		idf = bm25_idf(len(rows), total_docs)
+		for paragraph_id, term_frequency, token_count in rows:
+			# Length-normalized term frequency saturation
+			norm = BM25_K1 * (1 - BM25_B + BM25_B * token_count / avg_length)
+			weight = idf * term_frequency * (BM25_K1 + 1) / (term_frequency + norm)
+			scores[paragraph_id] = scores.get(paragraph_id, 0.0) + weight
+
+	ranked_ids = sorted(scores, key=lambda pid: (-scores[pid], pid))[:limit]
+	hits: list[dict] = []
+	for paragraph_id in ranked_ids:
+		path_text, line, text = connection.execute(
+			"SELECT path, line, text FROM paragraphs WHERE paragraph_id = ?",
+			(paragraph_id,),
+		).fetchone()
+		hits.append(
+			{
+				"score": scores[paragraph_id],
+				"path": path_text,
+				"line": line,
+				"text": text,
+			},
+		)
+	return hits
+
+
+#============================================
+
+def format_hit(hit: dict) -> str:
+	"""Format one search hit as path:line, score and a short snippet."""
+	snippet = hit["text"]
+	if len(snippet) > SNIPPET_CHARS:
+		snippet = snippet[:SNIPPET_CHARS].rstrip() + " ..."
+	hit_text = f"{hit['path']}:{hit['line']}  [{hit['score']:.2f}]\n\t{snippet}"
+	return hit_text
+
+
+#============================================
+
+def main() -> None:
+	"""Program entry point."""
+	args = parse_args()
+	index_path = Path(args.index_path)
+
+	if args.query:
+		if not index_path.exists():
+			raise RuntimeError(f"Index not found, build it first: {index_path}")
+		connection = open_index(index_path)
+		start_time = time.perf_counter()
+		hits = search_index(connection, args.query, args.limit)
+		elapsed_ms = (time.perf_counter() - start_time) * 1000
+		connection.close()
+		for hit in hits:
+			print(format_hit(hit))
+		print(f"{len(hits)} hits in {elapsed_ms:.1f} ms")
+		return
+
+	input_dirs = args.input_dirs or list(DEFAULT_INPUT_DIRS)
+	connection = open_index(index_path)
+	start_time = time.perf_counter()
+	changed_count, unchanged_count, removed_count = update_index(connection, input_dirs)
+	elapsed = time.perf_counter() - start_time
+	paragraph_count = connection.execute("SELECT COUNT(*) FROM paragraphs").fetchone()[0]
+	connection.close()
+
+	print(f"Files re-indexed: {changed_count}")
+	print(f"Files unchanged: {unchanged_count}")
+	print(f"Files removed: {removed_count}")
+	print(f"Indexed paragraphs: {paragraph_count} -> {index_path} ({elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+	main()
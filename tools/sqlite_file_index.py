@@ -0,0 +1,109 @@
+"""
+Shared incremental-update helpers for the SQLite corpus indexes.
+
+build_yake_book_index.py and search_sources_index.py both keep a files
+table (path, size, mtime_ns, sha1) next to their own per-paragraph tables
+and re-index only files whose content changed. This module holds the parts
+they share: opening the database, the stat-then-hash change check, and
+deleting a file's rows.
+"""
+
+# Standard Library
+import os
+import sys
+import sqlite3
+import hashlib
+from pathlib import Path
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import extract_textbook_yake_keywords
+
+# check_file() results
+UNCHANGED = "unchanged"
+TOUCHED = "touched"
+CHANGED = "changed"
+
+
+#============================================
+
+def open_index(index_path: Path, schema: str) -> sqlite3.Connection:
+	"""Open the index database, creating tables from schema when needed."""
+	extract_textbook_yake_keywords.ensure_parent(index_path)
+	connection = sqlite3.connect(str(index_path))
+	connection.executescript(schema)
+	return connection
+
+
+#============================================
+
+def file_sha1(path: Path) -> str:
+	"""Return the SHA-1 hex digest of a file."""
+	digest = hashlib.sha1(path.read_bytes(), usedforsecurity=False).hexdigest()
+	return digest
+
+
+#============================================
+
+def load_file_stamps(connection: sqlite3.Connection) -> dict[str, tuple[int, int, str]]:
+	"""Return path -> (size, mtime_ns, sha1) for every indexed file."""
+	stored: dict[str, tuple[int, int, str]] = {}
+	for path_text, size, mtime_ns, sha1 in connection.execute(
+		"SELECT path, size, mtime_ns, sha1 FROM files"
+	):
+		stored[path_text] = (size, mtime_ns, sha1)
+	return stored
+
+
+#============================================
+
+def check_file(
+	path: Path,
+	previous: tuple[int, int, str] | None,
+) -> tuple[str, os.stat_result, str]:
+	"""
+	Compare a file against its stored stamp.
+
+	Returns (status, stat, sha1). status is UNCHANGED when size and mtime
+	match, TOUCHED when they differ but the content hash matches, and
+	CHANGED for new or edited files.
+	"""
+	stat = path.stat()
+	# Cheap stat check first, then a content hash for touched files
+	if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+		return UNCHANGED, stat, previous[2]
+	sha1 = file_sha1(path)
+	if previous is not None and previous[2] == sha1:
+		return TOUCHED, stat, sha1
+	return CHANGED, stat, sha1
+
+
+#============================================
+
+def delete_file_rows(
+	connection: sqlite3.Connection,
+	path_text: str,
+	delete_statements: tuple[str, ...],
+) -> None:
+	"""Run each DELETE statement (one '?' for the path) to remove one file's rows."""
+	for statement in delete_statements:
+		connection.execute(statement, (path_text,))
+
+
+#============================================
+
+def remove_missing_files(
+	connection: sqlite3.Connection,
+	stored: dict[str, tuple[int, int, str]],
+	seen_paths: set[str],
+	delete_statements: tuple[str, ...],
+) -> int:
+	"""Delete rows for stored files not seen in this scan; return how many were removed."""
+	removed_paths = sorted(set(stored) - seen_paths)
+	for path_text in removed_paths:
+		delete_file_rows(connection, path_text, delete_statements)
+	return len(removed_paths)
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Export the textbook to several formats in one run from one shared page model.
+
+Pages are discovered, ordered, and read once (textbook_pages.load_pages).
+The PDF, Markdown, plain text, and EPUB backends all work from that model
+and share the Pygments highlight memo and its on-disk cache. Each backend
+parses its own tree per page (the PDF backend in its render workers), so no
+tree is shared between the backend threads. Backends run concurrently (PDF
+on its process pool, Markdown in pandoc), so exporting every format takes
+about as long as the slowest one.
+
+Usage:
+	python3 tools/textbook_export.py
+	python3 tools/textbook_export.py -f text -f epub
+	python3 tools/textbook_export.py -f pdf -s -j 4
+"""
+
+# Standard Library
+import os
+import sys
+import html
+import time
+import uuid
+import pathlib
+import zipfile
+import argparse
+import multiprocessing
+import concurrent.futures
+
+# PIP3 modules
+import lxml.etree
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import textbook_pages
+import textbook_html_to_pdf
+import textbook_html_to_markdown
+
+EXPORT_FORMATS = ("pdf", "markdown", "text", "epub")
+DEFAULT_OUTPUT_DIR = pathlib.Path("output") / "textbook_export"
+DEFAULT_BUILD_DIR = pathlib.Path("output") / "textbook_export_build"
+# Outermost block elements become paragraphs in the plain text export
+TEXT_BLOCK_TAGS = {
+	"h1", "h2", "h3", "h4", "h5", "h6",
+	"p", "li", "pre", "tr", "caption", "dt", "dd", "blockquote",
+}
+# Links that still work outside the book; everything else is dropped in the EPUB
+EXTERNAL_LINK_PREFIXES = ("http://", "https://", "mailto:", "#")
+EPUB_CONTAINER_XML = (
+	'<?xml version="1.0" encoding="utf-8"?>\n'
+	'<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">\n'
+	'<rootfiles><rootfile full-path="OEBPS/content.opf" '
+	'media-type="application/oebps-package+xml"/></rootfiles>\n'
+	'</container>\n'
+)
+
+
+#============================================
+def parse_args() -> argparse.Namespace:
+	"""Parse command line arguments."""
+	parser = argparse.ArgumentParser(
+		description="Export the textbook to PDF, Markdown, plain text, and EPUB in one run.",
+	)
+	parser.add_argument(
+		"-f", "--format", dest="formats", action="append", choices=EXPORT_FORMATS, default=[],
+		help="Output format; repeatable. Default: all formats",
+	)
+	parser.add_argument(
+		"-o", "--output-dir", dest="output_dir", type=str, default="",
+		help=f"Directory for exported files. Default: <repo>/{DEFAULT_OUTPUT_DIR}",
+	)
+	parser.add_argument(
+		"-n", "--name", dest="book_name", type=str, default="",
+		help="Base filename for exported files. Default: <cwd_name>",
+	)
+	parser.add_argument(
+		"-j", "--jobs", dest="jobs", type=int, default=os.cpu_count() or 1,
+		help="Parallel PDF page renders and pandoc threads. Default: CPU count",
+	)
+	parser.add_argument(
+		"-s", "--single-document", dest="single_document", action="store_true",
+		help="Build the PDF as one WeasyPrint document (no cpdf needed).",
+	)
+	args = parser.parse_args()
+	return args
+
+
+#============================================
+def tree_to_text(root: lxml.etree._Element) -> str:
+	"""Flatten a parsed page into plain text paragraphs, keeping code indentation."""
+	blocks = []
+	for element in root.iter():
+		if not isinstance(element.tag, str) or element.tag not in TEXT_BLOCK_TAGS:
+			continue
+		if any(ancestor.tag in TEXT_BLOCK_TAGS for ancestor in element.iterancestors()):
+			continue
+		if element.tag == "pre":
+			block_text = textbook_pages.extract_pre_code_text(element).strip("\n")
+		elif element.tag == "tr":
+			cells = []
+			for cell in element:
+				if cell.tag in ("td", "th"):
+					cells.append(" ".join(cell.text_content().split()))
+			block_text = " | ".join(cells)
+		else:
+			block_text = " ".join(element.text_content().split())
+			if element.tag == "li":
+				block_text = f"- {block_text}"
+		if block_text:
+			blocks.append(block_text)
+	text = "\n\n".join(blocks)
+	return text
+
+
+#============================================
+def export_text(pages: list[dict], context: dict) -> pathlib.Path:
+	"""Write the book as one plain text file with chapter and page headings."""
+	output_path = context["output_dir"] / f"{context['book_name']}.txt"
+	current_chapter = None
+	with output_path.open("w", encoding="utf-8") as handle:
+		for page in pages:
+			if page["chapter_name"] != current_chapter:
+				current_chapter = page["chapter_name"]
+				chapter_heading = page["chapter_title"]
+				handle.write(f"{chapter_heading}\n{'=' * len(chapter_heading)}\n\n")
+			page_text = tree_to_text(textbook_pages.parse_page_tree(page))
+			handle.write(f"{page['title']}\n{'-' * len(page['title'])}\n\n{page_text}\n\n")
+	return output_path
+
+
+#============================================
+def page_to_xhtml(page: dict, stylesheet_href: str, highlight_cache_dir: pathlib.Path) -> str:
+	"""Serialize one page as a standalone XHTML document with highlighted code."""
+	# A parse of its own: the text backend may be reading the same page in another thread
+	root = textbook_pages.parse_page_tree(page)
+	for pre_element in list(root.iter("pre")):
+		textbook_pages.highlight_pre_element(pre_element, highlight_cache_dir)
+	for anchor in root.iter("a"):
+		href_value = anchor.get("href")
+		if href_value is not None and not href_value.lower().startswith(EXTERNAL_LINK_PREFIXES):
+			del anchor.attrib["href"]
+
+	body_parts = []
+	body = root.find("body")
+	if body is not None:
+		body_parts.append(html.escape(body.text or "", quote=False))
+		for child in body:
+			body_parts.append(lxml.etree.tostring(child, encoding="unicode", method="xml"))
+	title = html.escape(page["title"])
+	xhtml_text = (
+		'<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n'
+		'<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">\n'
+		f'<head><title>{title}</title><link rel="stylesheet" href="{stylesheet_href}"/></head>\n'
+		f'<body><h1>{title}</h1>\n{"".join(body_parts)}</body>\n</html>\n'
+	)
+	return xhtml_text
+
+
+#============================================
+def build_epub_nav(pages: list[dict], book_title: str) -> str:
+	"""Build the EPUB 3 navigation document grouped by chapter."""
+	lines = [
+		'<?xml version="1.0" encoding="utf-8"?>',
+		"<!DOCTYPE html>",
+		'<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops">',
+		f"<head><title>{html.escape(book_title)}</title></head>",
+		'<body><nav epub:type="toc" id="toc"><h1>Contents</h1><ol>',
+	]
+	current_chapter = None
+	for page in pages:
+		if page["chapter_name"] != current_chapter:
+			if current_chapter is not None:
+				lines.append("</ol></li>")
+			current_chapter = page["chapter_name"]
+			first_href = f"pages/{page['anchor_id']}.xhtml"
+			lines.append(f'<li><a href="{first_href}">{html.escape(page["chapter_title"])}</a><ol>')
+		page_href = f"pages/{page['anchor_id']}.xhtml"
+		lines.append(f'<li><a href="{page_href}">{html.escape(page["title"])}</a></li>')
+	if current_chapter is not None:
+		lines.append("</ol></li>")
+	lines.append("</ol></nav></body></html>")
+	nav_text = "\n".join(lines) + "\n"
+	return nav_text
+
+
+#============================================
+def build_epub_package(pages: list[dict], book_title: str) -> str:
+	"""Build the EPUB 3 package document (metadata, manifest, spine)."""
+	# Identifier is derived from page content, so an unchanged book keeps its id
+	content_digest = "".join(page["sha256"] for page in pages)
+	book_id = uuid.uuid5(uuid.NAMESPACE_URL, content_digest)
+	modified = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+	manifest_items = [
+		'<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>',
+		'<item id="css" href="style.css" media-type="text/css"/>',
+	]
+	spine_items = []
+	for page in pages:
+		manifest_items.append(
+			f'<item id="{page["anchor_id"]}" href="pages/{page["anchor_id"]}.xhtml" '
+			'media-type="application/xhtml+xml"/>'
+		)
+		spine_items.append(f'<itemref idref="{page["anchor_id"]}"/>')
+	package_text = (
+		'<?xml version="1.0" encoding="utf-8"?>\n'
+		'<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+		'<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+		f'<dc:identifier id="book-id">urn:uuid:{book_id}</dc:identifier>\n'
+		f"<dc:title>{html.escape(book_title)}</dc:title>\n"
+		"<dc:language>en</dc:language>\n"
+		f'<meta property="dcterms:modified">{modified}</meta>\n'
+		"</metadata>\n"
+		f"<manifest>\n{chr(10).join(manifest_items)}\n</manifest>\n"
+		f'<spine>\n{chr(10).join(spine_items)}\n</spine>\n'
+		"</package>\n"
+	)
+	return package_text
+
+
+#============================================
+def export_epub(pages: list[dict], context: dict) -> pathlib.Path:
+	"""Write the book as an EPUB 3 file with one XHTML document per page."""
+	output_path = context["output_dir"] / f"{context['book_name']}.epub"
+	highlight_cache_dir = context["build_dir"] / "highlight"
+	book_title = context["book_name"].replace("_", " ")
+	with zipfile.ZipFile(output_path, "w") as epub_zip:
+		# The mimetype entry must come first and be stored uncompressed
+		epub_zip.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+		epub_zip.writestr(
+			"META-INF/container.xml", EPUB_CONTAINER_XML, compress_type=zipfile.ZIP_DEFLATED,
+		)
+		epub_zip.writestr(
+			"OEBPS/content.opf", build_epub_package(pages, book_title), compress_type=zipfile.ZIP_DEFLATED,
+		)
+		epub_zip.writestr(
+			"OEBPS/nav.xhtml", build_epub_nav(pages, book_title), compress_type=zipfile.ZIP_DEFLATED,
+		)
+		epub_zip.writestr(
+			"OEBPS/style.css", textbook_html_to_pdf.get_default_style(), compress_type=zipfile.ZIP_DEFLATED,
+		)
+		for page in pages:
+			xhtml_text = page_to_xhtml(page, "../style.css", highlight_cache_dir)
+			epub_zip.writestr(
+				f"OEBPS/pages/{page['anchor_id']}.xhtml", xhtml_text, compress_type=zipfile.ZIP_DEFLATED,
+			)
+	return output_path
+
+
+#============================================
+def export_pdf(pages: list[dict], context: dict) -> pathlib.Path:
+	"""Build the PDF through textbook_html_to_pdf from the shared page list."""
+	output_path = context["output_dir"] / f"{context['book_name']}.pdf"
+	textbook_html_to_pdf.build_book(
+		context["repo_root"],
+		output_path,
+		context["jobs"],
+		context["build_dir"],
+		single_document=context["single_document"],
+		pages=pages,
+		# Forked workers would inherit the pandoc stdin pipe from the Markdown
+		# thread and keep pandoc waiting for EOF; forkserver workers start clean
+		mp_context=multiprocessing.get_context("forkserver"),
+	)
+	return output_path
+
+
+#============================================
+def export_markdown(pages: list[dict], context: dict) -> pathlib.Path:
+	"""Build the merged Markdown through textbook_html_to_markdown from the shared page list."""
+	output_path = context["output_dir"] / f"{context['book_name']}.md"
+	textbook_html_to_markdown.build_markdown(
+		context["repo_root"],
+		output_path,
+		"batch",
+		context["jobs"],
+		context["build_dir"] / "markdown",
+		pages=pages,
+	)
+	return output_path
+
+
+EXPORTERS = {
+	"pdf": export_pdf,
+	"markdown": export_markdown,
+	"text": export_text,
+	"epub": export_epub,
+}
+
+
+#============================================
+def run_exports(
+		pages: list[dict],
+		formats: list[str],
+		context: dict,
+) -> dict[str, tuple[pathlib.Path, float]]:
+	"""Run the requested backends concurrently; return format -> (output path, seconds)."""
+	context["output_dir"].mkdir(parents=True, exist_ok=True)
+
+	def timed_export(export_format: str) -> tuple[pathlib.Path, float]:
+		start_time = time.perf_counter()
+		output_path = EXPORTERS[export_format](pages, context)
+		elapsed = time.perf_counter() - start_time
+		return output_path, elapsed
+
+	results = {}
+	with concurrent.futures.ThreadPoolExecutor(max_workers=len(formats)) as executor:
+		futures = {}
+		for export_format in formats:
+			futures[executor.submit(timed_export, export_format)] = export_format
+		for future in concurrent.futures.as_completed(futures):
+			results[futures[future]] = future.result()
+	return results
+
+
+#============================================
+def main() -> None:
+	"""Load the page model once and export every requested format."""
+	args = parse_args()
+	repo_root = textbook_html_to_pdf.get_repo_root()
+	input_root = repo_root / "Textbook"
+	if not input_root.exists():
+		raise RuntimeError(f"Input root does not exist: {input_root}")
+	formats = list(dict.fromkeys(args.formats)) or list(EXPORT_FORMATS)
+	output_dir = repo_root / DEFAULT_OUTPUT_DIR
+	if args.output_dir:
+		output_dir = pathlib.Path(args.output_dir).resolve()
+	context = {
+		"repo_root": repo_root,
+		"output_dir": output_dir,
+		"build_dir": repo_root / DEFAULT_BUILD_DIR,
+		"book_name": args.book_name or pathlib.Path.cwd().resolve().name,
+		"jobs": args.jobs,
+		"single_document": args.single_document,
+	}
+
+	start_time = time.perf_counter()
+	pages = textbook_pages.load_pages(input_root)
+	if not pages:
+		raise RuntimeError(f"No HTML files found under: {input_root}")
+	results = run_exports(pages, formats, context)
+	wall_seconds = time.perf_counter() - start_time
+
+	print(f"Pages: {len(pages)}")
+	for export_format in formats:
+		output_path, elapsed = results[export_format]
+		print(f"  {export_format:8s} {elapsed:7.2f} s  {output_path}")
+	print(f"Total wall time: {wall_seconds:.2f} s")
+
+
+if __name__ == "__main__":
+	main()
@@ -2,12 +2,39 @@
 """Convert Textbook HTML pages to a single Markdown file via pandoc."""
 
 # Standard Library
+import os
 import re
 import sys
+import time
 import shutil
+import hashlib
 import pathlib
+import typing
 import argparse
 import subprocess
+import concurrent.futures
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import textbook_pages
+
+# auto_identifiers off on both sides: pandoc dedupes heading ids across the whole
+# input, so with it on a page's Markdown would depend on the pages batched before it.
+# This applies to every mode, so serial and batch output stay identical; headings
+# no longer get generated {#id} attributes (HTML id attributes are still kept)
+PANDOC_COMMAND = ["pandoc", "-f", "html-auto_identifiers", "-t", "markdown-auto_identifiers"]
+# Plain-text page marker for batched pandoc runs; no markdown-special characters,
+# so pandoc writes it back verbatim on its own line
+PAGE_BREAK_TOKEN = "TEXTBOOKPAGEBREAK"
+PAGE_BREAK_RE = re.compile(rf"^{PAGE_BREAK_TOKEN}(\d+)[ \t]*$", re.MULTILINE)
+CONVERSION_MODES = ("batch", "threads", "serial")
+# Pages per pandoc run in batch mode
+BATCH_PAGES = 16
+DEFAULT_BUILD_DIR = pathlib.Path("output") / "textbook_markdown_build"
 
 
 #============================================
@@ -20,6 +47,25 @@ def parse_args() -> argparse.Namespace:
 		"-o", "--output", dest="output_md", type=str, default="",
 		help="Output Markdown path. Default: ./<cwd_name>.md",
 	)
+	parser.add_argument(
+		"-m", "--mode", dest="mode", choices=CONVERSION_MODES, default="batch",
+		help=(
+			"pandoc strategy: batches of pages, one run per page on a thread pool, "
+			"or one run at a time. Default: batch"
+		),
+	)
+	parser.add_argument(
+		"-j", "--jobs", dest="jobs", type=int, default=os.cpu_count() or 1,
+		help="Worker threads for --mode batch and threads. Default: CPU count",
+	)
+	parser.add_argument(
+		"-b", "--build-dir", dest="build_dir", type=str, default="",
+		help=f"Per-page Markdown cache directory. Default: <repo>/{DEFAULT_BUILD_DIR}",
+	)
+	parser.add_argument(
+		"-r", "--rebuild", dest="rebuild", action="store_true",
+		help="Ignore cached page Markdown and re-convert every page.",
+	)
 	args = parser.parse_args()
 	return args
 
@@ -48,43 +94,11 @@ def get_output_md_path(output_arg: str) -> pathlib.Path:
 	return output_md
 
 
-#============================================
-def extract_number_chunks(text: str) -> list[int]:
-	"""Extract numeric chunks from text in left-to-right order."""
-	chunks = re.findall(r"\d+", text)
-	values = []
-	for chunk in chunks:
-		values.append(int(chunk))
-	return values
-
-
-#============================================
-def html_sort_key(path: pathlib.Path) -> tuple:
-	"""Build a stable chapter/section sort key for a textbook page path."""
-	chapter_name = path.parent.name
-	filename = path.name
-	file_stem = path.stem
-	section_prefix = file_stem.split("-", 1)[0]
-	chapter_numbers = extract_number_chunks(chapter_name)
-	section_numbers = extract_number_chunks(section_prefix)
-	key = (chapter_numbers, section_numbers, filename)
-	return key
-
-
-#============================================
-def find_html_files(input_root: pathlib.Path) -> list[pathlib.Path]:
-	"""Collect and sort Textbook chapter HTML files."""
-	pattern = "*/*.html"
-	files = list(input_root.glob(pattern))
-	sorted_files = sorted(files, key=html_sort_key)
-	return sorted_files
-
-
 #============================================
 def convert_html_to_markdown(html_text: str) -> str:
 	"""Convert an HTML string to Markdown via pandoc."""
 	result = subprocess.run(
-		["pandoc", "-f", "html", "-t", "markdown"],
+		PANDOC_COMMAND,
 		input=html_text,
 		capture_output=True,
 		text=True,
@@ -93,6 +107,105 @@ def convert_html_to_markdown(html_text: str) -> str:
 	return result.stdout
 
 
+#============================================
+def get_pandoc_version() -> str:
+	"""Return the first line of `pandoc --version`."""
+	result = subprocess.run(
+		["pandoc", "--version"],
+		capture_output=True,
+		text=True,
+		check=True,
+	)
+	version_line = result.stdout.splitlines()[0] if result.stdout else ""
+	return version_line
+
+
+#============================================
+def page_cache_key(html_text: str, pandoc_version: str) -> str:
+	"""Hash what changes a page's Markdown: source HTML, pandoc version and options.
+
+	This holds only while a page converts the same in any batch, which is why
+	PANDOC_COMMAND turns off auto_identifiers; an option that lets pandoc carry
+	state across pages would make batch output unsafe to cache under this key.
+	"""
+	key_text = "\0".join((pandoc_version, " ".join(PANDOC_COMMAND), html_text))
+	cache_key = hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+	return cache_key
+
+
+#============================================
+def join_pages_for_batch(html_texts: list[str]) -> str:
+	"""Join page HTML into one document with a numbered marker paragraph between pages."""
+	parts = []
+	for index, html_text in enumerate(html_texts):
+		if index > 0:
+			parts.append(f"\n<p>{PAGE_BREAK_TOKEN}{index}</p>\n")
+		parts.append(html_text)
+	batch_html = "".join(parts)
+	return batch_html
+
+
+#============================================
+def split_batched_markdown(markdown_text: str, page_count: int) -> list[str] | None:
+	"""Split batched pandoc output on page markers; None when markers were not kept intact."""
+	pieces = PAGE_BREAK_RE.split(markdown_text)
+	# re.split alternates: text, marker number, text, marker number, ...
+	marker_numbers = [int(number) for number in pieces[1::2]]
+	if marker_numbers != list(range(1, page_count)):
+		return None
+	sections = pieces[0::2]
+	return sections
+
+
+#============================================
+def convert_pages_serial(html_texts: list[str], jobs: int) -> typing.Iterator[str]:
+	"""Convert pages one pandoc run at a time, yielding each as it finishes."""
+	for html_text in html_texts:
+		yield convert_html_to_markdown(html_text)
+
+
+#============================================
+def convert_pages_threaded(html_texts: list[str], jobs: int) -> typing.Iterator[str]:
+	"""Convert pages with concurrent pandoc runs, yielding results in page order."""
+	# pandoc does the work in its own process, so threads suffice
+	with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+		yield from executor.map(convert_html_to_markdown, html_texts)
+
+
+#============================================
+def convert_batch(html_texts: list[str]) -> list[str]:
+	"""Convert a few pages in one pandoc run and split the output back into pages."""
+	if len(html_texts) == 1:
+		return [convert_html_to_markdown(html_texts[0])]
+	batch_markdown = convert_html_to_markdown(join_pages_for_batch(html_texts))
+	markdown_texts = split_batched_markdown(batch_markdown, len(html_texts))
+	if markdown_texts is None:
+		# Unbalanced markup in a page can swallow a marker (e.g. into an open list)
+		print("Batched pandoc output lost page markers; converting pages separately")
+		markdown_texts = [convert_html_to_markdown(html_text) for html_text in html_texts]
+	return markdown_texts
+
+
+#============================================
+def convert_pages_batched(html_texts: list[str], jobs: int) -> typing.Iterator[str]:
+	"""Convert pages BATCH_PAGES at a time, one pandoc run per batch, yielding in page order."""
+	batches = [
+		html_texts[start:start + BATCH_PAGES]
+		for start in range(0, len(html_texts), BATCH_PAGES)
+	]
+	# Batches amortize pandoc startup; the pool keeps several batches running
+	with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+		for markdown_texts in executor.map(convert_batch, batches):
+			yield from markdown_texts
+
+
+CONVERTERS = {
+	"batch": convert_pages_batched,
+	"threads": convert_pages_threaded,
+	"serial": convert_pages_serial,
+}
+
+
 #============================================
 def build_section_label(source_path: pathlib.Path, input_root: pathlib.Path) -> str:
 	"""Build a section label from the relative path (without .html extension)."""
@@ -115,8 +228,19 @@ def build_table_of_contents(html_files: list[pathlib.Path], input_root: pathlib.
 
 
 #============================================
-def build_markdown(repo_root: pathlib.Path, output_md: pathlib.Path) -> pathlib.Path:
-	"""Convert all Textbook HTML files to one merged Markdown file."""
+def build_markdown(
+		repo_root: pathlib.Path,
+		output_md: pathlib.Path,
+		mode: str = "batch",
+		jobs: int = 1,
+		build_dir: pathlib.Path | None = None,
+		rebuild: bool = False,
+		pages: list[dict] | None = None,
+) -> pathlib.Path:
+	"""Convert all Textbook HTML files to one merged Markdown file.
+
+	pages is the shared textbook_pages.load_pages() model; it is loaded here when not given.
+	"""
 	input_root = repo_root / "Textbook"
 
 	if not input_root.exists():
@@ -125,28 +249,72 @@ def build_markdown(repo_root: pathlib.Path, output_md: pathlib.Path) -> pathlib.
 	if shutil.which("pandoc") is None:
 		raise RuntimeError("Required tool not found on PATH: pandoc")
 
-	html_files = find_html_files(input_root)
-	if not html_files:
-		raise RuntimeError(f"No HTML files found under: {input_root}")
-
-	sections = []
-	for index, source_html in enumerate(html_files, start=1):
-		label = build_section_label(source_html, input_root)
-		raw_html = source_html.read_text(encoding="utf-8")
-		markdown_body = convert_html_to_markdown(raw_html)
-		section = f"# {label}\n\n{markdown_body.strip()}\n"
-		sections.append(section)
-		print(f"[{index}/{len(html_files)}] converted {label}")
+	if jobs < 1:
+		raise ValueError(f"--jobs must be at least 1, got {jobs}")
 
-	toc = build_table_of_contents(html_files, input_root)
+	if pages is None:
+		pages = textbook_pages.load_pages(input_root)
+	if not pages:
+		raise RuntimeError(f"No HTML files found under: {input_root}")
+	html_files = [page["source_path"] for page in pages]
+
+	if build_dir is None:
+		build_dir = repo_root / DEFAULT_BUILD_DIR
+	cache_root = build_dir / "pages"
+	cache_root.mkdir(parents=True, exist_ok=True)
+
+	# Look up every page in the cache; only misses go to pandoc
+	pandoc_version = get_pandoc_version()
+	cache_paths = []
+	pending_indexes = []
+	pending_texts = []
+	for index, page in enumerate(pages):
+		html_text = page["html_text"]
+		cache_path = cache_root / f"{page_cache_key(html_text, pandoc_version)}.md"
+		cache_paths.append(cache_path)
+		if rebuild or not cache_path.exists():
+			pending_indexes.append(index)
+			pending_texts.append(html_text)
+	cached_count = len(html_files) - len(pending_texts)
+	print(f"Pages cached: {cached_count}, pages to convert: {len(pending_texts)}")
+
+	# Stream: TOC from the known file list first, then each section as soon as it is ready,
+	# so memory stays flat and the output can be tailed during a long export
 	separator = "\n---\n\n"
-	full_markdown = toc + separator + separator.join(sections) + "\n"
-
+	converted_count = 0
+	pending_set = set(pending_indexes)
+	start_time = time.perf_counter()
+	converted_iter = iter(CONVERTERS[mode](pending_texts, jobs) if pending_texts else [])
 	output_md.parent.mkdir(parents=True, exist_ok=True)
-	output_md.write_text(full_markdown, encoding="utf-8")
+	with output_md.open("w", encoding="utf-8") as output_handle:
+		output_handle.write(build_table_of_contents(html_files, input_root))
+		for index, source_html in enumerate(html_files):
+			cache_path = cache_paths[index]
+			if index in pending_set:
+				markdown_body = next(converted_iter)
+				# Write beside the entry and rename, so an interrupted export never leaves a truncated one
+				partial_path = cache_path.with_suffix(".partial.md")
+				partial_path.write_text(markdown_body, encoding="utf-8")
+				os.replace(partial_path, cache_path)
+				converted_count += 1
+			else:
+				markdown_body = cache_path.read_text(encoding="utf-8")
+			label = build_section_label(source_html, input_root)
+			output_handle.write(f"{separator}# {label}\n\n{markdown_body.strip()}\n")
+			output_handle.flush()
+		output_handle.write("\n")
+	wall_seconds = time.perf_counter() - start_time
+
+	# Drop cached pages no current page points at (and partial writes)
+	current_paths = set(cache_paths)
+	for cached_path in cache_root.glob("*.md"):
+		if cached_path not in current_paths:
+			cached_path.unlink()
 
 	print(f"Markdown file: {output_md}")
-	print(f"Sections converted: {len(sections)}")
+	print(f"Sections written: {len(html_files)} ({converted_count} converted)")
+	if converted_count:
+		print(f"pandoc wall time: {wall_seconds:.2f} s ({mode} mode)")
 	return output_md
 
 
@@ -156,7 +324,10 @@ def main() -> None:
 	args = parse_args()
 	repo_root = get_repo_root()
 	output_md = get_output_md_path(args.output_md)
-	build_markdown(repo_root, output_md)
+	build_dir = None
+	if args.build_dir:
+		build_dir = pathlib.Path(args.build_dir).resolve()
+	build_markdown(repo_root, output_md, args.mode, args.jobs, build_dir, args.rebuild)
 
 
 if __name__ == "__main__":
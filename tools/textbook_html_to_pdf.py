@@ -2,30 +2,36 @@
 """Render Textbook HTML pages to PDFs and merge them into one PDF."""
 
 # Standard Library
-import sys
+import os
 import re
+import sys
 import html
+import time
 import shutil
+import hashlib
 import pathlib
-import tempfile
+import fnmatch
 import argparse
 import subprocess
 import urllib.parse
+import multiprocessing
+import concurrent.futures
 
 # PIP3 modules
+import lxml.html
 import weasyprint
+import weasyprint.text.fonts
 import pygments
-import pygments.lexers
-import pygments.formatters
+
+# Ensure sibling tools are importable
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+if TOOLS_DIR not in sys.path:
+	sys.path.insert(0, TOOLS_DIR)
+
+# local repo modules (sibling scripts under tools/)
+import textbook_pages
 
 
-ANCHOR_TAG_RE = re.compile(r"<a\b[^>]*>", re.IGNORECASE)
-HREF_ATTR_RE = re.compile(r"\s+href\s*=\s*([\"'])([^\"']*)(\1)", re.IGNORECASE)
-HEAD_OPEN_RE = re.compile(r"<head[^>]*>", re.IGNORECASE)
-HEAD_CLOSE_RE = re.compile(r"</head>", re.IGNORECASE)
-BODY_OPEN_RE = re.compile(r"<body[^>]*>", re.IGNORECASE)
-PRE_BLOCK_RE = re.compile(r"<pre\b([^>]*)>(.*?)</pre>", re.IGNORECASE | re.DOTALL)
-CODE_WRAPPER_RE = re.compile(r"^\s*<code\b[^>]*>(.*?)</code>\s*$", re.IGNORECASE | re.DOTALL)
 RELATIVE_LINK_MODE = "strip"
 DEFAULT_BODY_STYLE = (
 	"html { font-size: 12pt !important; } "
@@ -66,9 +72,29 @@ DEFAULT_CODE_STYLE = (
 	"white-space: pre-wrap; "
 	"}"
 )
-PYGMENTS_FORMATTER = pygments.formatters.HtmlFormatter(nowrap=True, style="default")
-PYGMENTS_CSS = PYGMENTS_FORMATTER.get_style_defs(".codehilite")
-PERL_LEXER = pygments.lexers.PerlLexer()
+DEFAULT_BUILD_DIR = pathlib.Path("output") / "textbook_pdf_build"
+# Part of every page cache key; bump it when a page transform or the header
+# markup changes, so page PDFs cached by older code are rendered again
+PAGE_CACHE_VERSION = 1
+# Section numbers like 6.1 and section ranges like 6.1-6.4 (anything else is a glob)
+SECTION_SPEC_RE = re.compile(r"^(\d+(?:\.\d+)*)(?:-(\d+(?:\.\d+)*))?$")
+# Single-document bookmarks: chapter -> page -> h2 -> h3
+SINGLE_DOCUMENT_STYLE = (
+	"h1.chapter-title { bookmark-level: 1; } "
+	".page-source-header { bookmark-level: 2; bookmark-label: attr(data-title); } "
+	"h2 { bookmark-level: 3; } "
+	"h3 { bookmark-level: 4; } "
+	"h4, h5, h6 { bookmark-level: none; }"
+)
+TOC_STYLE = (
+	"h1 { bookmark-level: 1; } "
+	"ul.toc { list-style: none; padding-left: 0; } "
+	"ul.toc ul { list-style: none; padding-left: 1.5em; } "
+	"ul.toc li.chapter { font-weight: bold; margin-top: 0.6em; } "
+	"ul.toc li.page { font-weight: normal; margin-top: 0; } "
+	"ul.toc a { color: black; text-decoration: none; } "
+	"ul.toc span.page-number { float: right; }"
+)
 
 
 #============================================
@@ -79,7 +105,34 @@ def parse_args() -> argparse.Namespace:
 	)
 	parser.add_argument(
 		"-o", "--output", dest="output_pdf", type=str, default="",
-		help="Merged output PDF path. Default: ./<cwd_name>.pdf",
+		help="Merged output PDF path. Default: ./<cwd_name>.pdf (./<cwd_name>-selection.pdf with -c/-p)",
+	)
+	parser.add_argument(
+		"-j", "--jobs", dest="jobs", type=int, default=os.cpu_count() or 1,
+		help="Number of pages to render in parallel. Default: CPU count",
+	)
+	parser.add_argument(
+		"-b", "--build-dir", dest="build_dir", type=str, default="",
+		help=f"Persistent page PDF cache directory. Default: <repo>/{DEFAULT_BUILD_DIR}",
+	)
+	parser.add_argument(
+		"-r", "--rebuild", dest="rebuild", action="store_true",
+		help="Ignore cached page PDFs and re-render every page.",
+	)
+	parser.add_argument(
+		"-c", "--chapter", dest="chapters", action="append", default=[],
+		help="Only build this chapter, by number (06) or glob on the folder name; repeatable.",
+	)
+	parser.add_argument(
+		"-p", "--pages", dest="page_specs", action="append", default=[],
+		help="Only build these pages: section (6.1), range (6.1-6.4), or glob (*Matching*); repeatable.",
+	)
+	parser.add_argument(
+		"-s", "--single-document", dest="single_document", action="store_true",
+		help=(
+			"Render all pages as one WeasyPrint document with a TOC and bookmarks "
+			"(no cpdf; -j ignored)."
+		),
 	)
 	args = parser.parse_args()
 	return args
@@ -98,47 +151,69 @@ def get_repo_root() -> pathlib.Path:
 
 
 #============================================
-def get_output_pdf_path(output_arg: str) -> pathlib.Path:
+def get_output_pdf_path(output_arg: str, partial: bool = False) -> pathlib.Path:
 	"""Resolve output path with a default based on current directory name."""
 	if output_arg:
 		output_pdf = pathlib.Path(output_arg).resolve()
 		return output_pdf
 	cwd_path = pathlib.Path.cwd().resolve()
 	default_name = f"{cwd_path.name}.pdf"
+	if partial:
+		# Keep a chapter or page-range build from overwriting the full book
+		default_name = f"{cwd_path.name}-selection.pdf"
 	output_pdf = cwd_path / default_name
 	return output_pdf
 
 
 #============================================
-def extract_number_chunks(text: str) -> list[int]:
-	"""Extract numeric chunks from text in left-to-right order."""
-	chunks = re.findall(r"\d+", text)
-	values = []
-	for chunk in chunks:
-		values.append(int(chunk))
-	return values
+def chapter_matches(chapter_name: str, chapter_spec: str) -> bool:
+	"""Return True when a chapter folder matches a number (06, 6) or folder-name glob."""
+	if chapter_spec.isdigit():
+		chapter_numbers = textbook_pages.extract_number_chunks(chapter_name)
+		matches = chapter_numbers[:1] == [int(chapter_spec)]
+		return matches
+	matches = fnmatch.fnmatch(chapter_name, chapter_spec)
+	return matches
 
 
 #============================================
-def html_sort_key(path: pathlib.Path) -> tuple:
-	"""Build a stable chapter/section sort key for a textbook page path."""
-	chapter_name = path.parent.name
-	filename = path.name
-	file_stem = path.stem
-	section_prefix = file_stem.split("-", 1)[0]
-	chapter_numbers = extract_number_chunks(chapter_name)
-	section_numbers = extract_number_chunks(section_prefix)
-	key = (chapter_numbers, section_numbers, filename)
-	return key
+def page_matches(relative_path: pathlib.Path, page_spec: str) -> bool:
+	"""Return True when a page matches a section, section range, or glob."""
+	section_match = SECTION_SPEC_RE.match(page_spec)
+	if section_match is None:
+		for candidate in (str(relative_path), relative_path.name, relative_path.stem):
+			if fnmatch.fnmatch(candidate, page_spec):
+				return True
+		return False
+	section_numbers = textbook_pages.html_sort_key(relative_path)[1]
+	first_numbers = textbook_pages.extract_number_chunks(section_match.group(1))
+	last_text = section_match.group(2) or section_match.group(1)
+	last_numbers = textbook_pages.extract_number_chunks(last_text)
+	# Same list comparison html_sort_key uses, so ranges follow book order; the upper
+	# bound is compared as a prefix so "6" or "5-6" covers every 6.x page
+	matches = first_numbers <= section_numbers and section_numbers[:len(last_numbers)] <= last_numbers
+	return matches
 
 
 #============================================
-def find_html_files(input_root: pathlib.Path) -> list[pathlib.Path]:
-	"""Collect and sort Textbook chapter HTML files."""
-	pattern = "*/*.html"
-	files = list(input_root.glob(pattern))
-	sorted_files = sorted(files, key=html_sort_key)
-	return sorted_files
+def select_html_files(
+		html_files: list[pathlib.Path],
+		input_root: pathlib.Path,
+		chapters: list[str],
+		page_specs: list[str],
+) -> list[pathlib.Path]:
+	"""Keep pages matching any chapter or page selector, preserving html_sort_key order."""
+	if not chapters and not page_specs:
+		return list(html_files)
+	selected_files = []
+	for source_html in html_files:
+		relative_path = source_html.relative_to(input_root)
+		chapter_name = relative_path.parent.name
+		if any(chapter_matches(chapter_name, spec) for spec in chapters):
+			selected_files.append(source_html)
+		elif any(page_matches(relative_path, spec) for spec in page_specs):
+			selected_files.append(source_html)
+	return selected_files
 
 
 #============================================
@@ -181,144 +256,127 @@ def resolve_relative_href(source_path: pathlib.Path, href: str) -> str:
 
 
 #============================================
-def rewrite_anchor_tag(tag: str, source_path: pathlib.Path, relative_links: str) -> str:
-	"""Rewrite one opening anchor tag based on relative link handling mode."""
-	href_match = HREF_ATTR_RE.search(tag)
-	if href_match is None:
-		return tag
-	href_value = href_match.group(2)
-	if not is_relative_href(href_value):
-		return tag
-	if relative_links == "strip":
-		replaced = tag[:href_match.start()] + tag[href_match.end():]
-		return replaced
-	absolute_href = resolve_relative_href(source_path, href_value)
-	replaced = tag[:href_match.start(2)] + absolute_href + tag[href_match.end(2):]
-	return replaced
+def get_default_style() -> str:
+	"""Return the CSS injected into every rendered page."""
+	style_text = DEFAULT_BODY_STYLE + DEFAULT_HEADING_STYLE + DEFAULT_CODE_STYLE
+	style_text += textbook_pages.PYGMENTS_CSS
+	return style_text
 
 
 #============================================
-def rewrite_relative_links(html_text: str, source_path: pathlib.Path, relative_links: str) -> str:
-	"""Rewrite relative anchor href values in an HTML document."""
-	def replace_tag(match: re.Match) -> str:
-		tag_text = match.group(0)
-		updated_tag = rewrite_anchor_tag(tag_text, source_path, relative_links)
-		return updated_tag
+def get_head_element(root: lxml.html.HtmlElement) -> lxml.html.HtmlElement:
+	"""Return the document head, creating it for head-less page fragments."""
+	head = root.find("head")
+	if head is None:
+		head = lxml.html.Element("head")
+		root.insert(0, head)
+	return head
 
-	rewritten_html = ANCHOR_TAG_RE.sub(replace_tag, html_text)
-	return rewritten_html
+
+#============================================
+def get_body_element(root: lxml.html.HtmlElement) -> lxml.html.HtmlElement:
+	"""Return the document body, creating it when the page has no body content."""
+	body = root.find("body")
+	if body is None:
+		body = lxml.html.Element("body")
+		root.append(body)
+	return body
 
 
 #============================================
-def insert_base_tag(html_text: str, source_path: pathlib.Path) -> str:
+def transform_base_tag(root: lxml.html.HtmlElement, page: dict) -> None:
 	"""Insert a base tag so local assets resolve from the original HTML location."""
-	source_dir_uri = source_path.parent.resolve().as_uri()
+	source_dir_uri = page["source_path"].parent.resolve().as_uri()
 	if not source_dir_uri.endswith("/"):
 		source_dir_uri += "/"
-	base_tag = f"<base href=\"{source_dir_uri}\">"
-	head_match = HEAD_OPEN_RE.search(html_text)
-	if head_match is None:
-		prefixed = f"<head>{base_tag}</head>\n{html_text}"
-		return prefixed
-	insert_at = head_match.end()
-	updated = html_text[:insert_at] + base_tag + html_text[insert_at:]
-	return updated
+	base_element = lxml.html.Element("base", href=source_dir_uri)
+	get_head_element(root).insert(0, base_element)
 
 
 #============================================
-def insert_default_style(html_text: str) -> str:
-	"""Insert default CSS to normalize body text size in rendered PDF."""
-	style_text = DEFAULT_BODY_STYLE + DEFAULT_HEADING_STYLE + DEFAULT_CODE_STYLE + PYGMENTS_CSS
-	style_tag = f"<style>{style_text}</style>"
-	head_close_match = HEAD_CLOSE_RE.search(html_text)
-	if head_close_match is not None:
-		insert_at = head_close_match.start()
-		updated = html_text[:insert_at] + style_tag + html_text[insert_at:]
-		return updated
-
-	head_open_match = HEAD_OPEN_RE.search(html_text)
-	if head_open_match is None:
-		prefixed = f"<head>{style_tag}</head>\n{html_text}"
-		return prefixed
-	insert_at = head_open_match.end()
-	updated = html_text[:insert_at] + style_tag + html_text[insert_at:]
-	return updated
+def transform_default_style(root: lxml.html.HtmlElement, page: dict) -> None:
+	"""Append default CSS to normalize body text size in rendered PDF."""
+	style_element = lxml.html.Element("style")
+	style_element.text = get_default_style()
+	get_head_element(root).append(style_element)
 
 
 #============================================
-def strip_html_tags(text: str) -> str:
-	"""Remove HTML tags from a string."""
-	no_tags = re.sub(r"<[^>]+>", "", text)
-	return no_tags
+def transform_highlight(root: lxml.html.HtmlElement, page: dict) -> None:
+	"""Apply syntax highlighting to every pre block."""
+	for pre_element in list(root.iter("pre")):
+		textbook_pages.highlight_pre_element(pre_element, page["highlight_cache_dir"])
 
 
 #============================================
-def extract_pre_code_text(pre_inner_html: str) -> str:
-	"""Extract plain code text from pre block HTML."""
-	code_match = CODE_WRAPPER_RE.match(pre_inner_html)
-	if code_match is not None:
-		code_html = code_match.group(1)
-	else:
-		code_html = pre_inner_html
-	code_text = strip_html_tags(code_html)
-	unescaped_text = html.unescape(code_text)
-	return unescaped_text
+def transform_page_header(root: lxml.html.HtmlElement, page: dict) -> None:
+	"""Insert a visible source-page header (and optional chapter heading) at the top of the body."""
+	relative_path = page["source_path"].relative_to(page["input_root"])
+	header_element = lxml.html.Element(
+		"div",
+		id=textbook_pages.page_anchor_id(relative_path),
+		style=(
+			"font-family: monospace; font-size: 12pt; "
+			"font-weight: bold; border-bottom: 1px solid #888; "
+			"padding-bottom: 6px; margin-bottom: 12px;"
+		),
+	)
+	header_element.set("class", "page-source-header")
+	header_element.set("data-title", textbook_pages.page_title(relative_path))
+	header_element.text = str(relative_path)
+	body = get_body_element(root)
+	body.insert(0, header_element)
+	if page["chapter_heading"]:
+		chapter_element = lxml.html.Element("h1")
+		chapter_element.set("class", "chapter-title")
+		chapter_element.text = page["chapter_heading"]
+		body.insert(0, chapter_element)
 
 
 #============================================
-def highlight_pre_blocks(html_text: str) -> str:
-	"""Apply syntax highlighting to pre blocks in temporary HTML."""
-	def replace_pre(match: re.Match) -> str:
-		attrs = match.group(1)
-		inner_html = match.group(2)
-		code_text = extract_pre_code_text(inner_html)
-		highlighted = pygments.highlight(code_text, PERL_LEXER, PYGMENTS_FORMATTER)
-		rewritten = f"<pre{attrs}><code class=\"codehilite\">{highlighted}</code></pre>"
-		return rewritten
-
-	highlighted_html = PRE_BLOCK_RE.sub(replace_pre, html_text)
-	return highlighted_html
+def transform_relative_links(root: lxml.html.HtmlElement, page: dict) -> None:
+	"""Strip or absolutize relative anchor href values."""
+	for anchor in root.iter("a"):
+		href_value = anchor.get("href")
+		if href_value is None or not is_relative_href(href_value):
+			continue
+		if RELATIVE_LINK_MODE == "strip":
+			del anchor.attrib["href"]
+			continue
+		anchor.set("href", resolve_relative_href(page["source_path"], href_value))
+
+
+# Applied in order to the parsed page tree; each takes (root, page context dict)
+PAGE_TRANSFORMS = (
+	transform_base_tag,
+	transform_default_style,
+	transform_highlight,
+	transform_page_header,
+	transform_relative_links,
+)
 
 
 #============================================
-def insert_page_header(
-		html_text: str,
+def preprocess_page_html(
+		raw_html: str,
 		source_path: pathlib.Path,
 		input_root: pathlib.Path,
+		chapter_heading: str = "",
+		highlight_cache_dir: pathlib.Path | None = None,
+		transforms: tuple = PAGE_TRANSFORMS,
 ) -> str:
-	"""Insert a visible source-page header at the top of the HTML body."""
-	relative_path = source_path.relative_to(input_root)
-	page_label = str(relative_path)
-	header_html = (
-		"<div style='font-family: monospace; font-size: 12pt; "
-		"font-weight: bold; border-bottom: 1px solid #888; "
-		"padding-bottom: 6px; margin-bottom: 12px;'>"
-		f"{page_label}</div>"
-	)
-	body_match = BODY_OPEN_RE.search(html_text)
-	if body_match is None:
-		prefixed = f"<body>{header_html}</body>\n{html_text}"
-		return prefixed
-	insert_at = body_match.end()
-	updated = html_text[:insert_at] + header_html + html_text[insert_at:]
-	return updated
-
-
-#============================================
-def write_temp_html(
-		source_path: pathlib.Path,
-		temp_html_path: pathlib.Path,
-		input_root: pathlib.Path,
-) -> None:
-	"""Create one temporary HTML file with link handling adjustments."""
-	raw_html = source_path.read_text(encoding="utf-8")
-	with_base = insert_base_tag(raw_html, source_path)
-	with_style = insert_default_style(with_base)
-	with_highlight = highlight_pre_blocks(with_style)
-	with_header = insert_page_header(with_highlight, source_path, input_root)
-	rewritten = rewrite_relative_links(with_header, source_path, RELATIVE_LINK_MODE)
-	temp_html_path.parent.mkdir(parents=True, exist_ok=True)
-	temp_html_path.write_text(rewritten, encoding="utf-8")
+	"""Parse the loaded page HTML, apply the tree transforms, and serialize it for WeasyPrint."""
+	root = lxml.html.document_fromstring(raw_html)
+	page = {
+		"source_path": source_path,
+		"input_root": input_root,
+		"chapter_heading": chapter_heading,
+		"highlight_cache_dir": highlight_cache_dir,
+	}
+	for transform in transforms:
+		transform(root, page)
+	html_text = lxml.html.tostring(root, encoding="unicode", method="html")
+	return html_text
 
 
 #============================================
@@ -333,54 +391,313 @@ def merge_pdfs(pdf_paths: list[pathlib.Path], output_pdf: pathlib.Path) -> None:
 
 
 #============================================
-def run_weasyprint(html_path: pathlib.Path, pdf_path: pathlib.Path) -> None:
-	"""Render one HTML file to one PDF file with WeasyPrint."""
+def run_weasyprint(html_text: str, base_url: str, pdf_path: pathlib.Path) -> None:
+	"""Render one preprocessed HTML string to one PDF file with WeasyPrint."""
 	pdf_path.parent.mkdir(parents=True, exist_ok=True)
-	html = weasyprint.HTML(
-		filename=str(html_path),
-		base_url=str(html_path.parent),
+	document = weasyprint.HTML(string=html_text, base_url=base_url)
+	document.write_pdf(str(pdf_path))
+
+
+#============================================
+def page_cache_key(html_text: str, relative_path: pathlib.Path) -> str:
+	"""
+	Hash everything that changes a page PDF.
+
+	That is the source, the path header, the CSS, the preprocess settings
+	(PAGE_CACHE_VERSION, the PAGE_TRANSFORMS steps, RELATIVE_LINK_MODE), and
+	the Pygments and WeasyPrint versions.
+	"""
+	transform_names = ",".join(transform.__name__ for transform in PAGE_TRANSFORMS)
+	digest = hashlib.sha256()
+	digest.update(f"{PAGE_CACHE_VERSION}\0{transform_names}\0{RELATIVE_LINK_MODE}\0".encode("utf-8"))
+	digest.update(str(relative_path).encode("utf-8") + b"\0")
+	digest.update(html_text.encode("utf-8") + b"\0")
+	digest.update(get_default_style().encode("utf-8") + b"\0")
+	digest.update(pygments.__version__.encode("utf-8") + b"\0")
+	digest.update(weasyprint.__version__.encode("utf-8"))
+	cache_key = digest.hexdigest()
+	return cache_key
+
+
+#============================================
+def render_page(
+		raw_html: str,
+		source_html: pathlib.Path,
+		pdf_path: pathlib.Path,
+		input_root: pathlib.Path,
+		highlight_cache_dir: pathlib.Path | None = None,
+) -> float:
+	"""Preprocess one loaded page and render it to PDF, returning elapsed seconds."""
+	start_time = time.perf_counter()
+	html_text = preprocess_page_html(
+		raw_html, source_html, input_root, highlight_cache_dir=highlight_cache_dir,
 	)
-	html.write_pdf(str(pdf_path))
+	# Render beside the target and rename, so an interrupted build never leaves a bad cache entry
+	partial_pdf_path = pdf_path.with_suffix(".partial.pdf")
+	run_weasyprint(html_text, str(source_html.parent), partial_pdf_path)
+	os.replace(partial_pdf_path, pdf_path)
+	elapsed = time.perf_counter() - start_time
+	return elapsed
+
+
+#============================================
+def prune_highlight_cache(highlight_cache_dir: pathlib.Path, pages: list[dict]) -> int:
+	"""Delete highlighted-code entries no page of the whole book uses; return how many."""
+	if not highlight_cache_dir.is_dir():
+		return 0
+	used_keys = set()
+	for page in pages:
+		if "<pre" not in page["html_text"].lower():
+			continue
+		for pre_element in lxml.html.document_fromstring(page["html_text"]).iter("pre"):
+			code_text = textbook_pages.extract_pre_code_text(pre_element)
+			used_keys.add(textbook_pages.highlight_cache_key(code_text))
+	stale_count = 0
+	# Leftover .tmp files are writes cut short by an interrupted build
+	for cache_path in highlight_cache_dir.iterdir():
+		if cache_path.suffix == ".html" and cache_path.stem in used_keys:
+			continue
+		cache_path.unlink()
+		stale_count += 1
+	return stale_count
+
+
+#============================================
+def print_render_times(render_times: dict[pathlib.Path, float], limit: int = 10) -> None:
+	"""Print total render time and the slowest pages."""
+	total_seconds = sum(render_times.values())
+	print(f"Total page render time: {total_seconds:.1f} s")
+	slowest = sorted(render_times.items(), key=lambda item: (-item[1], str(item[0])))
+	print(f"Slowest {min(limit, len(slowest))} pages:")
+	for relative_path, seconds in slowest[:limit]:
+		print(f"  {seconds:6.2f} s  {relative_path}")
+
+
+#============================================
+def build_toc_html(toc_entries: list[dict], page_offset: int) -> str:
+	"""Build table of contents HTML linking to page header anchors."""
+	lines = [
+		"<html><head><style>",
+		get_default_style() + TOC_STYLE,
+		"</style></head><body>",
+		"<h1>Contents</h1>",
+		"<ul class='toc'>",
+	]
+	current_chapter = None
+	for entry in toc_entries:
+		if entry["chapter"] != current_chapter:
+			if current_chapter is not None:
+				lines.append("</ul></li>")
+			current_chapter = entry["chapter"]
+			lines.append(f"<li class='chapter'>{html.escape(current_chapter)}<ul>")
+		page_number = entry["page_index"] + page_offset + 1
+		lines.append(
+			f"<li class='page'><a href='#{entry['anchor_id']}'>{html.escape(entry['title'])}"
+			f"<span class='page-number'>{page_number}</span></a></li>"
+		)
+	if current_chapter is not None:
+		lines.append("</ul></li>")
+	lines.append("</ul></body></html>")
+	toc_html = "\n".join(lines)
+	return toc_html
+
+
+#============================================
+def render_toc_document(
+		toc_entries: list[dict],
+		font_config: weasyprint.text.fonts.FontConfiguration,
+) -> weasyprint.Document:
+	"""Render the TOC, re-rendering once if its own length shifts the page numbers."""
+	toc_page_count = 1
+	for _ in range(3):
+		toc_html = build_toc_html(toc_entries, toc_page_count)
+		toc_document = weasyprint.HTML(string=toc_html).render(font_config=font_config)
+		if len(toc_document.pages) == toc_page_count:
+			break
+		toc_page_count = len(toc_document.pages)
+	return toc_document
+
+
+#============================================
+def build_single_document(
+		pages: list[dict],
+		input_root: pathlib.Path,
+		output_pdf: pathlib.Path,
+		build_dir: pathlib.Path,
+) -> pathlib.Path:
+	"""Render all pages as one WeasyPrint document with a TOC and bookmarks."""
+	highlight_cache_dir = build_dir / "highlight"
+	# One font configuration so every page shares the same embedded font subsets
+	font_config = weasyprint.text.fonts.FontConfiguration()
+	bookmark_css = weasyprint.CSS(string=SINGLE_DOCUMENT_STYLE, font_config=font_config)
+
+	page_documents = []
+	toc_entries = []
+	page_index = 0
+	current_chapter = None
+	total = len(pages)
+	wall_start = time.perf_counter()
+	for index, page in enumerate(pages, start=1):
+		source_html = page["source_path"]
+		relative_path = source_html.relative_to(input_root)
+		chapter_name = relative_path.parent.name
+		chapter_heading = ""
+		if chapter_name != current_chapter:
+			current_chapter = chapter_name
+			chapter_heading = textbook_pages.chapter_title(chapter_name)
+		start_time = time.perf_counter()
+		html_text = preprocess_page_html(
+			page["html_text"], source_html, input_root, chapter_heading, highlight_cache_dir,
+		)
+		page_html = weasyprint.HTML(string=html_text, base_url=str(source_html.parent))
+		page_document = page_html.render(font_config=font_config, stylesheets=[bookmark_css])
+		elapsed = time.perf_counter() - start_time
+		page_documents.append(page_document)
+		toc_entries.append(
+			{
+				"chapter": textbook_pages.chapter_title(chapter_name),
+				"title": textbook_pages.page_title(relative_path),
+				"anchor_id": textbook_pages.page_anchor_id(relative_path),
+				"page_index": page_index,
+			}
+		)
+		page_count = len(page_document.pages)
+		page_index += page_count
+		print(f"[{index}/{total}] laid out {relative_path} ({elapsed:.2f} s, {page_count} pages)")
+
+	toc_document = render_toc_document(toc_entries, font_config)
+	all_pages = list(toc_document.pages)
+	for page_document in page_documents:
+		all_pages.extend(page_document.pages)
+	book_document = page_documents[0].copy(all_pages)
+	output_pdf.parent.mkdir(parents=True, exist_ok=True)
+	book_document.write_pdf(str(output_pdf))
+	wall_seconds = time.perf_counter() - wall_start
+
+	print(f"Single-document PDF: {output_pdf} ({len(all_pages)} pages, {wall_seconds:.1f} s)")
+	print(f"Pages rendered: {len(page_documents)}")
+	return output_pdf
 
 
 #============================================
-def build_book(repo_root: pathlib.Path, output_pdf: pathlib.Path) -> pathlib.Path:
-	"""Build per-page PDFs and merge to a single textbook PDF."""
+def build_book(
+		repo_root: pathlib.Path,
+		output_pdf: pathlib.Path,
+		jobs: int = 1,
+		build_dir: pathlib.Path | None = None,
+		rebuild: bool = False,
+		single_document: bool = False,
+		chapters: list[str] | None = None,
+		page_specs: list[str] | None = None,
+		pages: list[dict] | None = None,
+		mp_context: multiprocessing.context.BaseContext | None = None,
+) -> pathlib.Path:
+	"""Render changed pages into the build cache and merge to a single textbook PDF.
+
+	pages is the shared textbook_pages.load_pages() model; it is loaded here when not given.
+	Pages are rendered from its html_text, so no page file is read again.
+	mp_context selects how render workers start (default: the platform default).
+	"""
 	input_root = repo_root / "Textbook"
 
 	if not input_root.exists():
 		raise RuntimeError(f"Input root does not exist: {input_root}")
 
-	if shutil.which("cpdf") is None:
-		raise RuntimeError("Required tool not found on PATH: cpdf")
+	if jobs < 1:
+		raise ValueError(f"--jobs must be at least 1, got {jobs}")
 
-	html_files = find_html_files(input_root)
-	if not html_files:
+	if pages is None:
+		pages = textbook_pages.load_pages(input_root)
+	if not pages:
 		raise RuntimeError(f"No HTML files found under: {input_root}")
+	pages_by_path = {page["source_path"]: page for page in pages}
+	html_files = select_html_files(list(pages_by_path), input_root, chapters or [], page_specs or [])
+	if not html_files:
+		raise RuntimeError(f"No pages match --chapter {chapters} / --pages {page_specs}")
+	if len(html_files) < len(pages):
+		print(f"Selected {len(html_files)} of {len(pages)} pages")
+
+	if build_dir is None:
+		build_dir = repo_root / DEFAULT_BUILD_DIR
+	if single_document:
+		selected_pages = [pages_by_path[path] for path in html_files]
+		build_single_document(selected_pages, input_root, output_pdf, build_dir)
+		stale_count = prune_highlight_cache(build_dir / "highlight", pages)
+		print(f"Stale highlight entries removed: {stale_count}")
+		return output_pdf
 
-	with tempfile.TemporaryDirectory(prefix="textbook_pdf_build_") as temp_dir:
-		temp_root = pathlib.Path(temp_dir)
-		temp_html_root = temp_root / "html"
-		temp_pdf_root = temp_root / "pdf"
-		manifest_path = temp_root / "rendered_pages.txt"
+	if shutil.which("cpdf") is None:
+		raise RuntimeError("Required tool not found on PATH: cpdf")
 
-		pdf_paths = []
-		manifest_lines = []
-		for index, source_html in enumerate(html_files, start=1):
+	build_pdf_root = build_dir / "pdf"
+	highlight_cache_dir = build_dir / "highlight"
+	build_pdf_root.mkdir(parents=True, exist_ok=True)
+	manifest_path = build_dir / "rendered_pages.txt"
+
+	# One cache key per page of the whole book, used for selection and pruning alike
+	cache_keys = {}
+	for source_html, page in pages_by_path.items():
+		cache_keys[source_html] = page_cache_key(page["html_text"], source_html.relative_to(input_root))
+
+	# Manifest and merge order come from html_sort_key, not completion order.
+	# Page PDFs are named by cache key, so an unchanged page is reused as-is.
+	# Manifest lines are written as they are computed rather than collected.
+	pdf_paths = []
+	render_args = []
+	with manifest_path.open("w", encoding="utf-8") as manifest_handle:
+		for source_html in html_files:
 			relative_path = source_html.relative_to(input_root)
-			temp_html_path = temp_html_root / relative_path
-			temp_pdf_path = temp_pdf_root / relative_path.with_suffix(".pdf")
-			write_temp_html(source_html, temp_html_path, input_root)
-			run_weasyprint(temp_html_path, temp_pdf_path)
-			pdf_paths.append(temp_pdf_path)
-			manifest_lines.append(str(relative_path))
-			print(f"[{index}/{len(html_files)}] rendered {relative_path}")
-
-		manifest_path.write_text("\n".join(manifest_lines) + "\n", encoding="utf-8")
-		merge_pdfs(pdf_paths, output_pdf)
-
+			cache_key = cache_keys[source_html]
+			build_pdf_path = build_pdf_root / f"{cache_key}.pdf"
+			pdf_paths.append(build_pdf_path)
+			manifest_handle.write(f"{relative_path}\t{cache_key}\n")
+			if rebuild or not build_pdf_path.exists():
+				raw_html = pages_by_path[source_html]["html_text"]
+				render_args.append((raw_html, source_html, build_pdf_path, input_root, highlight_cache_dir))
+
+	cached_count = len(html_files) - len(render_args)
+	print(f"Pages cached: {cached_count}, pages to render: {len(render_args)}")
+
+	render_times = {}
+	total = len(render_args)
+	wall_start = time.perf_counter()
+	if jobs == 1 or total <= 1:
+		for index, page_args in enumerate(render_args, start=1):
+			relative_path = page_args[1].relative_to(input_root)
+			render_times[relative_path] = render_page(*page_args)
+			print(f"[{index}/{total}] rendered {relative_path} ({render_times[relative_path]:.2f} s)")
+	else:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context) as executor:
+			future_paths = {}
+			for page_args in render_args:
+				future = executor.submit(render_page, *page_args)
+				future_paths[future] = page_args[1].relative_to(input_root)
+			completed = concurrent.futures.as_completed(future_paths)
+			for index, future in enumerate(completed, start=1):
+				relative_path = future_paths[future]
+				render_times[relative_path] = future.result()
+				print(f"[{index}/{total}] rendered {relative_path} ({render_times[relative_path]:.2f} s)")
+	wall_seconds = time.perf_counter() - wall_start
+
+	# Drop page PDFs no page of the whole book points at (old edits, removed pages);
+	# pages outside a --chapter/--pages selection keep their cache entries
+	current_pdfs = {build_pdf_root / f"{cache_key}.pdf" for cache_key in cache_keys.values()}
+	stale_count = 0
+	for cached_pdf in build_pdf_root.glob("*.pdf"):
+		if cached_pdf not in current_pdfs:
+			cached_pdf.unlink()
+			stale_count += 1
+	stale_highlight_count = prune_highlight_cache(highlight_cache_dir, pages)
+
+	merge_pdfs(pdf_paths, output_pdf)
+
+	if render_times:
+		print_render_times(render_times)
+		print(f"Render wall time: {wall_seconds:.1f} s with {jobs} job(s)")
+	print(f"Stale cached pages removed: {stale_count}")
+	print(f"Stale highlight entries removed: {stale_highlight_count}")
 	print(f"Merged PDF: {output_pdf}")
-	print(f"Pages rendered: {len(pdf_paths)}")
+	print(f"Pages rendered: {len(render_times)} of {len(pdf_paths)}")
 	return output_pdf
 
 
@@ -389,8 +706,21 @@ def main() -> None:
 	"""Run the textbook PDF build flow."""
 	args = parse_args()
 	repo_root = get_repo_root()
-	output_pdf = get_output_pdf_path(args.output_pdf)
-	build_book(repo_root, output_pdf)
+	partial = bool(args.chapters or args.page_specs)
+	output_pdf = get_output_pdf_path(args.output_pdf, partial)
+	build_dir = None
+	if args.build_dir:
+		build_dir = pathlib.Path(args.build_dir).resolve()
+	build_book(
+		repo_root,
+		output_pdf,
+		args.jobs,
+		build_dir,
+		args.rebuild,
+		args.single_document,
+		args.chapters,
+		args.page_specs,
+	)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Shared ordered page model and code highlighting for the Textbook exporters.
+
+textbook_html_to_pdf.py, textbook_html_to_markdown.py and textbook_export.py
+discover pages, order them by chapter/section, and highlight <pre> blocks
+through this module, so every output format sees the same page list and
+reuses the same highlight memo.
+"""
+
+# Standard Library
+import os
+import re
+import hashlib
+import pathlib
+
+# PIP3 modules
+import lxml.html
+import pygments
+import pygments.lexers
+import pygments.formatters
+
+PYGMENTS_FORMATTER = pygments.formatters.HtmlFormatter(nowrap=True, style="default")
+PYGMENTS_CSS = PYGMENTS_FORMATTER.get_style_defs(".codehilite")
+PERL_LEXER = pygments.lexers.PerlLexer()
+# code text hash -> highlighted HTML, shared by every page rendered in this process
+HIGHLIGHT_MEMO = {}
+
+
+#============================================
+def extract_number_chunks(text: str) -> list[int]:
+	"""Extract numeric chunks from text in left-to-right order."""
+	chunks = re.findall(r"\d+", text)
+	values = []
+	for chunk in chunks:
+		values.append(int(chunk))
+	return values
+
+
+#============================================
+def html_sort_key(path: pathlib.Path) -> tuple:
+	"""Build a stable chapter/section sort key for a textbook page path."""
+	chapter_name = path.parent.name
+	filename = path.name
+	file_stem = path.stem
+	section_prefix = file_stem.split("-", 1)[0]
+	chapter_numbers = extract_number_chunks(chapter_name)
+	section_numbers = extract_number_chunks(section_prefix)
+	key = (chapter_numbers, section_numbers, filename)
+	return key
+
+
+#============================================
+def find_html_files(input_root: pathlib.Path) -> list[pathlib.Path]:
+	"""Collect and sort Textbook chapter HTML files."""
+	pattern = "*/*.html"
+	files = list(input_root.glob(pattern))
+	sorted_files = sorted(files, key=html_sort_key)
+	return sorted_files
+
+
+#============================================
+def extract_pre_code_text(pre_element: lxml.html.HtmlElement) -> str:
+	"""Extract plain code text from a parsed pre element, including nested markup."""
+	children = list(pre_element)
+	code_element = pre_element
+	# A lone <code> wrapper (with only whitespace around it) holds the real code text
+	if len(children) == 1 and children[0].tag == "code":
+		outer_text = (pre_element.text or "") + (children[0].tail or "")
+		if not outer_text.strip():
+			code_element = children[0]
+	code_text = code_element.text_content()
+	return code_text
+
+
+#============================================
+def highlight_cache_key(code_text: str) -> str:
+	"""Return the memo and disk cache key for highlighting code text."""
+	key_text = "\0".join((pygments.__version__, PYGMENTS_CSS, code_text))
+	cache_key = hashlib.sha256(key_text.encode("utf-8")).hexdigest()
+	return cache_key
+
+
+#============================================
+def highlight_code(code_text: str, cache_dir: pathlib.Path | None = None) -> str:
+	"""Return Pygments Perl HTML for code text, memoized by content hash."""
+	cache_key = highlight_cache_key(code_text)
+	highlighted = HIGHLIGHT_MEMO.get(cache_key)
+	if highlighted is not None:
+		return highlighted
+	cache_path = None
+	if cache_dir is not None:
+		cache_path = cache_dir / f"{cache_key}.html"
+		if cache_path.exists():
+			highlighted = cache_path.read_text(encoding="utf-8")
+			HIGHLIGHT_MEMO[cache_key] = highlighted
+			return highlighted
+	highlighted = pygments.highlight(code_text, PERL_LEXER, PYGMENTS_FORMATTER)
+	HIGHLIGHT_MEMO[cache_key] = highlighted
+	if cache_path is not None:
+		# Parallel render workers may write the same entry; rename keeps each write whole
+		cache_dir.mkdir(parents=True, exist_ok=True)
+		partial_path = cache_dir / f"{cache_key}.{os.getpid()}.tmp"
+		partial_path.write_text(highlighted, encoding="utf-8")
+		os.replace(partial_path, cache_path)
+	return highlighted
+
+
+#============================================
+def highlight_pre_element(
+		pre_element: lxml.html.HtmlElement,
+		cache_dir: pathlib.Path | None = None,
+) -> None:
+	"""Replace the content of one pre element with highlighted code, keeping its attributes."""
+	code_text = extract_pre_code_text(pre_element)
+	highlighted = highlight_code(code_text, cache_dir)
+	code_element = lxml.html.fragment_fromstring(f"<code class=\"codehilite\">{highlighted}</code>")
+	for child in list(pre_element):
+		pre_element.remove(child)
+	pre_element.text = None
+	pre_element.append(code_element)
+
+
+#============================================
+def page_anchor_id(relative_path: pathlib.Path) -> str:
+	"""Build an HTML id for a page header from its Textbook-relative path."""
+	path_text = str(relative_path.with_suffix(""))
+	anchor_id = "page-" + re.sub(r"[^A-Za-z0-9]+", "-", path_text).strip("-").lower()
+	return anchor_id
+
+
+#============================================
+def page_title(relative_path: pathlib.Path) -> str:
+	"""Build a readable section title like '6.1 Text Coloring and Emphasis'."""
+	section_prefix, _, name = relative_path.stem.partition("-")
+	title = f"{section_prefix} {name.replace('_', ' ')}".strip()
+	return title
+
+
+#============================================
+def chapter_title(chapter_name: str) -> str:
+	"""Build a readable chapter title like 'Chapter 6: Advanced PGML Techniques'."""
+	number_text, _, name = chapter_name.partition("_")
+	name = name.replace("_", " ")
+	if not number_text.isdigit():
+		return chapter_name.replace("_", " ")
+	# 90_Appendices and later are back matter, not numbered chapters
+	if int(number_text) >= 90:
+		return name
+	title = f"Chapter {int(number_text)}: {name}"
+	return title
+
+
+#============================================
+def load_pages(input_root: pathlib.Path) -> list[dict]:
+	"""
+	Read every Textbook page once, in html_sort_key order.
+
+	Each page dict has: source_path, relative_path, label (relative path without
+	.html), title, chapter_name, chapter_title, anchor_id, html_text, sha256.
+	"""
+	pages = []
+	for source_path in find_html_files(input_root):
+		relative_path = source_path.relative_to(input_root)
+		raw_bytes = source_path.read_bytes()
+		pages.append(
+			{
+				"source_path": source_path,
+				"relative_path": relative_path,
+				"label": str(relative_path.with_suffix("")),
+				"title": page_title(relative_path),
+				"chapter_name": relative_path.parent.name,
+				"chapter_title": chapter_title(relative_path.parent.name),
+				"anchor_id": page_anchor_id(relative_path),
+				"html_text": raw_bytes.decode("utf-8"),
+				"sha256": hashlib.sha256(raw_bytes).hexdigest(),
+			}
+		)
+	return pages
+
+
+#============================================
+def parse_page_tree(page: dict) -> lxml.html.HtmlElement:
+	"""Parse the loaded page HTML into a new document tree owned by the caller."""
+	root = lxml.html.document_fromstring(page["html_text"])
+	return root
+
+
+if __name__ == "__main__":
+	for listed_page in load_pages(pathlib.Path("Textbook")):
+		print(f"{listed_page['label']}\t{listed_page['title']}")
@@ -2,10 +2,23 @@
 
 import os
 import argparse
+import functools
+import concurrent.futures
 
 #PyPi
 import lxml.etree
 
+INDENT = "  "
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\r": "&#13;"})
+ATTRIBUTE_ESCAPES = str.maketrans({
+	"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;",
+	"\n": "&#10;", "\r": "&#13;", "\t": "&#9;",
+})
+STREAM_EVENTS = ("start", "end", "comment", "pi")
+READ_SIZE = 1 << 16
+
 def format_xml_with_lxml(input_file: str) -> str:
 	"""
 	Parse an XML file and return a formatted XML string.
@@ -20,6 +33,334 @@ def format_xml_with_lxml(input_file: str) -> str:
 
 #==============
 
+def qualified_name(name: str, nsmap: dict, is_attribute: bool = False) -> str:
+	"""
+	Return the prefixed name for a Clark-notation tag or attribute name.
+
+	Args:
+		name (str): Name such as "{urn:x}item" or "item".
+		nsmap (dict): Namespace map in scope for the element.
+		is_attribute (bool): Attributes never use the default namespace.
+
+	Returns:
+		str: Name such as "q:item" or "item".
+	"""
+	if not name.startswith("{"):
+		return name
+	uri, local = name[1:].split("}", 1)
+	if uri == XML_NAMESPACE:
+		return "xml:" + local
+	for prefix, prefix_uri in nsmap.items():
+		if prefix_uri == uri and (prefix or not is_attribute):
+			return f"{prefix}:{local}" if prefix else local
+	raise ValueError(f"No namespace prefix in scope for {name}")
+
+#==============
+
+@functools.lru_cache(maxsize=4096)
+def prefixed_name(tag: str, prefix: str | None) -> str:
+	"""
+	Return a Clark-notation element tag written with its prefix.
+
+	Args:
+		tag (str): Tag such as "{urn:q}item".
+		prefix (str | None): The element's prefix; None for the default namespace.
+
+	Returns:
+		str: Tag such as "q:item" or "item".
+	"""
+	local = tag.rsplit("}", 1)[-1]
+	return f"{prefix}:{local}" if prefix else local
+
+#==============
+
+def start_tag(element, nsmap: dict, parent_nsmap: dict) -> str:
+	"""
+	Return the open start tag of an element (without the closing '>').
+
+	Args:
+		element: The lxml element.
+		nsmap (dict): The element's namespace map.
+		parent_nsmap (dict): Namespace map in scope at the parent.
+
+	Returns:
+		str: Text such as '<q:item xmlns:q="urn:q" id="1"'.
+	"""
+	parts = ["<" + prefixed_name(element.tag, element.prefix)]
+	# Declare only namespaces this element adds or changes
+	if nsmap != parent_nsmap:
+		for prefix, uri in nsmap.items():
+			if parent_nsmap.get(prefix) != uri:
+				name = f"xmlns:{prefix}" if prefix else "xmlns"
+				parts.append(f'{name}="{uri.translate(ATTRIBUTE_ESCAPES)}"')
+	for name, value in element.attrib.items():
+		if name.startswith("{"):
+			name = qualified_name(name, nsmap, True)
+		parts.append(f'{name}="{value.translate(ATTRIBUTE_ESCAPES)}"')
+	return " ".join(parts)
+
+#==============
+
+def serialize_node(node, parent_nsmap: dict) -> str:
+	"""
+	Serialize an element, comment, or PI as-is, without indentation or tail.
+
+	Used for leaf elements and for mixed-content subtrees, where added
+	whitespace would change the text.
+
+	Args:
+		node: The lxml element, comment, or processing instruction.
+		parent_nsmap (dict): Namespace map in scope at the parent.
+
+	Returns:
+		str: The serialized node.
+	"""
+	if node.tag is lxml.etree.Comment:
+		return f"<!--{node.text or ''}-->"
+	if node.tag is lxml.etree.PI:
+		return f"<?{node.target} {node.text}?>" if node.text else f"<?{node.target}?>"
+	nsmap = node.nsmap
+	tag_text = start_tag(node, nsmap, parent_nsmap)
+	if node.text is None and len(node) == 0:
+		return tag_text + "/>"
+	parts = [tag_text, ">", (node.text or "").translate(TEXT_ESCAPES)]
+	for child in node:
+		parts.append(serialize_node(child, nsmap))
+		parts.append((child.tail or "").translate(TEXT_ESCAPES))
+	parts.append(f"</{prefixed_name(node.tag, node.prefix)}>")
+	return "".join(parts)
+
+#==============
+
+def new_frame(element, state: str) -> dict:
+	"""
+	Return a stack frame for an element read by stream_format_xml.
+
+	Args:
+		element: The lxml element.
+		state (str): Initial frame state.
+
+	Returns:
+		dict: The frame.
+	"""
+	# Elements inside mixed content are serialized with their ancestor
+	nsmap = element.nsmap if state != "within" else None
+	frame = {"element": element, "state": state, "nsmap": nsmap}
+	return frame
+
+#==============
+
+def iter_xml_events(input_file: str):
+	"""
+	Yield (event, node) pairs for STREAM_EVENTS, like iterparse with remove_blank_text.
+
+	Each chunk fed to the parser ends just after a '>'. libxml2 decides whether
+	whitespace such as the space in <a> </a> is removable by looking at the
+	characters after it; split at a chunk edge, that text was dropped here
+	but kept when the whole file is parsed.
+
+	Args:
+		input_file (str): Path to the XML file to read.
+
+	Yields:
+		tuple: (event, node)
+	"""
+	parser = lxml.etree.XMLPullParser(events=STREAM_EVENTS, remove_blank_text=True)
+	carry = b""
+	with open(input_file, "rb") as handle:
+		while True:
+			block = handle.read(READ_SIZE)
+			if not block:
+				break
+			data = carry + block
+			cut = data.rfind(b">") + 1
+			carry = data[cut:]
+			if cut:
+				parser.feed(data[:cut])
+				yield from parser.read_events()
+	if carry:
+		parser.feed(carry)
+	parser.close()
+	yield from parser.read_events()
+
+#==============
+
+def find_mixed_elements(input_file: str) -> bytearray:
+	"""
+	Mark elements whose children the pretty printer leaves unindented.
+
+	libxml2 indents an element's children only when none of them is text, so
+	<p><b>x</b> tail</p> is written unchanged. Whether an element qualifies is
+	known only at its end, after its children were read, hence this first pass.
+
+	Args:
+		input_file (str): Path to the XML file to read.
+
+	Returns:
+		bytearray: One byte per element in document order; 1 marks an element
+			with both child nodes and text.
+	"""
+	context = iter_xml_events(input_file)
+	mixed = bytearray()
+	# Frames: [element number, has child nodes, has text between them]
+	stack: list[list] = []
+	for event, node in context:
+		if event == "end":
+			number, has_children, has_text = stack.pop()
+			if has_children and (has_text or node[-1].tail):
+				mixed[number] = 1
+			node.clear(keep_tail=True)
+			continue
+		if stack:
+			frame = stack[-1]
+			previous = node.getprevious()
+			if previous is None:
+				frame[2] = frame[2] or bool(node.getparent().text)
+			else:
+				frame[2] = frame[2] or bool(previous.tail)
+				# Checked siblings are no longer needed
+				parent = node.getparent()
+				while node.getprevious() is not None:
+					del parent[0]
+			frame[1] = True
+		if event == "start":
+			stack.append([len(mixed), False, False])
+			mixed.append(0)
+	return mixed
+
+#==============
+
+def prolog_text(root) -> str:
+	"""
+	Return the DOCTYPE and the comments and PIs before the root, as the pretty printer writes them.
+
+	docinfo.doctype leaves out an internal subset such as
+	<!DOCTYPE r [<!ENTITY e "x">]>, so the DOCTYPE is cut from libxml2's own
+	serialization of the document read so far, ahead of its top-level nodes.
+
+	Args:
+		root: The root element, at its start event.
+
+	Returns:
+		str: The prolog, each part on its own line.
+	"""
+	preceding = list(root.itersiblings(preceding=True))[::-1]
+	top_nodes = preceding + [root] + list(root.itersiblings())
+	tree_text = lxml.etree.tostring(root.getroottree(), encoding="unicode")
+	nodes_text = "".join(
+		lxml.etree.tostring(node, encoding="unicode", with_tail=False) for node in top_nodes
+	)
+	if not tree_text.endswith(nodes_text):
+		raise ValueError("Could not separate the DOCTYPE from the document")
+	parts = [tree_text[:len(tree_text) - len(nodes_text)]]
+	for node in preceding:
+		parts.append(serialize_node(node, {}) + "\n")
+	return "".join(parts)
+
+#==============
+
+def stream_format_xml(input_file: str, output_file: str) -> None:
+	"""
+	Pretty-print an XML file to output_file while reading it, with bounded memory.
+
+	A first pass marks mixed-content elements (find_mixed_elements, one byte
+	per element). The second pass re-indents elements as they are parsed
+	and clears each finished subtree, so only the open ancestors (plus any
+	mixed-content element being read) are held in memory. The output matches
+	format_xml_with_lxml, except that a namespace declaration repeating one
+	already in scope is not written again.
+
+	Args:
+		input_file (str): Path to the XML file to read.
+		output_file (str): Path to write; must differ from input_file.
+
+	Returns:
+		None
+	"""
+	mixed = find_mixed_elements(input_file)
+	context = iter_xml_events(input_file)
+	# Frame states: pending (nothing written yet), open (start tag written,
+	# children indented), mixed (written whole at its end), within (inside a
+	# mixed element)
+	stack: list[dict] = []
+	root_seen = False
+	element_number = 0
+	with open(output_file, "w", encoding="utf-8") as out:
+		out.write(XML_DECLARATION)
+		for event, node in context:
+			if event == "end":
+				frame = stack.pop()
+				if frame["state"] == "within":
+					continue
+				parent = stack[-1] if stack else None
+				parent_nsmap = parent["nsmap"] if parent else {}
+				if frame["state"] == "open":
+					out.write("\n" + INDENT * len(stack))
+					out.write(f"</{prefixed_name(node.tag, node.prefix)}>")
+				else:
+					out.write(serialize_node(node, parent_nsmap))
+				if parent is None:
+					out.write("\n")
+					continue
+				# Finished siblings are written; drop them to bound memory
+				node.clear(keep_tail=True)
+				while node.getprevious() is not None:
+					del parent["element"][0]
+				continue
+
+			state = "pending"
+			if event == "start":
+				if mixed[element_number]:
+					state = "mixed"
+				element_number += 1
+			parent = stack[-1] if stack else None
+			if parent is None:
+				if event == "start":
+					out.write(prolog_text(node))
+					root_seen = True
+					stack.append(new_frame(node, state))
+				elif root_seen:
+					# Comments and PIs after the root element; those before it
+					# (and any inside the DOCTYPE) come with prolog_text
+					out.write(serialize_node(node, {}) + "\n")
+				continue
+
+			if parent["state"] in ("mixed", "within"):
+				if event == "start":
+					stack.append(new_frame(node, "within"))
+				continue
+			open_parent(out, parent, stack)
+			out.write("\n" + INDENT * len(stack))
+			if event == "start":
+				stack.append(new_frame(node, state))
+			else:
+				out.write(serialize_node(node, parent["nsmap"]))
+
+#==============
+
+def open_parent(out, frame: dict, stack: list[dict]) -> None:
+	"""
+	Write a pending parent's start tag when its first child arrives.
+
+	Parents with text between their children are mixed and never get here,
+	so an opened parent's children are all indented.
+
+	Args:
+		out: The output text file.
+		frame (dict): Stack frame of the parent element.
+		stack (list[dict]): The frame stack, parent last.
+
+	Returns:
+		None
+	"""
+	if frame["state"] != "pending":
+		return
+	grandparent_nsmap = stack[-2]["nsmap"] if len(stack) > 1 else {}
+	out.write(start_tag(frame["element"], frame["nsmap"], grandparent_nsmap) + ">")
+	frame["state"] = "open"
+
+#==============
+
 def save_formatted_xml(formatted_xml: str, output_file: str) -> None:
 	"""
 	Saves the formatted XML to the specified output file.
@@ -33,7 +374,63 @@ def save_formatted_xml(formatted_xml: str, output_file: str) -> None:
 	"""
 	with open(output_file, "w") as file:
 		file.write(formatted_xml)
-	print(f"Formatted XML written to {output_file}")
+
+#==============
+
+def format_file_in_place(input_file: str, stream: bool) -> str:
+	"""
+	Format one XML file in place, keeping the original as <file>.bak.
+
+	Args:
+		input_file (str): Path to the XML file.
+		stream (bool): Use stream_format_xml instead of building the whole tree.
+
+	Returns:
+		str: The formatted file path.
+	"""
+	backup_file = input_file + ".bak"
+	if stream:
+		# Stream into a temporary file, then swap it in
+		temp_file = input_file + ".tmp"
+		try:
+			stream_format_xml(input_file, temp_file)
+		except Exception:
+			if os.path.exists(temp_file):
+				os.remove(temp_file)
+			raise
+		os.rename(input_file, backup_file)
+		os.rename(temp_file, input_file)
+		return input_file
+
+	formatted_xml = format_xml_with_lxml(input_file)
+	os.rename(input_file, backup_file)
+	save_formatted_xml(formatted_xml, input_file)
+	return input_file
+
+#==============
+
+def find_xml_files(inputs: list[str]) -> list[str]:
+	"""
+	Expand input files and directories into a sorted list of XML file paths.
+
+	Args:
+		inputs (list[str]): Files, or directories searched recursively for *.xml.
+
+	Returns:
+		list[str]: XML file paths.
+	"""
+	xml_files = set()
+	for input_path in inputs:
+		if os.path.isdir(input_path):
+			for root, _dirs, files in os.walk(input_path):
+				for name in files:
+					if name.lower().endswith(".xml"):
+						xml_files.add(os.path.join(root, name))
+		elif os.path.isfile(input_path):
+			xml_files.add(input_path)
+		else:
+			raise FileNotFoundError(f"Input not found: {input_path}")
+	return sorted(xml_files)
 
 #==============
 
@@ -44,8 +441,13 @@ def parse_args() -> argparse.Namespace:
 	Returns:
 		argparse.Namespace: Parsed command-line arguments.
 	"""
-	parser = argparse.ArgumentParser(description="Format an XML file with BeautifulSoup prettify().")
-	parser.add_argument("-i", "--input", required=True, help="Path to the input unformatted XML file.")
+	parser = argparse.ArgumentParser(description="Format XML files in place with lxml.")
+	parser.add_argument("-i", "--input", dest="inputs", action="append", required=True,
+		help="Path to an unformatted XML file, or a directory of them (repeatable).")
+	parser.add_argument("-s", "--stream", dest="stream", action="store_true",
+		help="Stream with an incremental parser instead of loading the whole tree (for large files).")
+	parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=os.cpu_count() or 1,
+		help="Parallel worker processes for many files (default: CPU count).")
 	return parser.parse_args()
 
 #==============
@@ -55,16 +457,21 @@ def main():
 	Main function to handle the script execution logic.
 	"""
 	args = parse_args()
+	xml_files = find_xml_files(args.inputs)
 
-	# Format the input XML file
-	#formatted_xml = format_xml_with_bs(args.input)
-	formatted_xml = format_xml_with_lxml(args.input)
-
-	backup_file = args.input + ".bak"
-	os.rename(args.input, backup_file)
+	# Format each file in place, in parallel when there are several
+	if args.jobs > 1 and len(xml_files) > 1:
+		with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as executor:
+			futures = [
+				executor.submit(format_file_in_place, xml_file, args.stream)
+				for xml_file in xml_files
+			]
+			output_files = [future.result() for future in futures]
+	else:
+		output_files = [format_file_in_place(xml_file, args.stream) for xml_file in xml_files]
 
-	# Handle inplace editing
-	save_formatted_xml(formatted_xml, args.input)
+	for output_file in output_files:
+		print(f"Formatted XML written to {output_file}")
 
 #==============
 